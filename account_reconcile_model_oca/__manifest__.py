@@ -5,12 +5,14 @@
     "name": "Account Reconcile Model Oca",
     "summary": """
         This includes the logic moved from Odoo Community to Odoo Enterprise""",
-    "version": "18.0.1.0.2",
+    "version": "18.0.1.3.0",
     "license": "LGPL-3",
     "author": "Dixmit,Odoo,Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/account-reconcile",
     "depends": ["account"],
     "excludes": ["account_accountant"],
-    "data": [],
+    "data": ["security/ir.model.access.csv", "data/ir_cron.xml"],
     "demo": [],
+    "pre_init_hook": "pre_init_hook",
+    "post_init_hook": "post_init_hook",
 }
@@ -0,0 +1,46 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Stamps invalidating some cached lookups without clearing the whole registry
+cache: the stamp, read from a database sequence, is part of the cache keys and
+is bumped when the cached data changes.
+
+The stamps are read once per transaction, which only sees the data of its
+snapshot anyway, so that the cached lookups do not cost a query each."""
+
+from odoo.tools import SQL
+
+
+def create_stamp_sequence(cr, sequence):
+    cr.execute(SQL("CREATE SEQUENCE IF NOT EXISTS %s", SQL.identifier(sequence)))
+
+
+# Key of the transaction data holding the stamps already read
+STAMPS_KEY = "cache_stamp.stamps"
+
+
+def get_stamp(cr, sequence):
+    stamps = cr.precommit.data.setdefault(STAMPS_KEY, {})
+    if sequence not in stamps:
+        cr.execute(SQL("SELECT last_value FROM %s", SQL.identifier(sequence)))
+        stamps[sequence] = cr.fetchone()[0]
+    return stamps[sequence]
+
+
+def bump_stamp(env, sequence):
+    """Bump the stamp right away for the current transaction, and again once it
+    is committed for the other transactions, which may have cached the previous
+    values in between."""
+    query = SQL("SELECT nextval(%s)", sequence)
+    env.cr.execute(query)
+    env.cr.precommit.data.setdefault(STAMPS_KEY, {})[sequence] = env.cr.fetchone()[0]
+    postcommit = env.cr.postcommit
+    if postcommit.data.get(sequence):
+        return
+    postcommit.data[sequence] = True
+    registry = env.registry
+
+    def bump():
+        with registry.cursor() as cr:
+            cr.execute(query)
+
+    postcommit.add(bump)
@@ -0,0 +1,13 @@
+from odoo.tools import column_exists, create_column
+
+
+def pre_init_hook(env):
+    # The column is created beforehand so that the flag is not computed on all
+    # the existing journal items: their tokens are built by post_init_hook.
+    if not column_exists(env.cr, "account_move_line", "matching_token_outdated"):
+        create_column(env.cr, "account_move_line", "matching_token_outdated", "boolean")
+
+
+def post_init_hook(env):
+    env["account.move.line.matching.token"]._update_tokens()
+    env["res.partner.name.token"]._update_tokens()
@@ -0,0 +1,10 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    # Drop the tokens of the reconciled journal items
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["account.move.line.matching.token"]._update_tokens()
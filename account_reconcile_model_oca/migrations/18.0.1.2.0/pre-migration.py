@@ -0,0 +1,10 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tools import column_exists, create_column
+
+
+def migrate(cr, version):
+    # Avoid computing the new flag on all the existing journal items
+    if not column_exists(cr, "account_move_line", "matching_token_outdated"):
+        create_column(cr, "account_move_line", "matching_token_outdated", "boolean")
@@ -0,0 +1,11 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    # The partner lookups are no longer cached with a stamp
+    cr.execute("DROP SEQUENCE IF EXISTS account_reconcile_partner_matching_stamp_seq")
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env["res.partner.name.token"]._update_tokens()
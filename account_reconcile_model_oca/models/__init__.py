@@ -1,2 +1,10 @@
 from . import account_reconcile_model
 from . import account_bank_statement_line
+from . import account_move_line_matching_token
+from . import account_account
+from . import account_move_line
+from . import res_partner
+from . import res_partner_name_token
+from . import res_currency
+from . import res_currency_rate
+from . import account_fiscal_position
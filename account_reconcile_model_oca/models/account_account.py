@@ -0,0 +1,48 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class AccountAccount(models.Model):
+    _inherit = "account.account"
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "reconcile" in vals and self:
+            # The items of the account are only flagged in SQL, instead of
+            # loading them all: their tokens are dropped when the account is no
+            # longer reconcilable, and built by the cron otherwise.
+            self.flush_recordset(["reconcile"])
+            self.env["account.move.line"].flush_model(
+                ["account_id", "parent_state", "reconciled"]
+            )
+            if vals["reconcile"]:
+                self._cr.execute(
+                    """
+                    UPDATE account_move_line
+                    SET matching_token_outdated = TRUE
+                    WHERE account_id IN %s
+                        AND parent_state = 'posted'
+                        AND NOT reconciled
+                    """,
+                    [tuple(self.ids)],
+                )
+                self.env["account.move.line"].invalidate_model(
+                    ["matching_token_outdated"]
+                )
+                self.env.ref(
+                    "account_reconcile_model_oca.ir_cron_update_outdated_tokens"
+                )._trigger()
+            else:
+                self._cr.execute(
+                    """
+                    DELETE FROM account_move_line_matching_token matching_token
+                    USING account_move_line aml
+                    WHERE aml.id = matching_token.move_line_id
+                        AND aml.account_id IN %s
+                    """,
+                    [tuple(self.ids)],
+                )
+                self.env["account.move.line.matching.token"].invalidate_model()
+        return res
@@ -1,6 +1,8 @@
 # Copyright 2023 Dixmit
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import re
+
 from odoo import models
 from odoo.tools import SQL, html2plaintext
 
@@ -10,105 +12,161 @@ from odoo.addons.base.models.res_bank import sanitize_account_number
 class AccountBankStatementLine(models.Model):
     _inherit = "account.bank.statement.line"
 
-    def _retrieve_partner(self):
-        self.ensure_one()
+    def _retrieve_partners(self):
+        """Retrieve the partner of every statement line in self.
 
-        # Retrieve the partner from the statement line.
-        if self.partner_id:
-            return self.partner_id
+        The lookups by bank account number and partner name are done once for
+        all the lines, and the remaining lines are matched against the partner
+        name tokens in a single query.
+        :return: A dict mapping each statement line id with a res.partner record
+          (possibly empty).
+        """
+        partner_model = self.env["res.partner"]
+        result = {}
+        pending = self.browse()
+        for st_line in self:
+            # Retrieve the partner from the statement line.
+            if st_line.partner_id:
+                result[st_line.id] = st_line.partner_id
+            else:
+                pending |= st_line
 
         # Retrieve the partner from the bank account.
-        if self.account_number:
-            account_number_nums = sanitize_account_number(self.account_number)
-            if account_number_nums:
-                domain = [("sanitized_acc_number", "ilike", account_number_nums)]
-                for extra_domain in ([("company_id", "=", self.company_id.id)], []):
-                    bank_accounts = self.env["res.partner.bank"].search(
-                        extra_domain + domain
-                    )
-                    if len(bank_accounts.partner_id) == 1:
-                        return bank_accounts.partner_id
+        account_numbers = {
+            st_line: (
+                st_line.company_id.id,
+                sanitize_account_number(st_line.account_number),
+            )
+            for st_line in pending
+        }
+        account_numbers = {
+            st_line: key for st_line, key in account_numbers.items() if key[1]
+        }
+        partner_ids = partner_model._get_partner_ids_from_account_numbers(
+            set(account_numbers.values())
+        )
+        for st_line, key in account_numbers.items():
+            if key in partner_ids:
+                result[st_line.id] = partner_model.browse(partner_ids[key])
+                pending -= st_line
 
         # Retrieve the partner from the partner name.
-        if self.partner_name:
-            domain = [
-                ("parent_id", "=", False),
-                ("name", "ilike", self.partner_name),
-            ]
-            for extra_domain in ([("company_id", "=", self.company_id.id)], []):
-                partner = self.env["res.partner"].search(extra_domain + domain, limit=1)
-                if partner:
-                    return partner
+        partner_names = {
+            st_line: (st_line.company_id.id, st_line.partner_name)
+            for st_line in pending
+            if st_line.partner_name
+        }
+        partner_ids = partner_model._get_partner_ids_from_names(
+            set(partner_names.values())
+        )
+        for st_line, key in partner_names.items():
+            if key in partner_ids:
+                result[st_line.id] = partner_model.browse(partner_ids[key])
+                pending -= st_line
 
         # Retrieve the partner from the 'reconcile models'.
-        rec_models = self.env["account.reconcile.model"].search(
-            [
-                ("rule_type", "!=", "writeoff_button"),
-                ("company_id", "=", self.company_id.id),
-            ]
-        )
-        for rec_model in rec_models:
-            partner = rec_model._get_partner_from_mapping(self)
-            if partner and rec_model._is_applicable_for(self, partner):
-                return partner
+        rec_models_by_company = {}
+        unresolved = []
+        for st_line in pending:
+            company = st_line.company_id
+            if company not in rec_models_by_company:
+                rec_models_by_company[company] = self.env[
+                    "account.reconcile.model"
+                ].search(
+                    [
+                        ("rule_type", "!=", "writeoff_button"),
+                        ("company_id", "=", company.id),
+                    ]
+                )
+            for rec_model in rec_models_by_company[company]:
+                partner = rec_model._get_partner_from_mapping(st_line)
+                if partner and rec_model._is_applicable_for(st_line, partner):
+                    result[st_line.id] = partner
+                    break
+            else:
+                unresolved.append(st_line)
 
         # Retrieve the partner from statement line text values.
-        st_line_text_values = self._get_st_line_strings_for_matching()
-        unaccent = self.env.registry.unaccent
-        sub_queries = []
-        params = []
-        for text_value in st_line_text_values:
-            if not text_value:
-                continue
-
-            # Find a partner having a name contained inside the statement line values.
-            # Take care a partner could contain some special characters in its name that
-            # needs to be escaped.
-            sub_queries.append(
-                SQL(
-                    rf"""
-                    {unaccent("%s")} ~* ('^' || (
-                        SELECT STRING_AGG(CONCAT('(?=.*\m', chunk[1], '\M)'), '')
-                        FROM regexp_matches({unaccent('partner.name')}, '\w{{3,}}', 'g')
-                        AS chunk
-                    ))
-                    """,
-                    text_value,
-                )
-            )
-            params.append(text_value)
-
-        if sub_queries:
-            self.env["res.partner"].flush_model(["company_id", "name"])
-            self.env["account.move.line"].flush_model(["partner_id", "company_id"])
-            query = SQL("""
-                SELECT aml.partner_id
-                FROM account_move_line aml
-                JOIN res_partner partner ON
-                    aml.partner_id = partner.id
-                    AND partner.name IS NOT NULL
-                    AND partner.active
-                    AND ((
-            """)
-            query_parts = SQL(") OR (").join(sub_queries)
-            final_query = SQL(
+        unresolved = self.browse([st_line.id for st_line in unresolved])
+        partner_ids = unresolved._retrieve_partners_from_text()
+        for st_line in unresolved:
+            result[st_line.id] = partner_model.browse(partner_ids.get(st_line.id, ()))
+        return result
+
+    def _retrieve_partners_from_text(self):
+        """Find, for every statement line in self, a partner having all the words of
+        its name inside the statement line text values and some journal items in the
+        company of the line.
+        :return: A dict mapping statement line ids with partner ids.
+        """
+        line_values = {
+            st_line.id: [
+                value
+                for value in st_line._get_st_line_strings_for_matching()
+                if value
+            ]
+            for st_line in self
+        }
+        values = {value for vals in line_values.values() for value in vals}
+        if not values:
+            return {}
+        unaccented = self.env["res.partner"]._get_unaccented_values(values)
+        words_by_value = {
+            value: set(re.findall(r"\w+", (unaccented[value] or value).lower()))
+            for value in values
+        }
+        # One row per word of every text value of the lines
+        rows = [
+            (st_line.id, st_line.company_id.id, index, word)
+            for st_line in self
+            for index, value in enumerate(line_values[st_line.id])
+            for word in words_by_value[value]
+        ]
+        if not rows:
+            return {}
+
+        self.env["res.partner"].flush_model(["active", "company_id"])
+        self.env["account.move.line"].flush_model(["partner_id", "company_id"])
+        self._cr.execute(
+            SQL(
                 """
-                %s
-                    %s
-                ))
-                WHERE aml.company_id = %s
-                LIMIT 1
-            """,
-                query,
-                query_parts,
-                self.company_id.id,
+                SELECT DISTINCT word.st_line_id, token.partner_id
+                FROM unnest(%s::int[], %s::int[], %s::int[], %s::text[])
+                    AS word(st_line_id, company_id, value_index, word)
+                JOIN res_partner_name_token token ON token.token = word.word
+                JOIN res_partner partner ON partner.id = token.partner_id
+                WHERE partner.active
+                    AND (
+                        partner.company_id IS NULL
+                        OR partner.company_id = word.company_id
+                    )
+                    AND EXISTS(
+                        SELECT 1
+                        FROM account_move_line aml
+                        WHERE aml.company_id = word.company_id
+                            AND aml.partner_id = token.partner_id
+                    )
+                GROUP BY
+                    word.st_line_id,
+                    word.value_index,
+                    token.partner_id,
+                    token.token_count
+                HAVING COUNT(*) = token.token_count
+                """,
+                *(list(column) for column in zip(*rows)),
             )
-            self._cr.execute(final_query)
-            row = self._cr.fetchone()
-            if row:
-                return self.env["res.partner"].browse(row[0])
+        )
+        candidates = {}
+        for st_line_id, partner_id in self._cr.fetchall():
+            candidates.setdefault(st_line_id, []).append(partner_id)
+        return {
+            st_line_id: min(partner_ids)
+            for st_line_id, partner_ids in candidates.items()
+        }
 
-        return self.env["res.partner"]
+    def _retrieve_partner(self):
+        self.ensure_one()
+        return self._retrieve_partners()[self.id]
 
     def _get_st_line_strings_for_matching(self, allowed_fields=None):
         """Collect the strings that could be used on the statement line to perform some
@@ -0,0 +1,44 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class AccountFiscalPosition(models.Model):
+    _inherit = "account.fiscal.position"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+
+class AccountFiscalPositionTax(models.Model):
+    _inherit = "account.fiscal.position.tax"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
@@ -0,0 +1,56 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models, tools
+
+# Key of the transaction data holding the ids of the journal items whose
+# matching tokens must be rebuilt once they are flushed
+OUTDATED_TOKENS_KEY = "account_reconcile_model_oca.outdated_token_line_ids"
+
+
+class AccountMoveLine(models.Model):
+    _inherit = "account.move.line"
+
+    matching_token_outdated = fields.Boolean(
+        compute="_compute_matching_token_outdated",
+        store=True,
+        copy=False,
+        help="Technical field flagging the items whose matching tokens must be "
+        "rebuilt.",
+    )
+
+    def init(self):
+        super().init()
+        tools.create_index(
+            self._cr,
+            "account_move_line_matching_token_outdated_index",
+            self._table,
+            ["id"],
+            where="matching_token_outdated",
+        )
+
+    @api.depends(
+        "name",
+        "account_id",
+        "move_id.name",
+        "move_id.ref",
+        "parent_state",
+        "reconciled",
+    )
+    def _compute_matching_token_outdated(self):
+        # Any change of the texts, the state or the reconciliation of an item is
+        # caught by the dependencies, whether it comes from a write or from a
+        # compute. The tokens are rebuilt by the transaction making the change
+        # once the items are flushed, so that the lookups only read them.
+        self.matching_token_outdated = True
+        self.env.cr.precommit.data.setdefault(OUTDATED_TOKENS_KEY, set()).update(
+            line_id for line_id in self._ids if isinstance(line_id, int)
+        )
+
+    def _flush(self, fnames=None):
+        super()._flush(fnames)
+        line_ids = self.env.cr.precommit.data.pop(OUTDATED_TOKENS_KEY, None)
+        if line_ids:
+            self.env["account.move.line.matching.token"]._update_outdated_tokens(
+                self.browse(line_ids)
+            )
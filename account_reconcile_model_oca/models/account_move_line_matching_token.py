@@ -0,0 +1,169 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models, tools
+
+# Sources of the tokens, matching the match_text_location_* options of the
+# reconciliation models: (source, table alias, column).
+TOKEN_SOURCES = [
+    ("label", "aml", "name"),
+    ("note", "move", "name"),
+    ("reference", "move", "ref"),
+]
+
+
+class AccountMoveLineMatchingToken(models.Model):
+    """Tokens extracted from the open journal items, used by the invoice matching
+    rules to look up candidates without parsing the whole ledger."""
+
+    _name = "account.move.line.matching.token"
+    _description = "Journal Item Matching Token"
+    _log_access = False
+
+    move_line_id = fields.Many2one(
+        "account.move.line", required=True, index=True, ondelete="cascade"
+    )
+    source = fields.Selection(
+        [("label", "Label"), ("note", "Note"), ("reference", "Reference")],
+        required=True,
+    )
+    kind = fields.Selection(
+        [("numerical", "Numerical"), ("exact", "Exact")],
+        required=True,
+    )
+    token = fields.Char(required=True)
+
+    def init(self):
+        tools.create_index(
+            self._cr,
+            "account_move_line_matching_token_lookup_index",
+            self._table,
+            ["token", "kind", "source"],
+        )
+
+    @api.model
+    def _update_tokens(self, move_lines=None):
+        """Rebuild the tokens of the journal items passed as parameter, or of all
+        the journal items if none is given.
+        Only the open items of posted entries on reconcilable accounts are kept,
+        as they are the only ones the matching rules can propose.
+        """
+        if move_lines is not None and not move_lines:
+            return
+        self.env["account.account"].flush_model(["reconcile"])
+        self.env["account.move"].flush_model(["name", "ref", "state"])
+        self.env["account.move.line"].flush_model(
+            ["name", "move_id", "account_id", "parent_state", "reconciled"]
+        )
+        where = (
+            "aml.parent_state = 'posted' AND NOT aml.reconciled AND account.reconcile"
+        )
+        params = []
+        if move_lines is None:
+            self._cr.execute(f"TRUNCATE {self._table}")
+        else:
+            self._cr.execute(
+                f"DELETE FROM {self._table} WHERE move_line_id IN %s",
+                [tuple(move_lines.ids)],
+            )
+            where += " AND aml.id IN %s"
+        sub_queries = []
+        for source, table_alias, field in TOKEN_SOURCES:
+            sub_queries.append(
+                rf"""
+                SELECT
+                    aml.id AS move_line_id,
+                    '{source}' AS source,
+                    'numerical' AS kind,
+                    UNNEST(
+                        REGEXP_SPLIT_TO_ARRAY(
+                            SUBSTRING(
+                                REGEXP_REPLACE(
+                                    {table_alias}.{field}, '[^0-9\s]', '', 'g'
+                                ),
+                                '\S(?:.*\S)*'
+                            ),
+                            '\s+'
+                        )
+                    ) AS token
+                FROM account_move_line aml
+                JOIN account_move move ON move.id = aml.move_id
+                JOIN account_account account ON account.id = aml.account_id
+                WHERE {where} AND {table_alias}.{field} IS NOT NULL
+                """
+            )
+            sub_queries.append(
+                f"""
+                SELECT
+                    aml.id AS move_line_id,
+                    '{source}' AS source,
+                    'exact' AS kind,
+                    {table_alias}.{field} AS token
+                FROM account_move_line aml
+                JOIN account_move move ON move.id = aml.move_id
+                JOIN account_account account ON account.id = aml.account_id
+                WHERE {where} AND COALESCE({table_alias}.{field}, '') != ''
+                """
+            )
+            if move_lines is not None:
+                params += [tuple(move_lines.ids)] * 2
+        self._cr.execute(
+            f"""
+            INSERT INTO {self._table} (move_line_id, source, kind, token)
+            SELECT sub.move_line_id, sub.source, sub.kind, sub.token
+            FROM ({" UNION ALL ".join(sub_queries)}) AS sub
+            WHERE sub.token IS NOT NULL
+            """,
+            params,
+        )
+
+    @api.model
+    def _update_outdated_tokens(self, move_lines):
+        """Rebuild the tokens of the journal items passed as parameter, flagged
+        as outdated because their texts, state or reconciliation changed, and
+        clear their flag."""
+        move_lines.flush_recordset(["matching_token_outdated"])
+        self._update_tokens(move_lines)
+        self._cr.execute(
+            """
+            UPDATE account_move_line
+            SET matching_token_outdated = FALSE
+            WHERE id IN %s AND matching_token_outdated
+            """,
+            [tuple(move_lines.ids)],
+        )
+        move_lines.invalidate_recordset(["matching_token_outdated"])
+
+    @api.model
+    def _cron_update_outdated_tokens(self, batch_size=None):
+        """Rebuild the tokens of the journal items still flagged as outdated, such
+        as the items of the accounts made reconcilable, which are only flagged in
+        SQL. The items are processed in batches of `batch_size`, committing after
+        each batch; the ones locked by a transaction in progress are left to it.
+        """
+        if batch_size is None:
+            batch_size = int(
+                self.env["ir.config_parameter"]
+                .sudo()
+                .get_param("account_reconcile_model_oca.token_batch_size", 10000)
+            )
+        auto_commit = not tools.config["test_enable"]
+        while True:
+            self._cr.execute(
+                """
+                SELECT id
+                FROM account_move_line
+                WHERE matching_token_outdated
+                LIMIT %s
+                FOR NO KEY UPDATE SKIP LOCKED
+                """,
+                [batch_size],
+            )
+            line_ids = [row[0] for row in self._cr.fetchall()]
+            if not line_ids:
+                break
+            self._update_outdated_tokens(
+                self.env["account.move.line"].browse(line_ids)
+            )
+            if auto_commit:
+                self._cr.commit()  # pylint: disable=invalid-commit
@@ -1,14 +1,174 @@
+import copy
+import logging
 import re
 from collections import defaultdict
 
 from dateutil.relativedelta import relativedelta
 
-from odoo import Command, fields, models, tools
+from odoo import Command, api, fields, models, tools
+from odoo.osv import expression
+
+from ..cache_stamp import bump_stamp, create_stamp_sequence, get_stamp
+
+_logger = logging.getLogger(__name__)
+
+# Sequence whose value is part of the key of the cached write-off lines
+WRITE_OFF_STAMP_SEQUENCE = "account_reconcile_model_write_off_stamp_seq"
+
+# Sequence whose value is part of the key of the cached rule index
+RULE_INDEX_STAMP_SEQUENCE = "account_reconcile_model_rule_index_stamp_seq"
+
+# Statement line values checked by the match_label, match_note and
+# match_transaction_type criteria.
+RULE_TEXT_FIELDS = [
+    ("label", "payment_ref"),
+    ("note", "narration"),
+    ("transaction_type", "transaction_type"),
+]
 
 
 class AccountReconcileModel(models.Model):
     _inherit = "account.reconcile.model"
 
+    def init(self):
+        super().init()
+        create_stamp_sequence(self._cr, WRITE_OFF_STAMP_SEQUENCE)
+        create_stamp_sequence(self._cr, RULE_INDEX_STAMP_SEQUENCE)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        bump_stamp(self.env, RULE_INDEX_STAMP_SEQUENCE)
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        bump_stamp(self.env, RULE_INDEX_STAMP_SEQUENCE)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        bump_stamp(self.env, RULE_INDEX_STAMP_SEQUENCE)
+        return res
+
+    ####################################################
+    # RULE INDEX
+    ####################################################
+
+    @api.model
+    def _get_rule_index(self, company_id):
+        """Compile the criteria of the reconciliation models of a company so that
+        they can be checked without reading the models again. The result is
+        cached until a reconciliation model changes and must not be altered.
+        :param company_id: The id of the company.
+        :return: A dict with:
+            * models: A dict mapping each model id with its compiled criteria.
+            * candidates: A dict mapping (journal_id, sign of the amount) with the
+              ids of the models that may apply, in sequence order. The key
+              (False, sign) gives the models not restricted on journals.
+        """
+        return self._get_rule_index_cached(
+            company_id, get_stamp(self._cr, RULE_INDEX_STAMP_SEQUENCE)
+        )
+
+    @api.model
+    @tools.ormcache("company_id", "stamp")
+    def _get_rule_index_cached(self, company_id, stamp):
+        rec_models = (
+            self.sudo()
+            .with_context(active_test=False)
+            .search([("company_id", "=", company_id)])
+            .sorted()
+        )
+        compiled_models = {}
+        journal_ids = set()
+        for rec_model in rec_models:
+            compiled_models[rec_model.id] = rec_model._compile_rule_criteria()
+            journal_ids |= compiled_models[rec_model.id]["journal_ids"]
+        candidates = {}
+        for journal_id in journal_ids | {False}:
+            for sign in (-1, 0, 1):
+                candidates[journal_id, sign] = tuple(
+                    model_id
+                    for model_id, compiled in compiled_models.items()
+                    if compiled["rule_type"] != "writeoff_button"
+                    and (
+                        not compiled["journal_ids"]
+                        or journal_id in compiled["journal_ids"]
+                    )
+                    and not (
+                        compiled["match_nature"] == "amount_received" and sign < 0
+                    )
+                    and not (compiled["match_nature"] == "amount_paid" and sign > 0)
+                )
+        return {"models": compiled_models, "candidates": candidates}
+
+    def _compile_rule_criteria(self):
+        """Compile the matching criteria of the model for `_is_applicable_for`.
+        A model whose regex is invalid is flagged and never applies, instead of
+        breaking the matching of the other models."""
+        self.ensure_one()
+        text_rules = []
+        invalid_regex = False
+        for rule_field, record_field in RULE_TEXT_FIELDS:
+            operator = self["match_" + rule_field]
+            if not operator:
+                continue
+            term = (self["match_" + rule_field + "_param"] or "").lower()
+            regex = None
+            if operator == "match_regex":
+                try:
+                    regex = re.compile(term)
+                except re.error as error:
+                    _logger.warning(
+                        "Invalid regex %r on reconciliation model %s: %s",
+                        term,
+                        self.display_name,
+                        error,
+                    )
+                    invalid_regex = True
+            text_rules.append((record_field, operator, term, regex))
+        return {
+            "rule_type": self.rule_type,
+            "journal_ids": frozenset(self.match_journal_ids.ids),
+            "match_nature": self.match_nature,
+            "match_amount": self.match_amount,
+            "match_amount_min": self.match_amount_min,
+            "match_amount_max": self.match_amount_max,
+            "match_partner": self.match_partner,
+            "partner_ids": frozenset(self.match_partner_ids.ids),
+            "partner_category_ids": frozenset(self.match_partner_category_ids.ids),
+            "text_rules": tuple(text_rules),
+            "invalid_regex": invalid_regex,
+        }
+
+    def _get_rule_candidates(self, st_line):
+        """Return the models of self that may apply to the statement line
+        according to its journal and the sign of its amount, in sequence order.
+        """
+        self_ids = set(self.ids)
+        journal_id = st_line.move_id.journal_id.id
+        sign = (st_line.amount > 0) - (st_line.amount < 0)
+        candidate_ids = []
+        indexed_ids = set()
+        for company in self.company_id:
+            index = self._get_rule_index(company.id)
+            indexed_ids |= set(index["models"])
+            candidate_ids += [
+                model_id
+                for model_id in index["candidates"].get(
+                    (journal_id, sign), index["candidates"][False, sign]
+                )
+                if model_id in self_ids
+            ]
+        candidates = self.browse(candidate_ids)
+        # Models missing from the index, such as new records, are checked by
+        # _is_applicable_for without the index
+        unindexed = self.filtered(lambda rec_model: rec_model.id not in indexed_ids)
+        if unindexed or len(self.company_id) > 1:
+            candidates = (candidates | unindexed).sorted()
+        return candidates
+
     ####################################################
     # RECONCILIATION PROCESS
     ####################################################
@@ -121,15 +281,29 @@ class AccountReconcileModel(models.Model):
             return []
 
         currency = self.company_id.currency_id
+        fiscal_position_id = False
+        if self.line_ids.tax_ids:
+            fiscal_position_id = (
+                self.env["account.fiscal.position"]
+                ._get_fiscal_position(self.env["res.partner"].browse(partner_id))
+                .id
+            )
+        template = self._get_write_off_move_lines_template(
+            fiscal_position_id,
+            self.env.lang,
+            get_stamp(self._cr, WRITE_OFF_STAMP_SEQUENCE),
+        )
 
         lines_vals_list = []
-        for line in self.line_ids:
+        for line_template in template:
             balance = 0
-            if line.amount_type == "percentage":
-                balance = currency.round(residual_balance * (line.amount / 100.0))
-            elif line.amount_type == "fixed":
+            if line_template["amount_type"] == "percentage":
                 balance = currency.round(
-                    line.amount * (1 if residual_balance > 0.0 else -1)
+                    residual_balance * (line_template["amount"] / 100.0)
+                )
+            elif line_template["amount_type"] == "fixed":
+                balance = currency.round(
+                    line_template["amount"] * (1 if residual_balance > 0.0 else -1)
                 )
             else:
                 balance = 0.0
@@ -137,32 +311,68 @@ class AccountReconcileModel(models.Model):
             if currency.is_zero(balance):
                 continue
 
-            writeoff_line = line._get_write_off_move_line_dict(balance, currency)
+            writeoff_line = dict(
+                copy.deepcopy(line_template["vals"]),
+                balance=balance,
+                debit=balance > 0 and balance or 0,
+                credit=balance < 0 and -balance or 0,
+            )
             lines_vals_list.append(writeoff_line)
 
             residual_balance -= balance
 
-            if line.tax_ids:
-                taxes = line.tax_ids
-                detected_fiscal_position = self.env[
-                    "account.fiscal.position"
-                ]._get_fiscal_position(self.env["res.partner"].browse(partner_id))
-                if detected_fiscal_position:
-                    taxes = detected_fiscal_position.map_tax(taxes)
+            if line_template["tax_ids"]:
+                taxes = self.env["account.tax"].browse(line_template["tax_ids"])
                 writeoff_line["tax_ids"] += [Command.set(taxes.ids)]
                 # Multiple taxes with force_tax_included results in wrong computation,
                 # so we only allow to set the force_tax_included field if we have one
                 # tax selected
-                if line.force_tax_included:
+                if line_template["force_tax_included"]:
                     taxes = taxes[0].with_context(force_price_include=True)
                 tax_vals_list = self._get_taxes_move_lines_dict(taxes, writeoff_line)
                 lines_vals_list += tax_vals_list
-                if not line.force_tax_included:
+                if not line_template["force_tax_included"]:
                     for tax_line in tax_vals_list:
                         residual_balance -= tax_line["balance"]
 
         return lines_vals_list
 
+    @tools.ormcache("self.id", "fiscal_position_id", "lang", "stamp")
+    def _get_write_off_move_lines_template(self, fiscal_position_id, lang, stamp):
+        """Read the write-off lines of the model, with their taxes mapped by the
+        fiscal position, for `_get_write_off_move_lines_dict`, which computes
+        their amounts. The result does not depend on the amounts, so it is cached
+        until the lines of a reconciliation model or a fiscal position are
+        modified, and must not be altered.
+        :param lang: The language of the labels.
+        :param stamp: The current stamp of the write-off lines, see
+          `_bump_write_off_stamp`.
+        """
+        currency = self.company_id.currency_id
+        fiscal_position = self.env["account.fiscal.position"].browse(
+            fiscal_position_id
+        )
+        template = []
+        for line in self.with_context(lang=lang).line_ids:
+            taxes = line.tax_ids
+            if taxes and fiscal_position:
+                taxes = fiscal_position.map_tax(taxes)
+            template.append(
+                {
+                    "amount_type": line.amount_type,
+                    "amount": line.amount,
+                    "force_tax_included": line.force_tax_included,
+                    "tax_ids": taxes.ids,
+                    "vals": line._get_write_off_move_line_dict(0.0, currency),
+                }
+            )
+        return template
+
+    @api.model
+    def _bump_write_off_stamp(self):
+        """Invalidate the cached write-off lines."""
+        bump_stamp(self.env, WRITE_OFF_STAMP_SEQUENCE)
+
     ####################################################
     # RECONCILIATION CRITERIA
     ####################################################
@@ -182,112 +392,177 @@ class AccountReconcileModel(models.Model):
             * auto_reconcile: A flag indicating if the match is enough significant to
               auto reconcile the candidates.
         """
-        available_models = self.filtered(
-            lambda m: m.rule_type != "writeoff_button"
-        ).sorted()
-
-        for rec_model in available_models:
-            if not rec_model._is_applicable_for(st_line, partner):
-                continue
+        return self._apply_rules_batch(st_line, {st_line.id: partner}).get(
+            st_line.id, {}
+        )
 
-            if rec_model.rule_type == "invoice_matching":
-                rules_map = rec_model._get_invoice_matching_rules_map()
-                for rule_index in sorted(rules_map.keys()):
-                    for rule_method in rules_map[rule_index]:
-                        candidate_vals = rule_method(st_line, partner)
-                        if not candidate_vals:
-                            continue
-
-                        if candidate_vals.get("amls"):
-                            res = rec_model._get_invoice_matching_amls_result(
-                                st_line, partner, candidate_vals
-                            )
-                            if res:
-                                return {
-                                    **res,
-                                    "model": rec_model,
-                                }
-                        else:
-                            return {
-                                **candidate_vals,
-                                "model": rec_model,
-                            }
-
-            elif rec_model.rule_type == "writeoff_suggestion":
-                return {
-                    "model": rec_model,
+    def _apply_rules_batch(self, st_lines, partners):
+        """Apply the reconciliation models on several statement lines at once.
+        The models are evaluated in sequence order, each one against all the
+        statement lines it applies to and that are still unmatched: the criteria
+        are checked in memory with the rule index, and the candidates are
+        searched for all those lines together by `_apply_model_rules_batch`.
+        :param st_lines: The statement lines to match.
+        :param partners: A dict mapping each statement line id with the partner to
+          consider, as returned by `_retrieve_partners`.
+        :return: A dict mapping each matched statement line id with the result of
+          `_apply_rules`.
+        """
+        # Convert the amounts with the rates table of the statement line date
+        st_lines = st_lines.with_context(reconcile_rate_table=True)
+        no_partner = self.env["res.partner"]
+        rule_candidates = {
+            st_line.id: set(self._get_rule_candidates(st_line).ids)
+            for st_line in st_lines
+        }
+        results = {}
+        for rec_model in self.sorted():
+            pending_ids = [
+                st_line.id
+                for st_line in st_lines
+                if st_line.id not in results
+                and rec_model.company_id == st_line.company_id
+                and rec_model.id in rule_candidates[st_line.id]
+                and rec_model._is_applicable_for(
+                    st_line, partners.get(st_line.id) or no_partner
+                )
+            ]
+            if pending_ids:
+                results.update(
+                    rec_model._apply_model_rules_batch(
+                        st_lines.browse(pending_ids), partners
+                    )
+                )
+        return results
+
+    def _apply_model_rules_batch(self, st_lines, partners):
+        """Apply the model on statement lines it is applicable for.
+
+        The rules of `_get_invoice_matching_rules_map` are called for all the
+        statement lines not matched by a previous rule. A rule method may have a
+        counterpart named after it with a `_batch` suffix, taking the statement
+        lines and the partners and returning the candidates of each statement
+        line: it is used instead, so that the candidates are searched with a few
+        queries for the whole batch. Modules overriding such a rule must
+        override its batch counterpart.
+        :return: A dict mapping each matched statement line id with the result of
+          `_apply_rules`.
+        """
+        self.ensure_one()
+        if self.rule_type == "writeoff_suggestion":
+            return {
+                st_line.id: {
+                    "model": self,
                     "status": "write_off",
-                    "auto_reconcile": rec_model.auto_reconcile,
+                    "auto_reconcile": self.auto_reconcile,
                 }
-        return {}
-
-    def _is_applicable_for(self, st_line, partner):
+                for st_line in st_lines
+            }
+        results = {}
+        if self.rule_type != "invoice_matching":
+            return results
+        no_partner = self.env["res.partner"]
+        rules_map = self._get_invoice_matching_rules_map()
+        for rule_index in sorted(rules_map.keys()):
+            for rule_method in rules_map[rule_index]:
+                pending = st_lines.filtered(lambda st_line: st_line.id not in results)
+                if not pending:
+                    return results
+                batch_method = getattr(self, f"{rule_method.__name__}_batch", None)
+                if batch_method:
+                    candidates = batch_method(pending, partners)
+                else:
+                    candidates = {
+                        st_line.id: rule_method(
+                            st_line, partners.get(st_line.id) or no_partner
+                        )
+                        for st_line in pending
+                    }
+                for st_line in pending:
+                    candidate_vals = candidates.get(st_line.id)
+                    if not candidate_vals:
+                        continue
+                    if candidate_vals.get("amls"):
+                        res = self._get_invoice_matching_amls_result(
+                            st_line,
+                            partners.get(st_line.id) or no_partner,
+                            candidate_vals,
+                        )
+                        if res:
+                            results[st_line.id] = {**res, "model": self}
+                    else:
+                        results[st_line.id] = {**candidate_vals, "model": self}
+        return results
+
+    def _is_applicable_for(self, st_line, partner, journal=None):
         """Returns true iff this reconciliation model can be used to search for matches
         for the provided statement line and partner.
+        :param journal: The journal of the statement line, when the line is not
+          created yet and has no journal entry.
         """
         self.ensure_one()
+        compiled = self._get_rule_index(self.company_id.id)["models"].get(self.id)
+        if compiled is None:
+            compiled = self._compile_rule_criteria()
+        if compiled["invalid_regex"]:
+            return False
+        amount = abs(st_line.amount)
+        journal_id = (journal or st_line.move_id.journal_id).id
 
         # Filter on journals, amount nature, amount and partners
         # All the conditions defined in this block are non-match conditions.
         if (
             (
-                self.match_journal_ids
-                and st_line.move_id.journal_id not in self.match_journal_ids
+                compiled["journal_ids"]
+                and journal_id not in compiled["journal_ids"]
             )
-            or (self.match_nature == "amount_received" and st_line.amount < 0)
-            or (self.match_nature == "amount_paid" and st_line.amount > 0)
+            or (compiled["match_nature"] == "amount_received" and st_line.amount < 0)
+            or (compiled["match_nature"] == "amount_paid" and st_line.amount > 0)
             or (
-                self.match_amount == "lower"
-                and abs(st_line.amount) >= self.match_amount_max
+                compiled["match_amount"] == "lower"
+                and amount >= compiled["match_amount_max"]
             )
             or (
-                self.match_amount == "greater"
-                and abs(st_line.amount) <= self.match_amount_min
+                compiled["match_amount"] == "greater"
+                and amount <= compiled["match_amount_min"]
             )
             or (
-                self.match_amount == "between"
+                compiled["match_amount"] == "between"
                 and (
-                    abs(st_line.amount) > self.match_amount_max
-                    or abs(st_line.amount) < self.match_amount_min
+                    amount > compiled["match_amount_max"]
+                    or amount < compiled["match_amount_min"]
                 )
             )
-            or (self.match_partner and not partner)
+            or (compiled["match_partner"] and not partner)
             or (
-                self.match_partner
-                and self.match_partner_ids
-                and partner not in self.match_partner_ids
+                compiled["match_partner"]
+                and compiled["partner_ids"]
+                and partner.id not in compiled["partner_ids"]
             )
             or (
-                self.match_partner
-                and self.match_partner_category_ids
-                and not (partner.category_id & self.match_partner_category_ids)
+                compiled["match_partner"]
+                and compiled["partner_category_ids"]
+                and compiled["partner_category_ids"].isdisjoint(
+                    partner.category_id.ids
+                )
             )
         ):
             return False
 
         # Filter on label, note and transaction_type
-        for record, rule_field, record_field in [
-            (st_line, "label", "payment_ref"),
-            (st_line.move_id, "note", "narration"),
-            (st_line, "transaction_type", "transaction_type"),
-        ]:
-            rule_term = (self["match_" + rule_field + "_param"] or "").lower()
-            record_term = (record[record_field] or "").lower()
+        records = {
+            "payment_ref": st_line,
+            "narration": st_line.move_id,
+            "transaction_type": st_line,
+        }
+        for record_field, operator, rule_term, regex in compiled["text_rules"]:
+            record_term = (records[record_field][record_field] or "").lower()
 
             # This defines non-match conditions
             if (
-                (
-                    self["match_" + rule_field] == "contains"
-                    and rule_term not in record_term
-                )
-                or (
-                    self["match_" + rule_field] == "not_contains"
-                    and rule_term in record_term
-                )
-                or (
-                    self["match_" + rule_field] == "match_regex"
-                    and not re.match(rule_term, record_term)
-                )
+                (operator == "contains" and rule_term not in record_term)
+                or (operator == "not_contains" and rule_term in record_term)
+                or (operator == "match_regex" and not regex.match(record_term))
             ):
                 return False
 
@@ -380,173 +655,259 @@ class AccountReconcileModel(models.Model):
         :param st_line: A statement line.
         :param partner: The partner associated to the statement line.
         """
+        return self._get_invoice_matching_amls_candidates_batch(
+            st_line, {st_line.id: partner}
+        ).get(st_line.id)
+
+    def _get_invoice_matching_amls_batch_domain(self, st_line):
+        """Return the domain of `_get_invoice_matching_amls_domain` for the
+        statement line without partner, where the conditions on the statement
+        line itself (its own journal items, the sign of its amount and its
+        currency) are neutralized, as the batch queries check them for each
+        statement line."""
+        currency = st_line.foreign_currency_id or st_line.currency_id
+        st_line_leaves = [
+            ("statement_line_id", "!=", st_line.id),
+            ("balance", ">", 0.0),
+            ("balance", "<", 0.0),
+            ("currency_id", "=", currency.id),
+        ]
+        return [
+            expression.TRUE_LEAF
+            if isinstance(leaf, (list, tuple)) and tuple(leaf) in st_line_leaves
+            else leaf
+            for leaf in self._get_invoice_matching_amls_domain(
+                st_line, self.env["res.partner"]
+            )
+        ]
+
+    def _get_invoice_matching_amls_candidates_batch(self, st_lines, partners):
+        """Batch counterpart of `_get_invoice_matching_amls_candidates`: the
+        candidates of all the statement lines, which belong to the company of
+        the model, are searched with one query per kind of lookup (tokens,
+        amount, partner) instead of one query per statement line.
+        :param st_lines: The statement lines.
+        :param partners: A dict mapping each statement line id with its partner.
+        :return: A dict mapping the id of each statement line having candidates
+          with the result of `_get_invoice_matching_amls_candidates`.
+        """
 
         def get_order_by_clause(alias=None):
             direction = "DESC" if self.matching_order == "new_first" else "ASC"
             dotted_alias = f"{alias}." if alias else ""
             return f"{dotted_alias}date_maturity {direction}, {dotted_alias}date {direction}, {dotted_alias}id {direction}"  # noqa: E501
 
+        def fetch_candidates(query, params):
+            self._cr.execute(query, params)
+            candidate_ids = defaultdict(list)
+            for st_line_id, aml_id in self._cr.fetchall():
+                candidate_ids[st_line_id].append(aml_id)
+            return candidate_ids
+
         assert self.rule_type == "invoice_matching"
+        if not st_lines:
+            return {}
         self.env["account.move"].flush_model()
         self.env["account.move.line"].flush_model()
 
-        aml_domain = self._get_invoice_matching_amls_domain(st_line, partner)
+        aml_domain = self._get_invoice_matching_amls_batch_domain(st_lines[0])
         query = self.env["account.move.line"]._where_calc(aml_domain)
-        from_string, from_params = query.from_clause
-        where_string, where_params = query.where_clause
-        from_clause = from_string
-        where_clause = where_string
-
-        sub_queries = []
-        all_params = []
-        aml_cte = ""
-        (
-            numerical_tokens,
-            exact_tokens,
-            _text_tokens,
-        ) = self._get_invoice_matching_st_line_tokens(st_line)
-        if numerical_tokens or exact_tokens:
-            aml_cte = rf"""
-                WITH aml_cte AS (
-                    SELECT
-                        account_move_line.id as account_move_line_id,
-                        account_move_line.date as account_move_line_date,
-                        account_move_line.date_maturity as account_move_line_date_maturity,
-                        account_move_line.name as account_move_line_name,
-                        account_move_line__move_id.name as account_move_line__move_id_name,
-                        account_move_line__move_id.ref as account_move_line__move_id_ref
-                    FROM {from_clause}
-                    JOIN account_move account_move_line__move_id
-                        ON account_move_line__move_id.id = account_move_line.move_id
-                    WHERE {where_clause}
-                )
-            """  # noqa: E501
-            all_params += where_params
+        from_clause, from_params = query.from_clause
+        where_clause, where_params = query.where_clause
+        order_by = get_order_by_clause(alias="account_move_line")
+        no_partner = self.env["res.partner"]
+        # Conditions on each statement line, joined as st_line with the columns
+        # id, partner_id, positive and currency_id.
+        st_line_conditions = """
+            (
+                st_line.partner_id IS NULL
+                OR account_move_line.partner_id = st_line.partner_id
+            )
+            AND CASE WHEN st_line.positive
+                THEN account_move_line.balance > 0.0
+                ELSE account_move_line.balance < 0.0
+            END
+            AND account_move_line.statement_line_id IS DISTINCT FROM st_line.id
+        """
+        if self.match_same_currency:
+            st_line_conditions += """
+                AND account_move_line.currency_id = st_line.currency_id
+            """
+
+        def st_line_values(st_lines):
+            return [
+                st_lines.ids,
+                [(partners.get(st_line.id) or no_partner).id for st_line in st_lines],
+                [st_line.amount > 0.0 for st_line in st_lines],
+                [
+                    (st_line.foreign_currency_id or st_line.currency_id).id
+                    for st_line in st_lines
+                ],
+            ]
 
-        enabled_matches = []
+        token_sources = []
         if self.match_text_location_label:
-            enabled_matches.append(("account_move_line", "name"))
+            token_sources.append("label")
         if self.match_text_location_note:
-            enabled_matches.append(("account_move_line__move_id", "name"))
+            token_sources.append("note")
         if self.match_text_location_reference:
-            enabled_matches.append(("account_move_line__move_id", "ref"))
-
-        if numerical_tokens:
-            for table_alias, field in enabled_matches:
-                sub_queries.append(
-                    rf"""
-                    SELECT
-                        account_move_line_id as id,
-                        account_move_line_date as date,
-                        account_move_line_date_maturity as date_maturity,
-                        UNNEST(
-                            REGEXP_SPLIT_TO_ARRAY(
-                                SUBSTRING(
-                                    REGEXP_REPLACE(
-                                        {table_alias}_{field}, '[^0-9\s]', '', 'g'
-                                    ),
-                                    '\S(?:.*\S)*'
-                                ),
-                                '\s+'
-                            )
-                        ) AS token
-                    FROM aml_cte
-                    WHERE {table_alias}_{field} IS NOT NULL
-                """
-                )
-
-        if exact_tokens:
-            for table_alias, field in enabled_matches:
-                sub_queries.append(
-                    rf"""
-                    SELECT
-                        account_move_line_id as id,
-                        account_move_line_date as date,
-                        account_move_line_date_maturity as date_maturity,
-                        {table_alias}_{field} AS token
-                    FROM aml_cte
-                    WHERE COALESCE({table_alias}_{field}, '') != ''
-                """
+            token_sources.append("reference")
+        token_rows = set()
+        token_lines = amount_lines = partner_lines = st_lines.browse()
+        for st_line in st_lines:
+            (
+                numerical_tokens,
+                exact_tokens,
+                _text_tokens,
+            ) = self._get_invoice_matching_st_line_tokens(st_line)
+            token_kinds = []
+            if numerical_tokens:
+                token_kinds.append("numerical")
+            if exact_tokens:
+                token_kinds.append("exact")
+            if token_kinds and token_sources:
+                token_lines |= st_line
+                token_rows.update(
+                    (st_line.id, token, kind)
+                    for token in numerical_tokens + exact_tokens
+                    for kind in token_kinds
                 )
-
-        if sub_queries:
-            order_by = get_order_by_clause(alias="sub")
-            self._cr.execute(
-                aml_cte
-                + """
-                    SELECT
-                        sub.id,
-                        COUNT(*) AS nb_match
-                    FROM ("""
-                + " UNION ALL ".join(sub_queries)
-                + """) AS sub
-                    WHERE sub.token IN %s
-                    GROUP BY sub.date_maturity, sub.date, sub.id
-                    HAVING COUNT(*) > 0
-                    ORDER BY nb_match DESC, """
-                + order_by
-                + """
+            elif partners.get(st_line.id):
+                partner_lines |= st_line
+            else:
+                amount_lines |= st_line
+
+        results = {}
+        if token_lines:
+            # The tokens of the journal items are maintained in
+            # account.move.line.matching.token, so the lookup is done on its index
+            # instead of parsing the text of every open journal item.
+            st_line_ids, tokens, kinds = (list(column) for column in zip(*token_rows))
+            candidate_ids = fetch_candidates(
+                f"""
+                    SELECT st_line.id, account_move_line.id
+                    FROM {from_clause}
+                    JOIN account_move_line_matching_token matching_token
+                        ON matching_token.move_line_id = account_move_line.id
+                    JOIN unnest(%s::int[], %s::varchar[], %s::varchar[])
+                        AS st_line_token(st_line_id, token, kind)
+                        ON st_line_token.token = matching_token.token
+                        AND st_line_token.kind = matching_token.kind
+                    JOIN unnest(%s::int[], %s::int[], %s::bool[], %s::int[])
+                        AS st_line(id, partner_id, positive, currency_id)
+                        ON st_line.id = st_line_token.st_line_id
+                    WHERE
+                        {where_clause}
+                        AND matching_token.token = ANY(%s)
+                        AND matching_token.source IN %s
+                        AND {st_line_conditions}
+                    GROUP BY
+                        st_line.id,
+                        account_move_line.date_maturity,
+                        account_move_line.date,
+                        account_move_line.id
+                    ORDER BY st_line.id, COUNT(*) DESC, {order_by}
                 """,
-                all_params + [tuple(numerical_tokens + exact_tokens)],
+                from_params
+                + [st_line_ids, tokens, kinds]
+                + st_line_values(token_lines)
+                + where_params
+                + [list(set(tokens)), tuple(token_sources)],
             )
-            candidate_ids = [r[0] for r in self._cr.fetchall()]
-            if candidate_ids:
-                return {
-                    "allow_auto_reconcile": True,
-                    "amls": self.env["account.move.line"].browse(candidate_ids),
+            # When any of the Label, Note or Reference matching rule has been
+            # toggled and the query didn't return any candidates, the model
+            # should not try to mount another aml instead.
+            results.update(
+                {
+                    st_line_id: {
+                        "allow_auto_reconcile": True,
+                        "amls": self.env["account.move.line"].browse(aml_ids),
+                    }
+                    for st_line_id, aml_ids in candidate_ids.items()
                 }
-            elif (
-                self.match_text_location_label
-                or self.match_text_location_note
-                or self.match_text_location_reference
-            ):
-                # In the case any of the Label, Note or Reference matching rule has been
-                # toggled, and the query didn't return
-                # any candidates, the model should not try to mount another aml instead.
-                return
+            )
 
-        if not partner:
-            st_line_currency = (
+        candidate_ids = {}
+        if amount_lines:
+            st_line_currencies = [
                 st_line.foreign_currency_id
                 or st_line.journal_id.currency_id
                 or st_line.company_currency_id
-            )
-            if st_line_currency == self.company_id.currency_id:
-                aml_amount_field = "amount_residual"
-            else:
-                aml_amount_field = "amount_residual_currency"
-
-            order_by = get_order_by_clause(alias="account_move_line")
-            self._cr.execute(
-                f"""
-                    SELECT account_move_line.id
+                for st_line in amount_lines
+            ]
+            candidate_ids.update(
+                fetch_candidates(
+                    f"""
+                    SELECT st_line.id, account_move_line.id
                     FROM {from_clause}
+                    JOIN unnest(
+                        %s::int[], %s::int[], %s::bool[], %s::int[], %s::int[],
+                        %s::bool[], %s::int[], %s::numeric[]
+                    ) AS st_line(
+                        id, partner_id, positive, currency_id, amount_currency_id,
+                        company_currency, decimal_places, amount
+                    )
+                        ON account_move_line.currency_id = st_line.amount_currency_id
+                        AND ROUND(
+                            CASE WHEN st_line.company_currency
+                                THEN account_move_line.amount_residual
+                                ELSE account_move_line.amount_residual_currency
+                            END,
+                            st_line.decimal_places
+                        ) = ROUND(st_line.amount, st_line.decimal_places)
                     WHERE
                         {where_clause}
-                        AND account_move_line.currency_id = %s
-                        AND ROUND(account_move_line.{aml_amount_field}, %s) = ROUND(%s, %s)
-                    ORDER BY {order_by}
-                """,  # noqa: E501
-                where_params
-                + [
-                    st_line_currency.id,
-                    st_line_currency.decimal_places,
-                    -st_line.amount_residual,
-                    st_line_currency.decimal_places,
-                ],
-            )
-            amls = self.env["account.move.line"].browse(
-                [row[0] for row in self._cr.fetchall()]
+                        AND account_move_line.currency_id = ANY(%s)
+                        AND {st_line_conditions}
+                    ORDER BY st_line.id, {order_by}
+                    """,
+                    from_params
+                    + st_line_values(amount_lines)
+                    + [
+                        [currency.id for currency in st_line_currencies],
+                        [
+                            currency == self.company_id.currency_id
+                            for currency in st_line_currencies
+                        ],
+                        [currency.decimal_places for currency in st_line_currencies],
+                        [-st_line.amount_residual for st_line in amount_lines],
+                    ]
+                    + where_params
+                    + [list({currency.id for currency in st_line_currencies})],
+                )
             )
-        else:
-            amls = self.env["account.move.line"].search(
-                aml_domain, order=get_order_by_clause()
+        if partner_lines:
+            st_line_partner_values = st_line_values(partner_lines)
+            candidate_ids.update(
+                fetch_candidates(
+                    f"""
+                    SELECT st_line.id, account_move_line.id
+                    FROM {from_clause}
+                    JOIN unnest(%s::int[], %s::int[], %s::bool[], %s::int[])
+                        AS st_line(id, partner_id, positive, currency_id)
+                        ON account_move_line.partner_id = st_line.partner_id
+                    WHERE
+                        {where_clause}
+                        AND account_move_line.partner_id = ANY(%s)
+                        AND {st_line_conditions}
+                    ORDER BY st_line.id, {order_by}
+                    """,
+                    from_params
+                    + st_line_partner_values
+                    + where_params
+                    + [list(set(st_line_partner_values[1]))],
+                )
             )
-        if amls:
-            return {
-                "allow_auto_reconcile": False,
-                "amls": amls,
+        results.update(
+            {
+                st_line_id: {
+                    "allow_auto_reconcile": False,
+                    "amls": self.env["account.move.line"].browse(aml_ids),
+                }
+                for st_line_id, aml_ids in candidate_ids.items()
             }
+        )
+        return results
 
     def _get_invoice_matching_rules_map(self):
         """Get a mapping <priority_order, rule> that could be overridden in others
@@ -804,6 +1165,22 @@ class AccountReconcileModel(models.Model):
 class AccountReconcileModelLine(models.Model):
     _inherit = "account.reconcile.model.line"
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env["account.reconcile.model"]._bump_write_off_stamp()
+        return res
+
     def _get_write_off_move_line_dict(self, balance, currency):
         self.ensure_one()
         return {
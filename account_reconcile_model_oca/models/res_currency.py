@@ -0,0 +1,49 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models, tools
+
+from ..cache_stamp import create_stamp_sequence, get_stamp
+
+# Sequence whose value is part of the key of the cached rates tables
+RATE_STAMP_SEQUENCE = "account_reconcile_model_rate_stamp_seq"
+
+
+class ResCurrency(models.Model):
+    _inherit = "res.currency"
+
+    def init(self):
+        super().init()
+        create_stamp_sequence(self._cr, RATE_STAMP_SEQUENCE)
+
+    @api.model
+    @tools.ormcache("company_id", "date", "stamp")
+    def _get_reconcile_rates(self, company_id, date, stamp):
+        """Return the rates of all the currencies for the company and the date,
+        as a dict mapping each currency id with its rate. The result is cached
+        until a rate is modified and must not be altered.
+        :param stamp: The current stamp of the rates, see RATE_STAMP_SEQUENCE.
+        """
+        currencies = self.with_context(active_test=False).search([])
+        return currencies._get_rates(self.env["res.company"].browse(company_id), date)
+
+    @api.model
+    def _get_conversion_rate(self, from_currency, to_currency, company=None, date=None):
+        """With the reconcile_rate_table key in the context, the conversions use
+        the rates table of the company and the date instead of looking up the
+        rates of the two currencies on each conversion."""
+        if (
+            not self.env.context.get("reconcile_rate_table")
+            or from_currency == to_currency
+        ):
+            return super()._get_conversion_rate(
+                from_currency, to_currency, company=company, date=date
+            )
+        company = company or self.env.company
+        date = date or fields.Date.context_today(self)
+        rates = self._get_reconcile_rates(
+            company.root_id.id,
+            fields.Date.to_date(date),
+            get_stamp(self._cr, RATE_STAMP_SEQUENCE),
+        )
+        return (rates.get(to_currency.id) or 1.0) / (rates.get(from_currency.id) or 1.0)
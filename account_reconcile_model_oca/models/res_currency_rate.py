@@ -0,0 +1,27 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+from ..cache_stamp import bump_stamp
+from .res_currency import RATE_STAMP_SEQUENCE
+
+
+class ResCurrencyRate(models.Model):
+    _inherit = "res.currency.rate"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        bump_stamp(self.env, RATE_STAMP_SEQUENCE)
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        bump_stamp(self.env, RATE_STAMP_SEQUENCE)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        bump_stamp(self.env, RATE_STAMP_SEQUENCE)
+        return res
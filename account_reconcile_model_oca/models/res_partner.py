@@ -0,0 +1,111 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+from odoo.osv import expression
+from odoo.tools import SQL
+
+
+class ResPartner(models.Model):
+    _inherit = "res.partner"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        self.env["res.partner.name.token"]._update_tokens(res)
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "name" in vals:
+            self.env["res.partner.name.token"]._update_tokens(self)
+        return res
+
+    @api.model
+    def _get_unaccented_values(self, values):
+        """Map each value with its unaccented version, or with itself when the
+        unaccent extension is not available."""
+        unaccented = {value: value for value in values}
+        if values and self.env.registry.has_unaccent:
+            unaccent = self.env.registry.unaccent
+            self._cr.execute(
+                SQL(
+                    f"SELECT value, {unaccent('value')} "
+                    "FROM unnest(%s::text[]) AS value",
+                    list(values),
+                )
+            )
+            unaccented.update(self._cr.fetchall())
+        return unaccented
+
+    @api.model
+    def _get_partner_ids_from_account_numbers(self, keys):
+        """Find the partners owning some sanitized bank account numbers, with a
+        single search.
+        :param keys: A set of tuples (company id, sanitized account number).
+        :return: A dict mapping the keys with the id of the partner found.
+        """
+        if not keys:
+            return {}
+        bank_accounts = self.env["res.partner.bank"].search(
+            expression.OR(
+                [
+                    [("sanitized_acc_number", "ilike", account_number)]
+                    for account_number in {number for __, number in keys}
+                ]
+            )
+        )
+        result = {}
+        for company_id, account_number in keys:
+            matching = bank_accounts.filtered(
+                lambda bank, number=account_number.upper(): number
+                in (bank.sanitized_acc_number or "").upper()
+            )
+            for candidates in (
+                matching.filtered(
+                    lambda bank, company_id=company_id: bank.company_id.id
+                    == company_id
+                ),
+                matching,
+            ):
+                if len(candidates.partner_id) == 1:
+                    result[company_id, account_number] = candidates.partner_id.id
+                    break
+        return result
+
+    @api.model
+    def _get_partner_ids_from_names(self, keys):
+        """Find the commercial partners by name, with a single search.
+        :param keys: A set of tuples (company id, partner name).
+        :return: A dict mapping the keys with the id of the partner found.
+        """
+        if not keys:
+            return {}
+        names = {name for __, name in keys}
+        partners = self.search_fetch(
+            expression.AND(
+                [
+                    [("parent_id", "=", False)],
+                    expression.OR([[("name", "ilike", name)] for name in names]),
+                ]
+            ),
+            ["name", "company_id"],
+        )
+        unaccented = self._get_unaccented_values(names | set(partners.mapped("name")))
+        result = {}
+        for company_id, name in keys:
+            word = unaccented[name].lower()
+            matching = partners.filtered(
+                lambda partner, word=word: word in unaccented[partner.name].lower()
+            )
+            for candidates in (
+                matching.filtered(
+                    lambda partner, company_id=company_id: partner.company_id.id
+                    == company_id
+                ),
+                matching,
+            ):
+                if candidates:
+                    result[company_id, name] = candidates[0].id
+                    break
+        return result
@@ -0,0 +1,69 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class ResPartnerNameToken(models.Model):
+    """Words of the partner names, used to recognize the partners inside the
+    statement line texts without loading all the partners."""
+
+    _name = "res.partner.name.token"
+    _description = "Partner Name Token"
+    _log_access = False
+
+    partner_id = fields.Many2one(
+        "res.partner", required=True, index=True, ondelete="cascade"
+    )
+    token = fields.Char(required=True, index=True)
+    token_count = fields.Integer(
+        required=True,
+        help="Number of distinct tokens in the name of the partner, all of them "
+        "being needed to recognize it.",
+    )
+
+    @api.model
+    def _update_tokens(self, partners=None):
+        """Rebuild the tokens of the partners passed as parameter, or of all the
+        partners if none is given: the (unaccented, lowercase) words of 3
+        characters or more of their name.
+        The active and company filters are applied when the tokens are read, so
+        that only a change of the name needs a rebuild.
+        """
+        if partners is not None and not partners:
+            return
+        self.env["res.partner"].flush_model(["name"])
+        where = SQL("partner.name IS NOT NULL")
+        if partners is None:
+            self._cr.execute(SQL("TRUNCATE %s", SQL.identifier(self._table)))
+        else:
+            self._cr.execute(
+                SQL(
+                    "DELETE FROM %s WHERE partner_id IN %s",
+                    SQL.identifier(self._table),
+                    tuple(partners.ids),
+                )
+            )
+            where = SQL("%s AND partner.id IN %s", where, tuple(partners.ids))
+        unaccent = self.env.registry.unaccent
+        self._cr.execute(
+            SQL(
+                rf"""
+                INSERT INTO %s (partner_id, token, token_count)
+                SELECT
+                    sub.partner_id,
+                    sub.token,
+                    COUNT(*) OVER (PARTITION BY sub.partner_id)
+                FROM (
+                    SELECT DISTINCT partner.id AS partner_id, LOWER(chunk[1]) AS token
+                    FROM res_partner partner,
+                        regexp_matches({unaccent('partner.name')}, '\w{{3,}}', 'g')
+                        AS chunk
+                    WHERE %s
+                ) AS sub
+                """,
+                SQL.identifier(self._table),
+                where,
+            )
+        )
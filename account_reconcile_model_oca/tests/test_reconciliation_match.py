@@ -421,6 +421,216 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
             },
         )
 
+    def test_rule_index_candidates(self):
+        rules = self.rule_1 + self.rule_2
+        self.assertEqual(rules._get_rule_candidates(self.cash_line_1), rules)
+        self.rule_1.match_nature = "amount_received"
+        self.assertEqual(rules._get_rule_candidates(self.cash_line_1), self.rule_2)
+        self.assertEqual(rules._get_rule_candidates(self.bank_line_1), rules)
+        self.rule_2.match_journal_ids = self.cash_journal
+        self.assertEqual(rules._get_rule_candidates(self.bank_line_1), self.rule_1)
+        self.assertEqual(rules._get_rule_candidates(self.cash_line_1), self.rule_2)
+
+    def test_rule_index_invalid_regex(self):
+        self.rule_2.write({"match_label": "match_regex", "match_label_param": "(("})
+        # The invalid model never applies, the other ones are still indexed
+        self.assertFalse(
+            self.rule_2._is_applicable_for(self.bank_line_1, self.partner_1)
+        )
+        self.assertTrue(
+            self.rule_1._is_applicable_for(self.bank_line_1, self.partner_1)
+        )
+        # Models missing from the index are compiled on the fly
+        new_rule = self.rule_1.new(
+            {
+                "name": "new model",
+                "rule_type": "writeoff_suggestion",
+                "company_id": self.company.id,
+                "match_label": "contains",
+                "match_label_param": "no label matches this",
+            }
+        )
+        self.assertIn(new_rule, new_rule._get_rule_candidates(self.bank_line_1))
+        self.assertFalse(new_rule._is_applicable_for(self.bank_line_1, self.partner_1))
+
+    @freeze_time("2020-01-01")
+    def test_apply_rules_batch(self):
+        self.rule_1.match_text_location_label = False
+        st_lines = self.bank_line_1 + self.bank_line_2 + self.cash_line_1
+        self.assertDictEqual(
+            self.rule_1._apply_rules_batch(st_lines, st_lines._retrieve_partners()),
+            {
+                self.bank_line_1.id: {
+                    "amls": self.invoice_line_1,
+                    "model": self.rule_1,
+                },
+                self.bank_line_2.id: {
+                    "amls": self.invoice_line_1
+                    + self.invoice_line_2
+                    + self.invoice_line_3,
+                    "model": self.rule_1,
+                },
+                self.cash_line_1.id: {
+                    "amls": self.invoice_line_4,
+                    "model": self.rule_1,
+                },
+            },
+        )
+
+    @freeze_time("2020-01-01")
+    def test_apply_rules_batch_lookups(self):
+        """The lines needing the partner and the amount lookups are matched in the
+        same batch, each one with its own candidates"""
+        self.rule_1.write(
+            {
+                "match_text_location_label": False,
+                "match_partner": False,
+                "match_partner_ids": [Command.clear()],
+            }
+        )
+        invl_1 = self._create_invoice_line(123.45, self.partner_2, "out_invoice")
+        invl_2 = self._create_invoice_line(208.73, self.partner_3, "in_invoice")
+        st_line_1 = self._create_st_line(
+            amount=123.45, payment_ref=None, partner_id=None
+        )
+        st_line_2 = self._create_st_line(
+            amount=-208.73, payment_ref=None, partner_id=None
+        )
+        st_lines = self.bank_line_2 + st_line_1 + st_line_2
+        self.assertDictEqual(
+            self.rule_1._apply_rules_batch(st_lines, st_lines._retrieve_partners()),
+            {
+                self.bank_line_2.id: {
+                    "amls": self.invoice_line_1
+                    + self.invoice_line_2
+                    + self.invoice_line_3,
+                    "model": self.rule_1,
+                },
+                st_line_1.id: {"amls": invl_1, "model": self.rule_1},
+                st_line_2.id: {"amls": invl_2, "model": self.rule_1},
+            },
+        )
+
+    def test_retrieve_partners(self):
+        self.env["res.partner.bank"].create(
+            {"acc_number": "BE68 5390 0754 7034", "partner_id": self.partner_1.id}
+        )
+        st_lines = self.env["account.bank.statement.line"].create(
+            [
+                {
+                    "journal_id": self.bank_journal.id,
+                    "date": "2020-01-01",
+                    "payment_ref": "transfer",
+                    "account_number": "BE68539007547034",
+                    "amount": 100,
+                },
+                {
+                    "journal_id": self.bank_journal.id,
+                    "date": "2020-01-01",
+                    "payment_ref": "transfer",
+                    "partner_name": "partner_2",
+                    "amount": 100,
+                },
+                {
+                    "journal_id": self.bank_journal.id,
+                    "date": "2020-01-01",
+                    "payment_ref": "Payment from PARTNER_3, thanks",
+                    "amount": 100,
+                },
+                {
+                    "journal_id": self.bank_journal.id,
+                    "date": "2020-01-01",
+                    "payment_ref": "transfer",
+                    "amount": 100,
+                },
+            ]
+        )
+        self.assertEqual(
+            st_lines._retrieve_partners(),
+            {
+                st_lines[0].id: self.partner_1,
+                st_lines[1].id: self.partner_2,
+                st_lines[2].id: self.partner_3,
+                st_lines[3].id: self.env["res.partner"],
+            },
+        )
+        # The name tokens follow the partners.
+        self.partner_2.name = "Someone Else"
+        self.assertEqual(st_lines[1]._retrieve_partner(), self.env["res.partner"])
+        self.partner_3.name = "Partner_3 Renamed"
+        self.assertEqual(st_lines[2]._retrieve_partner(), self.env["res.partner"])
+        self.partner_3.name = "partner_3"
+        self.assertEqual(st_lines[2]._retrieve_partner(), self.partner_3)
+        self.partner_3.active = False
+        self.assertEqual(st_lines[2]._retrieve_partner(), self.env["res.partner"])
+
+    def test_matching_tokens_follow_reference(self):
+        token_model = self.env["account.move.line.matching.token"]
+        line_model = self.env["account.move.line"]
+        domain = [
+            ("move_line_id", "=", self.invoice_line_5.id),
+            ("source", "=", "reference"),
+        ]
+        self.assertFalse(token_model.search(domain))
+        self.invoice_line_5.move_id.ref = "ABCD 9876"
+        self.assertTrue(self.invoice_line_5.matching_token_outdated)
+        # The tokens are rebuilt when the journal items are flushed.
+        line_model.flush_model()
+        self.assertFalse(self.invoice_line_5.matching_token_outdated)
+        self.assertEqual(
+            sorted(token_model.search(domain).mapped("token")),
+            ["9876", "ABCD 9876"],
+        )
+        self.invoice_line_5.move_id.button_draft()
+        line_model.flush_model()
+        self.assertFalse(
+            token_model.search([("move_line_id", "=", self.invoice_line_5.id)])
+        )
+
+    def test_matching_tokens_open_items_only(self):
+        token_model = self.env["account.move.line.matching.token"]
+        line_model = self.env["account.move.line"]
+        domain = [("move_line_id", "=", self.invoice_line_1.id)]
+        line_model.flush_model()
+        self.assertTrue(token_model.search(domain))
+        # The tokens of the reconciled items are dropped, and built again when
+        # they are unreconciled.
+        wizard = self.env["account.payment.register"].with_context(
+            active_model="account.move",
+            active_ids=self.invoice_line_1.move_id.ids,
+        )
+        payment = wizard.create({})._create_payments()
+        self.assertTrue(self.invoice_line_1.reconciled)
+        line_model.flush_model()
+        self.assertFalse(token_model.search(domain))
+        payment.move_id.line_ids.remove_move_reconcile()
+        line_model.flush_model()
+        self.assertTrue(token_model.search(domain))
+
+    def test_matching_tokens_cron(self):
+        # The items only flagged in SQL, as the ones of the accounts made
+        # reconcilable, are left to the cron.
+        token_model = self.env["account.move.line.matching.token"]
+        domain = [("move_line_id", "=", self.invoice_line_1.id)]
+        self.env["account.move.line"].flush_model()
+        self.env.cr.execute(
+            "DELETE FROM account_move_line_matching_token WHERE move_line_id = %s",
+            [self.invoice_line_1.id],
+        )
+        self.env.cr.execute(
+            """
+            UPDATE account_move_line
+            SET matching_token_outdated = TRUE
+            WHERE id = %s
+            """,
+            [self.invoice_line_1.id],
+        )
+        self.invoice_line_1.invalidate_recordset(["matching_token_outdated"])
+        self.assertFalse(token_model.search(domain))
+        token_model._cron_update_outdated_tokens()
+        self.assertFalse(self.invoice_line_1.matching_token_outdated)
+        self.assertTrue(token_model.search(domain))
+
     @freeze_time("2019-01-01")
     def test_zero_payment_tolerance(self):
         rule = self._create_reconcile_model(
@@ -1621,3 +1831,55 @@ class TestReconciliationMatchingRules(AccountTestInvoicingCommon):
                     },
                 },
             )
+
+    def test_reconcile_rate_table(self):
+        currency = self.env.ref("base.CHF")
+        currency.active = True
+        company_currency = self.company.currency_id
+        self.env["res.currency.rate"].create(
+            {
+                "name": "2020-01-01",
+                "rate": 2.0,
+                "currency_id": currency.id,
+                "company_id": self.company.id,
+            }
+        )
+        table_currency = currency.with_context(reconcile_rate_table=True)
+        self.assertEqual(
+            table_currency._convert(100, company_currency, self.company, "2020-06-01"),
+            currency._convert(100, company_currency, self.company, "2020-06-01"),
+        )
+        self.assertEqual(
+            table_currency._convert(100, company_currency, self.company, "2020-06-01"),
+            50,
+        )
+        # The table is refreshed when the rates change
+        self.env["res.currency.rate"].create(
+            {
+                "name": "2020-06-01",
+                "rate": 4.0,
+                "currency_id": currency.id,
+                "company_id": self.company.id,
+            }
+        )
+        self.assertEqual(
+            table_currency._convert(100, company_currency, self.company, "2020-06-01"),
+            25,
+        )
+
+    def test_write_off_lines_cache(self):
+        lines = self.rule_2._get_write_off_move_lines_dict(100.0, self.partner_1.id)
+        self.assertEqual(lines[0]["balance"], 100.0)
+        # The cached lines are copied, so they can be altered safely
+        lines[0]["balance"] = 0.0
+        self.assertEqual(
+            self.rule_2._get_write_off_move_lines_dict(100.0, self.partner_1.id),
+            [dict(lines[0], balance=100.0)],
+        )
+        # The cache is outdated when the model lines change
+        self.rule_2.line_ids.amount_string = "50"
+        lines = self.rule_2._get_write_off_move_lines_dict(100.0, self.partner_1.id)
+        self.assertEqual(lines[0]["balance"], 50.0)
+        # The cached lines do not depend on the amount
+        lines = self.rule_2._get_write_off_move_lines_dict(300.0, self.partner_1.id)
+        self.assertEqual(lines[0]["balance"], 150.0)
@@ -5,7 +5,7 @@
     "name": "Account Reconcile Oca",
     "summary": """
         Reconcile addons for Odoo CE accounting""",
-    "version": "18.0.1.0.16",
+    "version": "18.0.1.5.0",
     "license": "AGPL-3",
     "author": "CreuBlanca,Dixmit,Odoo Community Association (OCA)",
     "maintainers": ["etobella"],
@@ -19,6 +19,7 @@
         "views/res_config_settings.xml",
         "security/ir.model.access.csv",
         "security/security.xml",
+        "data/ir_cron.xml",
         "views/account_account_reconcile.xml",
         "views/account_bank_statement_line.xml",
         "views/account_move_line.xml",
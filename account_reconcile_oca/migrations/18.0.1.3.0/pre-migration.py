@@ -0,0 +1,18 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # Keep the last draft of each user and group before adding the unique
+    # constraint
+    cr.execute(
+        """
+        DELETE FROM account_account_reconcile_data data
+        USING account_account_reconcile_data newer
+        WHERE newer.user_id = data.user_id
+            AND newer.reconcile_id = data.reconcile_id
+            AND newer.id > data.id
+        """
+    )
@@ -0,0 +1,18 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    # The outdated proposals are now queued by the pre-matching cron
+    cron = env.ref(
+        "account_reconcile_oca.ir_cron_refresh_reconcile_data",
+        raise_if_not_found=False,
+    )
+    if cron:
+        cron.unlink()
+    groups = env["account.account.reconcile.group"]
+    if groups._is_enabled():
+        groups._rebuild()
@@ -0,0 +1,67 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tools import column_exists, create_column
+
+
+def migrate(cr, version):
+    if not version:
+        return
+    # Drop the groups duplicated by concurrent refreshes before adding the
+    # unique index, they are computed again by the post-migration
+    cr.execute(
+        """
+        DELETE FROM account_account_reconcile_group g
+        USING account_account_reconcile_group newer
+        WHERE newer.account_id = g.account_id
+            AND newer.partner_id IS NOT DISTINCT FROM g.partner_id
+            AND newer.currency_id IS NOT DISTINCT FROM g.currency_id
+            AND newer.company_id = g.company_id
+            AND newer.id > g.id
+        """
+    )
+    # Compute the stored aggregation of the statement lines in SQL, instead of
+    # letting the ORM compute it line by line
+    if column_exists(cr, "account_bank_statement_line", "aggregate_id"):
+        return
+    create_column(cr, "account_bank_statement_line", "reconcile_aggregate", "varchar")
+    create_column(cr, "account_bank_statement_line", "aggregate_id", "int4")
+    cr.execute(
+        """
+        UPDATE account_bank_statement_line line
+        SET reconcile_aggregate = COALESCE(
+            journal.reconcile_aggregate, company.reconcile_aggregate
+        )
+        FROM account_move move
+        JOIN account_journal journal ON journal.id = move.journal_id
+        JOIN res_company company ON company.id = move.company_id
+        WHERE move.id = line.move_id
+        """
+    )
+    # The weeks start on the week start of the company language, date_trunc
+    # truncating to the monday
+    cr.execute(
+        """
+        UPDATE account_bank_statement_line line
+        SET aggregate_id = CASE line.reconcile_aggregate
+            WHEN 'statement' THEN line.statement_id
+            WHEN 'day' THEN move.date - '0001-01-01'::date + 1
+            WHEN 'week' THEN (
+                date_trunc('week', move.date + week.shift)::date
+                - week.shift - '0001-01-01'::date + 1
+            )
+            WHEN 'month' THEN (
+                date_trunc('month', move.date)::date - '0001-01-01'::date + 1
+            )
+        END
+        FROM account_move move
+        JOIN res_company company ON company.id = move.company_id
+        JOIN res_partner partner ON partner.id = company.partner_id
+        LEFT JOIN res_lang lang ON lang.code = partner.lang
+        CROSS JOIN LATERAL (
+            SELECT (8 - COALESCE(lang.week_start::int, 1)) % 7 AS shift
+        ) week
+        WHERE move.id = line.move_id
+            AND line.reconcile_aggregate IS NOT NULL
+        """
+    )
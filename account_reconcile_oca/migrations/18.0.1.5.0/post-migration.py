@@ -0,0 +1,7 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+
+def migrate(cr, version):
+    # The stored proposals are no longer outdated by a global open items stamp
+    cr.execute("DROP SEQUENCE IF EXISTS account_reconcile_open_items_stamp_seq")
@@ -6,3 +6,10 @@ from . import account_account_reconcile
 from . import account_move_line
 from . import res_company
 from . import res_config_settings
+from . import reconcile_queue_mixin
+from . import reconcile_prematch_job
+from . import account_account_reconcile_group
+from . import account_move
+from . import account_partial_reconcile
+from . import account_account
+from . import ir_config_parameter
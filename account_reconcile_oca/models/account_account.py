@@ -0,0 +1,16 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class AccountAccount(models.Model):
+    _inherit = "account.account"
+
+    def write(self, vals):
+        res = super().write(vals)
+        if {"reconcile", "account_type"} & set(vals):
+            # The journal items may enter or leave the open items groups, or be
+            # grouped by partner or not
+            self.env["account.account.reconcile.group"]._refresh_accounts(self.ids)
+        return res
@@ -1,7 +1,11 @@
 # Copyright 2023 Dixmit
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import json
+from datetime import timedelta
+
 from odoo import api, fields, models
+from odoo.tools import SQL
 
 
 class CharId(fields.Id):
@@ -25,23 +29,51 @@ class AccountAccountReconcile(models.Model):
 
     @property
     def _table_query(self):
+        groups = self.env["account.account.reconcile.group"]
+        if groups._is_enabled():
+            groups._build_if_empty()
+            return f"{self._select_materialized()} {self._from_materialized()}"
         query = (
             f"{self._select()} {self._from()} {self._where()} "
             f"{self._groupby()} {self._having()}"
         )
         return query
 
-    def _select(self):
+    def _get_account_name_column(self):
         account_account_name_field = (
             self.env["ir.model.fields"]
             .sudo()
             .search([("model", "=", "account.account"), ("name", "=", "name")])
         )
-        account_name = (
+        return (
             f"a.name ->> '{self.env.user.lang}'"
             if account_account_name_field.translate
             else "a.name"
         )
+
+    def _select_materialized(self):
+        return f"""
+            SELECT
+                g.min_line_id as id,
+                {self._get_account_name_column()} as name,
+                g.partner_id,
+                g.account_id,
+                FALSE as is_reconciled,
+                g.currency_id,
+                g.company_id,
+                null as foreign_currency_id,
+                (g.debit_residual > 0 AND g.credit_residual > 0) as active
+        """
+
+    def _from_materialized(self):
+        return """
+            FROM
+                account_account_reconcile_group g
+                INNER JOIN account_account a ON a.id = g.account_id
+            """
+
+    def _select(self):
+        account_name = self._get_account_name_column()
         return f"""
             SELECT
                 min(aml.id) as id,
@@ -102,7 +134,9 @@ class AccountAccountReconcile(models.Model):
         """
 
     def _compute_reconcile_data_info(self):
-        data_obj = self.env["account.account.reconcile.data"]
+        drafts = {}
+        if not self.env.context.get("default_account_move_lines"):
+            drafts = self.env["account.account.reconcile.data"]._get_drafts(self.ids)
         for record in self:
             if self.env.context.get("default_account_move_lines"):
                 data = {
@@ -111,30 +145,14 @@ class AccountAccountReconcile(models.Model):
                 }
                 record.reconcile_data_info = self._recompute_data(data)
                 continue
-            data_record = data_obj.search(
-                [("user_id", "=", self.env.user.id), ("reconcile_id", "=", record.id)]
+            record.reconcile_data_info = drafts.get(
+                record.id, {"data": [], "counterparts": []}
             )
-            if data_record:
-                record.reconcile_data_info = data_record.data
-            else:
-                record.reconcile_data_info = {"data": [], "counterparts": []}
 
     def _inverse_reconcile_data_info(self):
-        data_obj = self.env["account.account.reconcile.data"]
-        for record in self:
-            data_record = data_obj.search(
-                [("user_id", "=", self.env.user.id), ("reconcile_id", "=", record.id)]
-            )
-            if data_record:
-                data_record.data = record.reconcile_data_info
-            else:
-                data_obj.create(
-                    {
-                        "reconcile_id": record.id,
-                        "user_id": self.env.user.id,
-                        "data": record.reconcile_data_info,
-                    }
-                )
+        self.env["account.account.reconcile.data"]._set_drafts(
+            {record.id: record.reconcile_data_info for record in self}
+        )
 
     @api.onchange("add_account_move_line_id")
     def _onchange_add_account_move_line(self):
@@ -143,11 +161,17 @@ class AccountAccountReconcile(models.Model):
             self.add_account_move_line_id = False
 
     def _add_account_move_line(self, move_line, keep_current=False):
+        self._add_account_move_lines(move_line, keep_current=keep_current)
+
+    def _add_account_move_lines(self, move_lines, keep_current=False):
+        """Add `move_lines` as counterparts, removing the ones already added
+        unless `keep_current` is set, and recompute the data once."""
         data = self.reconcile_data_info
-        if move_line.id not in data["counterparts"]:
-            data["counterparts"].append(move_line.id)
-        elif not keep_current:
-            del data["counterparts"][data["counterparts"].index(move_line.id)]
+        current = set(data["counterparts"])
+        to_remove = set() if keep_current else current & set(move_lines.ids)
+        data["counterparts"] = [
+            line_id for line_id in data["counterparts"] if line_id not in to_remove
+        ] + [line_id for line_id in move_lines.ids if line_id not in current]
         self.reconcile_data_info = self._recompute_data(data)
 
     @api.onchange("manual_reference", "manual_delete")
@@ -169,9 +193,10 @@ class AccountAccountReconcile(models.Model):
         new_data = {"data": [], "counterparts": data["counterparts"]}
         counterparts = data["counterparts"]
         amount = 0.0
-        for line_id in counterparts:
+        # Browse all the counterparts at once so that they are prefetched together
+        for move_line in self.env["account.move.line"].browse(counterparts):
             lines = self._get_reconcile_line(
-                self.env["account.move.line"].browse(line_id),
+                move_line,
                 "other",
                 is_counterpart=True,
                 max_amount=amount,
@@ -190,23 +215,110 @@ class AccountAccountReconcile(models.Model):
             self.reconcile_data_info["counterparts"]
         )
         lines.reconcile()
-        data_record = self.env["account.account.reconcile.data"].search(
-            [("user_id", "=", self.env.user.id), ("reconcile_id", "=", self.id)]
-        )
-        data_record.unlink()
+        self.env["account.account.reconcile.data"]._unlink_drafts(self.ids)
 
     def add_multiple_lines(self, domain):
         res = super().add_multiple_lines(domain)
-        lines = self.env["account.move.line"].search(domain)
-        for line in lines:
-            self._add_account_move_line(line, keep_current=True)
+        self._add_account_move_lines(
+            self.env["account.move.line"].search(domain), keep_current=True
+        )
         return res
 
 
-class AccountAccountReconcileData(models.TransientModel):
+class AccountAccountReconcileData(models.Model):
+    """Draft of the manual reconciliation of each user, kept until it is
+    reconciled or not modified for the number of days of the
+    account_reconcile_oca.reconcile_data_ttl_days parameter."""
+
     _name = "account.account.reconcile.data"
     _description = "Reconcile data model to store user info"
 
-    user_id = fields.Many2one("res.users", required=True)
+    user_id = fields.Many2one("res.users", required=True, ondelete="cascade")
     reconcile_id = fields.Integer(required=True)
     data = fields.Serialized()
+
+    _sql_constraints = [
+        (
+            "user_reconcile_unique",
+            "unique(user_id, reconcile_id)",
+            "There can only be one reconcile draft per user and group.",
+        )
+    ]
+
+    @api.model
+    def _get_drafts(self, reconcile_ids):
+        """Return the data of the drafts of the current user, by reconcile id."""
+        if not reconcile_ids:
+            return {}
+        self.flush_model()
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT reconcile_id, data
+                FROM account_account_reconcile_data
+                WHERE user_id = %s AND reconcile_id = ANY(%s)
+                """,
+                self.env.uid,
+                list(reconcile_ids),
+            )
+        )
+        return {
+            reconcile_id: json.loads(data or "{}")
+            for reconcile_id, data in self.env.cr.fetchall()
+        }
+
+    @api.model
+    def _set_drafts(self, data_by_reconcile_id):
+        """Insert or update the drafts of the current user."""
+        if not data_by_reconcile_id:
+            return
+        self.flush_model()
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO account_account_reconcile_data (
+                    user_id, reconcile_id, data,
+                    create_uid, create_date, write_uid, write_date
+                )
+                SELECT %(uid)s, draft.reconcile_id, draft.data,
+                    %(uid)s, now() at time zone 'UTC',
+                    %(uid)s, now() at time zone 'UTC'
+                FROM unnest(%(reconcile_ids)s::int[], %(data)s::text[])
+                    AS draft(reconcile_id, data)
+                ON CONFLICT (user_id, reconcile_id) DO UPDATE
+                SET data = EXCLUDED.data,
+                    write_uid = EXCLUDED.write_uid,
+                    write_date = EXCLUDED.write_date
+                """,
+                uid=self.env.uid,
+                reconcile_ids=list(data_by_reconcile_id),
+                data=[json.dumps(data) for data in data_by_reconcile_id.values()],
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _unlink_drafts(self, reconcile_ids):
+        self.flush_model()
+        self.env.cr.execute(
+            SQL(
+                """
+                DELETE FROM account_account_reconcile_data
+                WHERE user_id = %s AND reconcile_id = ANY(%s)
+                """,
+                self.env.uid,
+                list(reconcile_ids),
+            )
+        )
+        self.invalidate_model()
+
+    @api.autovacuum
+    def _gc_expired_drafts(self):
+        ttl_days = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_reconcile_oca.reconcile_data_ttl_days", 7)
+        )
+        self.search(
+            [("write_date", "<", fields.Datetime.now() - timedelta(days=ttl_days))]
+        ).unlink()
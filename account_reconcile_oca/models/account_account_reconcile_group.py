@@ -0,0 +1,276 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+MATERIALIZED_OPEN_ITEMS_PARAM = "account_reconcile_oca.materialized_open_items"
+
+PARTNER_KEY = """
+    CASE
+        WHEN a.account_type in ('asset_receivable', 'liability_payable')
+            THEN aml.partner_id
+        ELSE NULL
+    END
+"""
+
+
+class AccountAccountReconcileGroup(models.Model):
+    """Materialized groups of account.account.reconcile.
+
+    Each record sums the residual of the posted journal items of a reconcilable
+    account, partner (on receivable and payable accounts), currency and company.
+    When enabled, the groups touched by a posting, a reconciliation or an
+    unreconciliation are refreshed, and account.account.reconcile reads them
+    instead of grouping all the journal items. The groups are emptied when the
+    option is switched, and built again when first read.
+
+    The groups are unique by key and refreshed with upserts, so that concurrent
+    refreshes of the same key cannot duplicate it.
+    """
+
+    _name = "account.account.reconcile.group"
+    _description = "Account Reconcile Open Items Group"
+    _log_access = False
+
+    account_id = fields.Many2one(
+        "account.account", required=True, index=True, ondelete="cascade"
+    )
+    partner_id = fields.Many2one("res.partner", ondelete="cascade")
+    currency_id = fields.Many2one("res.currency", ondelete="cascade")
+    company_id = fields.Many2one("res.company", required=True, ondelete="cascade")
+    min_line_id = fields.Integer(required=True)
+    debit_residual = fields.Monetary(currency_field="currency_id")
+    credit_residual = fields.Monetary(currency_field="currency_id")
+
+    def init(self):
+        tools.create_unique_index(
+            self._cr,
+            "account_account_reconcile_group_key_uniq",
+            self._table,
+            [
+                "account_id",
+                "COALESCE(partner_id, 0)",
+                "COALESCE(currency_id, 0)",
+                "company_id",
+            ],
+        )
+
+    @api.model
+    def _is_enabled(self):
+        return bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(MATERIALIZED_OPEN_ITEMS_PARAM)
+        )
+
+    @api.model
+    def _reset(self):
+        """Drop all the groups, they are built again when first read."""
+        self.env.cr.execute(SQL("DELETE FROM account_account_reconcile_group"))
+        self.invalidate_model()
+
+    @api.model
+    def _build_if_empty(self):
+        """Build the groups on their first read after they were reset."""
+        self.env.cr.execute(
+            SQL("SELECT 1 FROM account_account_reconcile_group LIMIT 1")
+        )
+        if not self.env.cr.fetchone():
+            self._rebuild()
+
+    def _get_group_query(self, where):
+        return SQL(
+            """
+            SELECT
+                a.id,
+                %(partner_key)s,
+                aml.currency_id,
+                am.company_id,
+                min(aml.id),
+                SUM(
+                    CASE WHEN aml.amount_residual > 0
+                    THEN aml.amount_residual
+                    ELSE 0 END
+                ),
+                SUM(
+                    CASE WHEN aml.amount_residual < 0
+                    THEN -aml.amount_residual
+                    ELSE 0 END
+                )
+            FROM
+                account_account a
+                INNER JOIN account_move_line aml ON aml.account_id = a.id
+                INNER JOIN account_move am ON am.id = aml.move_id
+            WHERE a.reconcile
+                AND am.state = 'posted'
+                AND %(where)s
+            GROUP BY a.id, %(partner_key)s, aml.currency_id, am.company_id
+            """,
+            partner_key=SQL(PARTNER_KEY),
+            where=where,
+        )
+
+    def _get_upsert_query(self, query):
+        """Insert the groups computed by `query`, updating the existing ones."""
+        return SQL(
+            """
+            INSERT INTO account_account_reconcile_group (
+                account_id, partner_id, currency_id, company_id, min_line_id,
+                debit_residual, credit_residual
+            ) %s
+            ON CONFLICT (
+                account_id,
+                COALESCE(partner_id, 0),
+                COALESCE(currency_id, 0),
+                company_id
+            ) DO UPDATE SET
+                min_line_id = EXCLUDED.min_line_id,
+                debit_residual = EXCLUDED.debit_residual,
+                credit_residual = EXCLUDED.credit_residual
+            RETURNING account_id, partner_id, currency_id, company_id
+            """,
+            query,
+        )
+
+    def _flush_sources(self):
+        self.env["account.move.line"].flush_model(
+            ["account_id", "partner_id", "currency_id", "amount_residual", "move_id"]
+        )
+        self.env["account.move"].flush_model(["state", "company_id"])
+        self.env["account.account"].flush_model(["reconcile", "account_type"])
+
+    @api.model
+    def _rebuild(self):
+        """Compute all the groups again."""
+        self._flush_sources()
+        self.env.cr.execute(
+            SQL(
+                """
+                WITH upserted AS (%s)
+                DELETE FROM account_account_reconcile_group g
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM upserted u
+                    WHERE u.account_id = g.account_id
+                        AND u.partner_id IS NOT DISTINCT FROM g.partner_id
+                        AND u.currency_id IS NOT DISTINCT FROM g.currency_id
+                        AND u.company_id = g.company_id
+                )
+                """,
+                self._get_upsert_query(self._get_group_query(SQL("TRUE"))),
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _get_line_keys(self, line_ids):
+        """Return the keys of the groups of the given journal items, whatever
+        the state of their move."""
+        if not line_ids:
+            return []
+        self._flush_sources()
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT DISTINCT a.id, %s, aml.currency_id, aml.company_id
+                FROM account_move_line aml
+                INNER JOIN account_account a ON a.id = aml.account_id
+                WHERE a.reconcile AND aml.id = ANY(%s)
+                """,
+                SQL(PARTNER_KEY),
+                list(line_ids),
+            )
+        )
+        return self.env.cr.fetchall()
+
+    @api.model
+    def _refresh_keys(self, keys):
+        """Compute again the groups of the given (account, partner, currency,
+        company) keys, removing the ones left without journal items."""
+        keys = list(set(keys))
+        if not keys:
+            return
+        self._flush_sources()
+        account_ids, partner_ids, currency_ids, company_ids = zip(*keys)
+        self.env.cr.execute(
+            SQL(
+                """
+                WITH keys AS (
+                    SELECT *
+                    FROM unnest(
+                        %(account_ids)s::int[],
+                        %(partner_ids)s::int[],
+                        %(currency_ids)s::int[],
+                        %(company_ids)s::int[]
+                    ) AS k(account_id, partner_id, currency_id, company_id)
+                ), upserted AS (%(upsert)s)
+                DELETE FROM account_account_reconcile_group g
+                USING keys k
+                WHERE g.account_id = k.account_id
+                    AND g.partner_id IS NOT DISTINCT FROM k.partner_id
+                    AND g.currency_id IS NOT DISTINCT FROM k.currency_id
+                    AND g.company_id = k.company_id
+                    AND NOT EXISTS (
+                        SELECT 1 FROM upserted u
+                        WHERE u.account_id = g.account_id
+                            AND u.partner_id IS NOT DISTINCT FROM g.partner_id
+                            AND u.currency_id IS NOT DISTINCT FROM g.currency_id
+                            AND u.company_id = g.company_id
+                    )
+                """,
+                account_ids=list(account_ids),
+                partner_ids=list(partner_ids),
+                currency_ids=list(currency_ids),
+                company_ids=list(company_ids),
+                upsert=self._get_upsert_query(
+                    self._get_group_query(
+                        SQL(
+                            """
+                            EXISTS (
+                                SELECT 1 FROM keys k
+                                WHERE k.account_id = a.id
+                                    AND k.partner_id IS NOT DISTINCT FROM %s
+                                    AND k.currency_id IS NOT DISTINCT FROM
+                                        aml.currency_id
+                                    AND k.company_id = am.company_id
+                            )
+                            """,
+                            SQL(PARTNER_KEY),
+                        )
+                    )
+                ),
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_accounts(self, account_ids):
+        """Compute again all the groups of the given accounts, after their
+        reconcile flag or their type changed, when the materialized groups are
+        enabled."""
+        if not account_ids or not self._is_enabled():
+            return
+        self._flush_sources()
+        self.env.cr.execute(
+            SQL(
+                """
+                DELETE FROM account_account_reconcile_group
+                WHERE account_id = ANY(%s)
+                """,
+                list(account_ids),
+            )
+        )
+        self.env.cr.execute(
+            self._get_upsert_query(
+                self._get_group_query(SQL("a.id = ANY(%s)", list(account_ids)))
+            )
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _refresh_lines(self, line_ids, keys=None):
+        """Refresh the groups of the given journal items, and of the extra
+        `keys`, when the materialized groups are enabled."""
+        if not self._is_enabled():
+            return
+        self._refresh_keys(self._get_line_keys(line_ids) + list(keys or []))
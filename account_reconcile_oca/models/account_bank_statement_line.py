@@ -1,17 +1,27 @@
 # Copyright 2023 Dixmit
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import logging
+import time
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
 
 from dateutil import rrule
 from dateutil.relativedelta import relativedelta
+from psycopg2.errors import LockNotAvailable, SerializationFailure
 
 from odoo import Command, _, api, fields, models, tools
 from odoo.exceptions import UserError
 from odoo.fields import first
-from odoo.tools import LazyTranslate, float_compare, float_is_zero
+from odoo.tools import SQL, LazyTranslate, float_compare, float_is_zero, split_every
 
 _lt = LazyTranslate(__name__, default_lang="en_US")
+_logger = logging.getLogger(__name__)
+
+# Bump when the layout of the proposals stored in reconcile_data changes, so that
+# the stored proposals get computed again.
+RECONCILE_DATA_VERSION = 2
 
 
 class AccountBankStatementLine(models.Model):
@@ -120,42 +130,97 @@ class AccountBankStatementLine(models.Model):
         "account.move", default=False, store=False, prefetch=False, readonly=True
     )
     can_reconcile = fields.Boolean(sparse="reconcile_data_info")
-    reconcile_aggregate = fields.Char(compute="_compute_reconcile_aggregate")
-    aggregate_id = fields.Integer(compute="_compute_reconcile_aggregate")
-    aggregate_name = fields.Char(compute="_compute_reconcile_aggregate")
+    reconcile_aggregate = fields.Char(
+        compute="_compute_reconcile_aggregate", store=True
+    )
+    aggregate_id = fields.Integer(
+        compute="_compute_aggregate_id",
+        store=True,
+        index=True,
+        help="Grouping key of the line in the reconcile view: the id of its "
+        "statement, or the ordinal of its date truncated to the day, the week or "
+        "the month.",
+    )
+    aggregate_name = fields.Char(compute="_compute_aggregate_name")
 
     @api.model
     def _reconcile_aggregate_map(self):
         lang = self.env["res.lang"]._lang_get(self.env.user.lang)
-        week_start = rrule.weekday(int(lang.week_start) - 1)
+
+        def week(s):
+            week_start = self._get_aggregate_week_start(s.company_id)
+            week_date = s.date + relativedelta(weekday=week_start(-1))
+            return week_date.toordinal(), week_date.strftime(lang.date_format)
+
         return {
             False: lambda s: (False, False),
             "statement": lambda s: (s.statement_id.id, s.statement_id.name),
             "day": lambda s: (s.date.toordinal(), s.date.strftime(lang.date_format)),
-            "week": lambda s: (
-                (s.date + relativedelta(weekday=week_start(-1))).toordinal(),
-                (s.date + relativedelta(weekday=week_start(-1))).strftime(
-                    lang.date_format
-                ),
-            ),
+            "week": week,
             "month": lambda s: (
                 s.date.replace(day=1).toordinal(),
                 s.date.replace(day=1).strftime(lang.date_format),
             ),
         }
 
-    @api.depends("company_id", "journal_id")
+    @api.model
+    def _get_aggregate_week_start(self, company):
+        """Return the first day of the weeks used to aggregate the lines of a
+        company: the one of the company language, so that the stored grouping
+        key does not depend on the user."""
+        lang_model = self.env["res.lang"]
+        lang = lang_model._lang_get(company.partner_id.lang) or lang_model._lang_get(
+            self.env.user.lang
+        )
+        return rrule.weekday(int(lang.week_start) - 1)
+
+    @api.depends("company_id.reconcile_aggregate", "journal_id.reconcile_aggregate")
     def _compute_reconcile_aggregate(self):
-        reconcile_aggregate_map = self._reconcile_aggregate_map()
         for record in self:
-            reconcile_aggregate = (
+            record.reconcile_aggregate = (
                 record.journal_id.reconcile_aggregate
                 or record.company_id.reconcile_aggregate
             )
-            record.reconcile_aggregate = reconcile_aggregate
-            record.aggregate_id, record.aggregate_name = reconcile_aggregate_map[
-                reconcile_aggregate
-            ](record)
+
+    @api.depends(
+        "reconcile_aggregate", "statement_id", "date", "company_id.partner_id.lang"
+    )
+    def _compute_aggregate_id(self):
+        week_starts = {}
+        for record in self:
+            reconcile_aggregate = record.reconcile_aggregate
+            if reconcile_aggregate == "statement":
+                record.aggregate_id = record.statement_id.id
+                continue
+            if reconcile_aggregate not in ("day", "week", "month") or not record.date:
+                record.aggregate_id = False
+                continue
+            aggregate_date = record.date
+            if reconcile_aggregate == "week":
+                company = record.company_id
+                if company not in week_starts:
+                    week_starts[company] = self._get_aggregate_week_start(company)
+                aggregate_date += relativedelta(weekday=week_starts[company](-1))
+            elif reconcile_aggregate == "month":
+                aggregate_date = aggregate_date.replace(day=1)
+            record.aggregate_id = aggregate_date.toordinal()
+
+    @api.depends("reconcile_aggregate", "aggregate_id", "statement_id.name")
+    def _compute_aggregate_name(self):
+        lang = self.env["res.lang"]._lang_get(self.env.user.lang)
+        names = {}
+        for record in self:
+            if record.reconcile_aggregate == "statement":
+                record.aggregate_name = record.statement_id.name or False
+            elif record.reconcile_aggregate and record.aggregate_id:
+                # Format each date once
+                if record.aggregate_id not in names:
+                    names[record.aggregate_id] = date.fromordinal(
+                        record.aggregate_id
+                    ).strftime(lang.date_format)
+                record.aggregate_name = names[record.aggregate_id]
+            else:
+                record.aggregate_name = False
 
     def save(self):
         return {"type": "ir.actions.act_window_close"}
@@ -194,10 +259,10 @@ class AccountBankStatementLine(models.Model):
         if line["line_currency_id"] == dest_curr.id:
             amount = line["currency_amount"]
         else:
-            amount = self.company_id.currency_id._convert(
+            amount = self._convert_reconcile_amount(
+                self.company_id.currency_id,
                 line["amount"],
                 dest_curr,
-                self.company_id,
                 self.date,
             )
         return amount
@@ -209,76 +274,150 @@ class AccountBankStatementLine(models.Model):
             self.add_account_move_line_id = False
 
     def _add_account_move_line(self, move_line, keep_current=False):
+        self._add_account_move_lines(move_line, keep_current=keep_current)
+
+    def _add_account_move_lines(self, move_lines, keep_current=False):
+        """Add `move_lines` as counterparts of the reconcile data. The ones
+        already added are removed, unless `keep_current` is set. The totals
+        and the suspense line are recomputed once for all the lines."""
         data = self.reconcile_data_info["data"]
+        totals = self._get_reconcile_data_totals()
+        counterparts = self.reconcile_data_info.get("counterparts")
+        if counterparts is None:
+            counterparts = [
+                line_id
+                for line in data
+                for line_id in line.get("counterpart_line_ids", [])
+            ]
+        counterparts = set(counterparts)
+        to_remove = set()
+        if not keep_current:
+            to_remove = counterparts & set(move_lines.ids)
         new_data = []
-        is_new_line = True
-        pending_amount = 0.0
-        currency = self._get_reconcile_currency()
         for line in data:
-            if line["kind"] != "suspense":
-                pending_amount += self._get_amount_currency(line, currency)
-            if move_line.id in line.get("counterpart_line_ids", []):
-                is_new_line = False
-                if keep_current:
-                    new_data.append(line)
+            if to_remove and to_remove & set(line.get("counterpart_line_ids", [])):
+                self._add_reconcile_line_totals(totals, line, sign=-1)
             else:
                 new_data.append(line)
-        if is_new_line:
-            reconcile_auxiliary_id, lines = self._get_reconcile_line(
+        currency = self._get_reconcile_currency()
+        pending_amount = None
+        for move_line in move_lines:
+            if move_line.id in counterparts:
+                continue
+            if pending_amount is None:
+                pending_amount = self._get_reconcile_pending_amount(
+                    new_data, totals, currency
+                )
+            _reconcile_auxiliary_id, lines = self._get_reconcile_line(
                 move_line,
                 "other",
                 is_counterpart=True,
                 max_amount=currency.round(pending_amount),
                 move=True,
             )
+            for line in lines:
+                self._add_reconcile_line_totals(totals, line)
+                pending_amount += self._get_amount_currency(line, currency)
+            counterparts.add(move_line.id)
             new_data += lines
         self.reconcile_data_info = self._recompute_suspense_line(
             new_data,
             self.reconcile_data_info["reconcile_auxiliary_id"],
             self.manual_reference,
+            totals=totals,
         )
         self.can_reconcile = self.reconcile_data_info.get("can_reconcile", False)
 
-    def _recompute_suspense_line(self, data, reconcile_auxiliary_id, manual_reference):
-        can_reconcile = True
-        total_amount = 0
-        currency_amount = 0
+    def _get_reconcile_pending_amount(self, data, totals, currency):
+        """Return the amount of the reconcile data, without the suspense line,
+        expressed in `currency`."""
+        if currency == self.company_id.currency_id:
+            return totals["amount"]
+        return sum(
+            self._get_amount_currency(line, currency)
+            for line in data
+            if line["kind"] != "suspense"
+        )
+
+    def _get_reconcile_data_totals(self, data=None):
+        """Return the running totals of the reconcile data: its amount, its
+        amount in the suspense currency and the number of lines preventing the
+        reconciliation. They are stored with the reconcile data, so that the
+        onchanges only apply the changes of the lines they add, edit or remove
+        instead of summing all of them again."""
+        if data is None:
+            totals = self.reconcile_data_info.get("totals")
+            if totals:
+                return dict(totals)
+            data = self.reconcile_data_info.get("data", [])
+        totals = {"amount": 0.0, "currency_amount": 0.0, "blocking": 0}
+        for line in data:
+            self._add_reconcile_line_totals(totals, line)
+        return totals
+
+    def _add_reconcile_line_totals(self, totals, line, sign=1):
+        """Add the contribution of a reconcile data line to `totals`, or remove
+        it when `sign` is -1."""
+        if line["kind"] == "suspense":
+            return totals
+        if (
+            line["account_id"][0] == self.journal_id.suspense_account_id.id
+            or not line["account_id"][0]
+        ):
+            totals["blocking"] += sign
+        totals["amount"] += sign * line["amount"]
+        if line.get("is_exchange_counterpart"):
+            return totals
+        suspense_currency = self.foreign_currency_id or self.currency_id
+        # case of statement line with foreign_currency
+        if (
+            line["kind"] == "liquidity"
+            and line["line_currency_id"] != suspense_currency.id
+        ):
+            currency_amount = self.amount_currency
+        elif (
+            line.get("currency_amount")
+            and line.get("line_currency_id") == suspense_currency.id
+        ):
+            currency_amount = line.get("currency_amount")
+        else:
+            currency_amount = self._convert_reconcile_amount(
+                self.company_id.currency_id,
+                line["amount"],
+                suspense_currency,
+                self.date,
+            )
+        totals["currency_amount"] += sign * currency_amount
+        return totals
+
+    def _recompute_suspense_line(
+        self, data, reconcile_auxiliary_id, manual_reference, totals=None
+    ):
+        """Rebuild the suspense line balancing `data`. When the running
+        `totals` of `data` are given, they are used instead of being computed
+        again from all the lines."""
         new_data = []
         suspense_line = False
         counterparts = []
-        suspense_currency = self.foreign_currency_id or self.currency_id
         for line in data:
             if line.get("counterpart_line_ids"):
                 counterparts += line["counterpart_line_ids"]
-            if (
-                line["account_id"][0] == self.journal_id.suspense_account_id.id
-                or not line["account_id"][0]
-            ) and line["kind"] != "suspense":
-                can_reconcile = False
             if line["kind"] != "suspense":
                 new_data.append(line)
-                total_amount += line["amount"]
-                if not line.get("is_exchange_counterpart"):
-                    # case of statement line with foreign_currency
-                    if (
-                        line["kind"] == "liquidity"
-                        and line["line_currency_id"] != suspense_currency.id
-                    ):
-                        currency_amount += self.amount_currency
-                    elif (
-                        line.get("currency_amount")
-                        and line.get("line_currency_id") == suspense_currency.id
-                    ):
-                        currency_amount += line.get("currency_amount")
-                    else:
-                        currency_amount += self.company_id.currency_id._convert(
-                            line["amount"],
-                            suspense_currency,
-                            self.company_id,
-                            self.date,
-                        )
             else:
                 suspense_line = line
+        if totals is None:
+            totals = self._get_reconcile_data_totals(new_data)
+        suspense_currency = self.foreign_currency_id or self.currency_id
+        totals.update(
+            {
+                "amount": self.company_id.currency_id.round(totals["amount"]),
+                "currency_amount": suspense_currency.round(totals["currency_amount"]),
+            }
+        )
+        total_amount = totals["amount"]
+        currency_amount = totals["currency_amount"]
+        can_reconcile = not totals["blocking"]
         if not float_is_zero(
             total_amount, precision_digits=self.company_id.currency_id.decimal_places
         ):
@@ -326,6 +465,7 @@ class AccountBankStatementLine(models.Model):
             "reconcile_auxiliary_id": reconcile_auxiliary_id,
             "can_reconcile": can_reconcile,
             "manual_reference": manual_reference,
+            "totals": totals,
         }
 
     def _check_line_changed(self, line):
@@ -412,6 +552,7 @@ class AccountBankStatementLine(models.Model):
     def _onchange_manual_reconcile_reference(self):
         self.ensure_one()
         data = self.reconcile_data_info.get("data", [])
+        totals = self._get_reconcile_data_totals()
         new_data = []
         related_move_line_id = False
         for line in data:
@@ -421,10 +562,12 @@ class AccountBankStatementLine(models.Model):
                 and line.get("original_exchange_line_id") == related_move_line_id
             ):
                 # We should remove the related exchange rate line
+                self._add_reconcile_line_totals(totals, line, sign=-1)
                 continue
             if line["reference"] == self.manual_reference:
                 if self.manual_delete:
                     self.update(self._get_manual_delete_vals())
+                    self._add_reconcile_line_totals(totals, line, sign=-1)
                     continue
                 else:
                     self._process_manual_reconcile_from_line(line)
@@ -434,6 +577,7 @@ class AccountBankStatementLine(models.Model):
             new_data,
             self.reconcile_data_info["reconcile_auxiliary_id"],
             self.manual_reference,
+            totals=totals,
         )
         self.can_reconcile = self.reconcile_data_info.get("can_reconcile", False)
 
@@ -461,10 +605,10 @@ class AccountBankStatementLine(models.Model):
         if self.manual_line_id and self.manual_line_id.id not in liquidity_lines.ids:
             vals.update(
                 {
-                    "currency_amount": self.manual_currency_id._convert(
+                    "currency_amount": self._convert_reconcile_amount(
+                        self.manual_currency_id,
                         self.manual_amount,
                         self.manual_in_currency_id,
-                        self.company_id,
                         self.manual_line_id.date,
                     ),
                 }
@@ -499,13 +643,14 @@ class AccountBankStatementLine(models.Model):
                 and self.manual_kind != "liquidity"
             ):
                 in_currency_date = self.manual_line_id.date
-            self.manual_amount = self.manual_in_currency_id._convert(
+            self.manual_amount = self._convert_reconcile_amount(
+                self.manual_in_currency_id,
                 self.manual_amount_in_currency,
                 self.manual_currency_id,
-                self.company_id,
                 in_currency_date,
             )
         self.previous_manual_amount_in_currency = self.manual_amount_in_currency
+        totals = self._get_reconcile_data_totals()
         for line in data:
             if line["reference"] == self.manual_reference:
                 if self._check_line_changed(line):
@@ -513,7 +658,9 @@ class AccountBankStatementLine(models.Model):
                     line_vals["kind"] = (
                         line["kind"] if line["kind"] != "suspense" else "other"
                     )
+                    self._add_reconcile_line_totals(totals, line, sign=-1)
                     line.update(line_vals)
+                    self._add_reconcile_line_totals(totals, line)
                     if line["kind"] == "liquidity":
                         self._update_move_partner()
             if self.manual_line_id and self.manual_line_id.id == line.get(
@@ -526,6 +673,7 @@ class AccountBankStatementLine(models.Model):
                     self.manual_line_id.currency_id,
                     self.manual_line_id,
                 )
+                self._add_reconcile_line_totals(totals, line, sign=-1)
                 line.update(
                     {
                         "currency_amount": self.manual_amount_in_currency,
@@ -534,11 +682,13 @@ class AccountBankStatementLine(models.Model):
                         "debit": amount if amount > 0 else 0.0,
                     }
                 )
+                self._add_reconcile_line_totals(totals, line)
             new_data.append(line)
         self.reconcile_data_info = self._recompute_suspense_line(
             new_data,
             self.reconcile_data_info["reconcile_auxiliary_id"],
             self.manual_reference,
+            totals=totals,
         )
         self.can_reconcile = self.reconcile_data_info.get("can_reconcile", False)
 
@@ -549,8 +699,13 @@ class AccountBankStatementLine(models.Model):
 
     @api.depends("reconcile_data", "is_reconciled")
     def _compute_reconcile_data_info(self):
+        stamps = {}
         for record in self:
-            if record.reconcile_data and not record.is_reconciled:
+            if (
+                record.reconcile_data
+                and not record.is_reconciled
+                and record._is_reconcile_data_current(stamps)
+            ):
                 record.reconcile_data_info = record.reconcile_data
             else:
                 record.reconcile_data_info = record._default_reconcile_data(
@@ -560,6 +715,156 @@ class AccountBankStatementLine(models.Model):
                 "can_reconcile", False
             )
 
+    @api.model
+    def _get_reconcile_data_stamps(self, companies):
+        """Identify the inputs of the proposals stored in reconcile_data: the layout
+        version and the state of the reconcile models of each company and of their
+        lines. The changes of the open items are handled by
+        `_outdate_reconcile_data`.
+        :return: A dict mapping each company id with its stamp.
+        """
+        self.env["account.reconcile.model"].flush_model(["company_id"])
+        self.env["account.reconcile.model.line"].flush_model(["model_id"])
+        self._cr.execute(
+            SQL(
+                """
+                SELECT
+                    model.company_id,
+                    MAX(model.write_date),
+                    COUNT(DISTINCT model.id),
+                    MAX(line.write_date),
+                    COUNT(line.id)
+                FROM account_reconcile_model model
+                LEFT JOIN account_reconcile_model_line line
+                    ON line.model_id = model.id
+                WHERE model.company_id IN %s
+                GROUP BY model.company_id
+                """,
+                tuple(companies.ids) or (None,),
+            )
+        )
+        stamps = {
+            company.id: [RECONCILE_DATA_VERSION, None, 0, None, 0]
+            for company in companies
+        }
+        for company_id, *values in self._cr.fetchall():
+            write_date, count, line_write_date, line_count = values
+            stamps[company_id] = [
+                RECONCILE_DATA_VERSION,
+                write_date.isoformat(),
+                count,
+                line_write_date and line_write_date.isoformat(),
+                line_count,
+            ]
+        return stamps
+
+    @api.model
+    def _outdate_reconcile_data(self, move_lines):
+        """Drop the stored proposals that the open items in `move_lines` may
+        change, after they were posted, reset or unreconciled: only the lines
+        matched with the partner of one of these items, or with no partner, in
+        the same company may propose them. The dropped proposals are queued again
+        by the pre-matching cron.
+        """
+        if not move_lines:
+            return
+        self.flush_model(["reconcile_data", "is_reconciled"])
+        self.env["account.move"].flush_model(["company_id"])
+        st_line_ids = []
+        for company, items in move_lines.grouped("company_id").items():
+            self._cr.execute(
+                SQL(
+                    """
+                    UPDATE account_bank_statement_line st_line
+                    SET reconcile_data = NULL
+                    FROM account_move move
+                    WHERE move.id = st_line.move_id
+                        AND move.company_id = %s
+                        AND st_line.is_reconciled IS NOT TRUE
+                        AND st_line.reconcile_data::jsonb ? 'stamp'
+                        AND COALESCE(
+                            (st_line.reconcile_data::jsonb ->> 'match_partner_id')::int,
+                            0
+                        ) = ANY(%s)
+                    RETURNING st_line.id
+                    """,
+                    company.id,
+                    [0, *items.partner_id.ids],
+                )
+            )
+            st_line_ids += [row[0] for row in self._cr.fetchall()]
+        self.browse(st_line_ids).invalidate_recordset()
+
+    def _is_reconcile_data_current(self, stamps):
+        """Proposals stored by `_refresh_reconcile_data` are used as long as the
+        reconcile models are unchanged and their counterparts are still open. They
+        are dropped by `_outdate_reconcile_data` when the open items they may
+        propose change. Data without stamp has been edited in the widget and is
+        always kept.
+        :param stamps: A dict of the already known stamps, by company id.
+        """
+        self.ensure_one()
+        stamp = self.reconcile_data.get("stamp")
+        if stamp is None:
+            return True
+        company_id = self.company_id.id
+        if company_id not in stamps:
+            stamps.update(self._get_reconcile_data_stamps(self.company_id))
+        if stamp != stamps[company_id]:
+            return False
+        counterpart_ids = set(self.reconcile_data.get("counterparts", []))
+        counterparts = self.env["account.move.line"].browse(counterpart_ids).exists()
+        return len(counterparts) == len(counterpart_ids) and not any(
+            counterparts.mapped("reconciled")
+        )
+
+    def _refresh_reconcile_data(self):
+        """Compute the reconcile proposal of the unreconciled statement lines in
+        self and store it in reconcile_data, stamped, so that it does not need to
+        be computed again when the line is opened in the widget. Lines whose data
+        has been edited in the widget are left untouched.
+        """
+        st_lines = self.filtered(
+            lambda st_line: not st_line.is_reconciled
+            and (not st_line.reconcile_data or "stamp" in st_line.reconcile_data)
+        )
+        if not st_lines:
+            return
+        partners = st_lines._retrieve_partners()
+        results = (
+            self.env["account.reconcile.model"]
+            .search(
+                [
+                    ("rule_type", "in", ["invoice_matching", "writeoff_suggestion"]),
+                    ("company_id", "in", st_lines.company_id.ids),
+                ]
+            )
+            ._apply_rules_batch(st_lines, partners)
+        )
+        stamps = self._get_reconcile_data_stamps(st_lines.company_id)
+        for st_line in st_lines:
+            res = results.get(st_line.id, {})
+            data = st_line._default_reconcile_data(rules_result=res)
+            # The proposal might have been reconciled by an auto reconcile model
+            if not st_line.is_reconciled:
+                st_line.reconcile_data = dict(
+                    data,
+                    stamp=stamps[st_line.company_id.id],
+                    match_partner_id=partners[st_line.id].id or None,
+                    confidence=st_line._get_reconcile_confidence(res, data),
+                )
+
+    def _get_reconcile_confidence(self, res, data):
+        """Qualify a proposal computed from the result of `_apply_rules`: 'high'
+        when its reconcile model would reconcile it on its own, 'medium' when
+        something matched and the proposal is balanced, 'low' otherwise.
+        """
+        if not res or not data.get("can_reconcile"):
+            return "low"
+        if res.get("auto_reconcile"):
+            return "high"
+        return "medium"
+
     def action_show_move(self):
         self.ensure_one()
         action = self.env["ir.actions.act_window"]._for_xml_id(
@@ -587,26 +892,40 @@ class AccountBankStatementLine(models.Model):
         partner = (
             reconcile_model._get_partner_from_mapping(self) or self._retrieve_partner()
         )
-        for line in reconcile_model._get_write_off_move_lines_dict(
+        write_off_lines = reconcile_model._get_write_off_move_lines_dict(
             -liquidity_amount, partner.id
-        ):
+        )
+        # Read the display names of all the write-off lines at once
+        account_names = {
+            account.id: account.display_name
+            for account in self.env["account.account"].browse(
+                {line["account_id"] for line in write_off_lines}
+            )
+        }
+        partner_names = {
+            line_partner.id: line_partner.display_name
+            for line_partner in self.env["res.partner"].browse(
+                {line.get("partner_id") for line in write_off_lines} - {None, False}
+            )
+        }
+        for line in write_off_lines:
             new_line = line.copy()
             new_line["partner_id"] = (
                 partner and [partner.id, partner.display_name] or False
             )
             amount = line.get("balance")
             if self.foreign_currency_id:
-                amount = self.foreign_currency_id._convert(
+                amount = self._convert_reconcile_amount(
+                    self.foreign_currency_id,
                     amount,
                     self.journal_id.currency_id or self.company_currency_id,
-                    self.company_id,
                     self.date,
                 )
             if currency != self.company_id.currency_id:
-                currency_amount = self.company_id.currency_id._convert(
+                currency_amount = self._convert_reconcile_amount(
+                    self.company_id.currency_id,
                     amount,
                     currency,
-                    self.company_id,
                     self.date,
                 )
             new_line.update(
@@ -619,9 +938,7 @@ class AccountBankStatementLine(models.Model):
                     "kind": "other",
                     "account_id": [
                         line["account_id"],
-                        self.env["account.account"]
-                        .browse(line["account_id"])
-                        .display_name,
+                        account_names[line["account_id"]],
                     ],
                     "date": fields.Date.to_string(self.date),
                     "line_currency_id": currency.id,
@@ -634,7 +951,7 @@ class AccountBankStatementLine(models.Model):
             if line.get("partner_id"):
                 new_line["partner_id"] = (
                     line["partner_id"],
-                    self.env["res.partner"].browse(line["partner_id"]).display_name,
+                    partner_names[line["partner_id"]],
                 )
             elif self.partner_id:
                 new_line["partner_id"] = (
@@ -644,7 +961,7 @@ class AccountBankStatementLine(models.Model):
             new_data.append(new_line)
         return new_data, reconcile_auxiliary_id
 
-    def _default_reconcile_data(self, from_unreconcile=False):
+    def _default_reconcile_data(self, from_unreconcile=False, rules_result=None):
         liquidity_lines, suspense_lines, other_lines = self._seek_for_lines()
         data = []
         reconcile_auxiliary_id = 1
@@ -657,20 +974,22 @@ class AccountBankStatementLine(models.Model):
             )
             data += lines
         if not from_unreconcile:
-            res = (
-                self.env["account.reconcile.model"]
-                .search(
-                    [
-                        (
-                            "rule_type",
-                            "in",
-                            ["invoice_matching", "writeoff_suggestion"],
-                        ),
-                        ("company_id", "=", self.company_id.id),
-                    ]
+            res = rules_result
+            if res is None:
+                res = (
+                    self.env["account.reconcile.model"]
+                    .search(
+                        [
+                            (
+                                "rule_type",
+                                "in",
+                                ["invoice_matching", "writeoff_suggestion"],
+                            ),
+                            ("company_id", "=", self.company_id.id),
+                        ]
+                    )
+                    ._apply_rules(self, self._retrieve_partner())
                 )
-                ._apply_rules(self, self._retrieve_partner())
-            )
             if res and res.get("status", "") == "write_off":
                 return self._recompute_suspense_line(
                     *self._reconcile_data_by_model(
@@ -700,7 +1019,11 @@ class AccountBankStatementLine(models.Model):
                     self.manual_reference,
                 )
         for line in other_lines:
-            partial_lines = self._all_partials_lines(line) if from_unreconcile else []
+            partial_lines, partial_amounts = (
+                self._get_partials_cluster(line)
+                if from_unreconcile
+                else (self.env["account.partial.reconcile"], {})
+            )
             if partial_lines:
                 for reconciled_line in (
                     partial_lines.debit_move_id + partial_lines.credit_move_id - line
@@ -721,19 +1044,9 @@ class AccountBankStatementLine(models.Model):
                             )
                             data += lines
                         continue
-                    partial = partial_lines.filtered(
-                        lambda r, line=reconciled_line: r.debit_move_id == line
-                        or r.credit_move_id == line
-                    )
-                    partial_amount = sum(
-                        partial.filtered(
-                            lambda r, line=reconciled_line: r.credit_move_id == line
-                        ).mapped("amount")
-                    ) - sum(
-                        partial.filtered(
-                            lambda r, line=reconciled_line: r.debit_move_id == line
-                        ).mapped("amount")
-                    )
+                    partial_amount, partial_currency_amount = partial_amounts[
+                        reconciled_line.id
+                    ]
                     reconcile_auxiliary_id, lines = self._get_reconcile_line(
                         reconciled_line,
                         "other",
@@ -741,18 +1054,7 @@ class AccountBankStatementLine(models.Model):
                             "amount": partial_amount,
                             "credit": partial_amount > 0 and partial_amount,
                             "debit": partial_amount < 0 and -partial_amount,
-                            "currency_amount": sum(
-                                partial.filtered(
-                                    lambda r, line=reconciled_line: r.credit_move_id
-                                    == line
-                                ).mapped("credit_amount_currency")
-                            )
-                            - sum(
-                                partial.filtered(
-                                    lambda r, line=reconciled_line: r.debit_move_id
-                                    == line
-                                ).mapped("debit_amount_currency")
-                            ),
+                            "currency_amount": partial_currency_amount,
                         },
                         move=True,
                     )
@@ -773,22 +1075,80 @@ class AccountBankStatementLine(models.Model):
         )
 
     def _all_partials_lines(self, lines):
+        return self._get_partials_cluster(lines)[0]
+
+    def _get_partials_cluster(self, lines):
+        """Return the partial reconciliations reachable from `lines`, directly
+        or through other reconciled lines, and the amounts reconciled on each
+        line they involve: a dict mapping the line ids with the amount and the
+        amount in currency, positive when the line is credited.
+        The whole cluster is resolved with a single recursive query."""
+        partial_model = self.env["account.partial.reconcile"]
         reconciliation_lines = lines.filtered(
             lambda x: x.account_id.reconcile
             or x.account_id.account_type in ("asset_cash", "liability_credit_card")
         )
-        current_lines = reconciliation_lines
-        current_partials = self.env["account.partial.reconcile"]
-        partials = self.env["account.partial.reconcile"]
-        while current_lines:
-            current_partials = (
-                current_lines.matched_debit_ids + current_lines.matched_credit_ids
-            ) - current_partials
-            current_lines = (
-                current_partials.debit_move_id + current_partials.credit_move_id
-            ) - current_lines
-            partials += current_partials
-        return partials
+        if not reconciliation_lines:
+            return partial_model, {}
+        partial_model.flush_model(
+            [
+                "debit_move_id",
+                "credit_move_id",
+                "amount",
+                "debit_amount_currency",
+                "credit_amount_currency",
+            ]
+        )
+        self.env.cr.execute(
+            SQL(
+                """
+                WITH RECURSIVE cluster(line_id) AS (
+                    SELECT unnest(%s::int[])
+                    UNION
+                    SELECT
+                        CASE
+                            WHEN partial.debit_move_id = cluster.line_id
+                                THEN partial.credit_move_id
+                            ELSE partial.debit_move_id
+                        END
+                    FROM cluster
+                    JOIN account_partial_reconcile partial
+                        ON partial.debit_move_id = cluster.line_id
+                        OR partial.credit_move_id = cluster.line_id
+                )
+                SELECT
+                    partial.id,
+                    partial.debit_move_id,
+                    partial.credit_move_id,
+                    partial.amount,
+                    partial.debit_amount_currency,
+                    partial.credit_amount_currency
+                FROM account_partial_reconcile partial
+                WHERE partial.debit_move_id IN (SELECT line_id FROM cluster)
+                ORDER BY partial.id
+                """,
+                reconciliation_lines.ids,
+            )
+        )
+        partial_ids = []
+        amounts = defaultdict(lambda: [0.0, 0.0])
+        for (
+            partial_id,
+            debit_move_id,
+            credit_move_id,
+            amount,
+            debit_amount_currency,
+            credit_amount_currency,
+        ) in self.env.cr.fetchall():
+            partial_ids.append(partial_id)
+            amounts[credit_move_id][0] += amount
+            amounts[credit_move_id][1] += credit_amount_currency
+            amounts[debit_move_id][0] -= amount
+            amounts[debit_move_id][1] -= debit_amount_currency
+        return (
+            partial_model.browse(partial_ids),
+            {line_id: tuple(line_amounts) for line_id, line_amounts in amounts.items()},
+        )
 
     def clean_reconcile(self):
         self.reconcile_data_info = self._default_reconcile_data()
@@ -803,7 +1163,10 @@ class AccountBankStatementLine(models.Model):
         self.reconcile_data = False
         return result
 
-    def _reconcile_bank_line_edit(self, data):
+    def _reconcile_bank_line_edit(self, data, reconciliation_plan=None):
+        """Replace the suspense and other lines of the move by `data`. The
+        journal items to reconcile are appended to `reconciliation_plan` when
+        given, they are reconciled right away otherwise."""
         _liquidity_lines, suspense_lines, other_lines = self._seek_for_lines()
         lines_to_remove = [
             Command.delete(line.id) for line in suspense_lines + other_lines
@@ -844,6 +1207,9 @@ class AccountBankStatementLine(models.Model):
                         )
                         + line
                     )
+        if reconciliation_plan is not None:
+            reconciliation_plan += to_reconcile
+            return
         for reconcile_items in to_reconcile:
             reconcile_items.reconcile()
 
@@ -852,7 +1218,10 @@ class AccountBankStatementLine(models.Model):
             "journal_id": self.journal_id.id,
         }
 
-    def _reconcile_bank_line_keep(self, data):
+    def _reconcile_bank_line_keep(self, data, reconciliation_plan=None):
+        """Post a new move with `data`, keeping the lines of the statement line.
+        The journal items to reconcile are appended to `reconciliation_plan`
+        when given, they are reconciled right away otherwise."""
         move = (
             self.env["account.move"]
             .with_context(skip_invoice_sync=True)
@@ -912,9 +1281,91 @@ class AccountBankStatementLine(models.Model):
                     )
             move.invalidate_recordset()
         move._post()
+        if reconciliation_plan is not None:
+            reconciliation_plan += to_reconcile.values()
+            return
         for _account, lines in to_reconcile.items():
             lines.reconcile()
 
+    def action_reconcile_proposed(self):
+        """Reconcile the statement lines whose proposal can be reconciled as is.
+
+        The lines are processed in batches of
+        `account_reconcile_oca.reconcile_batch_size` lines: the moves of a batch
+        are written first, then all of its journal items are reconciled with a
+        single call.
+        :return: A notification with the number of reconciled lines.
+        """
+        batch_size = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_reconcile_oca.reconcile_batch_size", 100)
+        )
+        st_lines = self.filtered(lambda st_line: not st_line.is_reconciled)
+        # Compute the missing and outdated proposals with a single batch, instead
+        # of line by line when can_reconcile is read
+        stamps = {}
+        st_lines.filtered(
+            lambda st_line: not st_line.reconcile_data
+            or not st_line._is_reconcile_data_current(stamps)
+        )._refresh_reconcile_data()
+        st_lines.invalidate_recordset(["reconcile_data_info", "can_reconcile"])
+        st_lines = st_lines.filtered("can_reconcile")
+        start = time.monotonic()
+        done = 0
+        for batch in split_every(batch_size, st_lines.ids, self.browse):
+            for journal, journal_lines in batch.grouped("journal_id").items():
+                journal_lines.reconcile_mode = journal.reconcile_mode
+            reconciliation_plan = []
+            for st_line in batch:
+                getattr(st_line, f"_reconcile_bank_line_{st_line.reconcile_mode}")(
+                    st_line._prepare_reconcile_line_data(
+                        st_line.reconcile_data_info["data"]
+                    ),
+                    reconciliation_plan=reconciliation_plan,
+                )
+            self._reconcile_proposed_plan(reconciliation_plan)
+            batch.reconcile_data = False
+            done += len(batch.filtered("is_reconciled"))
+            _logger.info(
+                "Reconcile proposed: %s/%s statement lines reconciled in %.2fs",
+                done,
+                len(st_lines),
+                time.monotonic() - start,
+            )
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "type": "success" if done else "warning",
+                "message": _(
+                    "%(done)s of %(total)s statement lines have been reconciled.",
+                    done=done,
+                    total=len(self),
+                ),
+                "next": {"type": "ir.actions.client", "tag": "soft_reload"},
+            },
+        }
+
+    @api.model
+    def _reconcile_proposed_plan(self, reconciliation_plan):
+        """Reconcile the groups of journal items of `reconciliation_plan` with as
+        few calls as possible. The groups sharing a journal item with a previous
+        one, such as two statement lines paying the same invoice, are reconciled
+        in a later call, once the residual of that item is up to date."""
+        while reconciliation_plan:
+            plan = []
+            postponed = []
+            seen_ids = set()
+            for lines in reconciliation_plan:
+                if seen_ids.isdisjoint(lines.ids):
+                    plan.append(lines)
+                else:
+                    postponed.append(lines)
+                seen_ids.update(lines.ids)
+            self.env["account.move.line"]._reconcile_plan(plan)
+            reconciliation_plan = postponed
+
     def unreconcile_bank_line(self):
         self.ensure_one()
         return getattr(
@@ -928,12 +1379,10 @@ class AccountBankStatementLine(models.Model):
     def _unreconcile_bank_line_keep(self):
         self.reconcile_data_info = self._default_reconcile_data(from_unreconcile=True)
         # Reverse reconciled journal entry
+        partials = self._all_partials_lines(self.line_ids)
         to_reverse = (
-            self.line_ids._all_reconciled_lines()
-            .filtered(
-                lambda line: line.move_id != self.move_id
-                and (line.matched_debit_ids or line.matched_credit_ids)
-            )
+            (partials.debit_move_id | partials.credit_move_id)
+            .filtered(lambda line: line.move_id != self.move_id)
             .mapped("move_id")
         )
         if to_reverse:
@@ -975,53 +1424,271 @@ class AccountBankStatementLine(models.Model):
             "_test_account_reconcile_oca"
         ):
             return result
-        models = self.env["account.reconcile.model"].search(
+        if self._is_auto_reconcile_on_create():
+            result._auto_reconcile()
+        self.env["reconcile.prematch.job"]._enqueue(result)
+        return result
+
+    @api.model
+    def _is_auto_reconcile_on_create(self):
+        """Return whether the new statement lines are auto reconciled as soon as
+        they are created. Otherwise the auto reconciliation is a separate stage,
+        run by the auto-reconcile cron or by calling `_auto_reconcile` on the
+        created lines. The `auto_reconcile_on_create` key of the context
+        prevails over the setting."""
+        if "auto_reconcile_on_create" in self.env.context:
+            return bool(self.env.context["auto_reconcile_on_create"])
+        return bool(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_reconcile_oca.auto_reconcile_on_create")
+        )
+
+    def _get_auto_reconcile_models(self):
+        return self.env["account.reconcile.model"].search(
             [
                 ("rule_type", "in", ["invoice_matching", "writeoff_suggestion"]),
-                ("company_id", "in", result.company_id.ids),
+                ("company_id", "in", self.company_id.ids),
                 ("auto_reconcile", "=", True),
             ]
         )
-        for record in result:
-            res = models._apply_rules(record, record._retrieve_partner())
-            if not res:
-                continue
-            liquidity_lines, suspense_lines, other_lines = record._seek_for_lines()
-            data = []
-            for line in liquidity_lines:
-                reconcile_auxiliary_id, lines = record._get_reconcile_line(
-                    line,
-                    "liquidity",
-                    move=True,
-                )
-                data += lines
-            reconcile_auxiliary_id = 1
-            if res.get("status", "") == "write_off":
-                data = record._recompute_suspense_line(
-                    *record._reconcile_data_by_model(
-                        data, res["model"], reconcile_auxiliary_id
-                    ),
-                    self.manual_reference,
-                )
-            elif res.get("amls"):
-                amount = self.amount_currency or self.amount
-                for line in res.get("amls", []):
-                    reconcile_auxiliary_id, line_datas = record._get_reconcile_line(
-                        line, "other", is_counterpart=True, max_amount=amount, move=True
-                    )
-                    amount -= sum(line_data.get("amount") for line_data in line_datas)
-                    data += line_datas
-                data = record._recompute_suspense_line(
-                    data,
-                    reconcile_auxiliary_id,
-                    self.manual_reference,
+
+    def _get_auto_reconcile_data(self, res):
+        """Build the reconcile data of the statement line from the result of
+        `_apply_rules`. Return False if nothing could be proposed."""
+        self.ensure_one()
+        liquidity_lines, _suspense_lines, _other_lines = self._seek_for_lines()
+        data = []
+        for line in liquidity_lines:
+            reconcile_auxiliary_id, lines = self._get_reconcile_line(
+                line,
+                "liquidity",
+                move=True,
+            )
+            data += lines
+        reconcile_auxiliary_id = 1
+        if res.get("status", "") == "write_off":
+            return self._recompute_suspense_line(
+                *self._reconcile_data_by_model(
+                    data, res["model"], reconcile_auxiliary_id
+                ),
+                self.manual_reference,
+            )
+        elif res.get("amls"):
+            amount = self.amount_currency or self.amount
+            for line in res.get("amls", []):
+                reconcile_auxiliary_id, line_datas = self._get_reconcile_line(
+                    line, "other", is_counterpart=True, max_amount=amount, move=True
                 )
-            if not data.get("can_reconcile"):
+                amount -= sum(line_data.get("amount") for line_data in line_datas)
+                data += line_datas
+            return self._recompute_suspense_line(
+                data,
+                reconcile_auxiliary_id,
+                self.manual_reference,
+            )
+        return False
+
+    def _auto_reconcile(self):
+        """Reconcile the statement lines using the reconcile models flagged as
+        auto reconcile.
+
+        The whole batch is processed at once: the models are searched a single
+        time, the partners are resolved with `_retrieve_partners`, the rules are
+        evaluated with `_apply_rules_batch`, which searches the candidates of each
+        model for all the lines together, and the journal items of all the
+        matched lines are reconciled together by `_reconcile_proposed_plan`.
+        A journal item proposed to several lines of the batch is only
+        reconciled with the first one, the others are left to the next run.
+        :return: The statement lines that have been reconciled.
+        """
+        start = time.monotonic()
+        st_lines = self.filtered(lambda st_line: not st_line.is_reconciled)
+        models = st_lines._get_auto_reconcile_models()
+        if not models:
+            return self.browse()
+        results = models._apply_rules_batch(st_lines, st_lines._retrieve_partners())
+        matched = self.browse()
+        reconciliation_plan = []
+        proposed_aml_ids = set()
+        for record in st_lines.filtered(lambda st_line: st_line.id in results):
+            amls = results[record.id].get("amls")
+            aml_ids = set(amls.ids) if amls else set()
+            if not proposed_aml_ids.isdisjoint(aml_ids):
+                continue
+            data = record._get_auto_reconcile_data(results[record.id])
+            if not data or not data.get("can_reconcile"):
+                continue
+            if self.env.context.get(
+                "auto_reconcile_lock_counterparts"
+            ) and not record._lock_auto_reconcile_counterparts(results[record.id]):
                 continue
             getattr(record, f"_reconcile_bank_line_{record.journal_id.reconcile_mode}")(
-                self._prepare_reconcile_line_data(data["data"])
+                record._prepare_reconcile_line_data(data["data"]),
+                reconciliation_plan=reconciliation_plan,
             )
-        return result
+            proposed_aml_ids |= aml_ids
+            matched |= record
+        self._reconcile_proposed_plan(reconciliation_plan)
+        reconciled = matched.filtered("is_reconciled")
+        elapsed = time.monotonic() - start
+        _logger.info(
+            "Auto-reconcile: %s/%s statement lines reconciled in %.2fs "
+            "(%.1f lines/s)",
+            len(reconciled),
+            len(st_lines),
+            elapsed,
+            len(st_lines) / elapsed if elapsed else 0.0,
+        )
+        return reconciled
+
+    def _lock_auto_reconcile_counterparts(self, res):
+        """Lock the journal items proposed by `res`. Return False when another
+        transaction holds them or has modified them since this one started, so
+        that two workers never reconcile the same journal item."""
+        amls = res.get("amls")
+        if not amls:
+            return True
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute(
+                    SQL(
+                        """
+                        SELECT id FROM account_move_line
+                        WHERE id IN %s
+                        FOR UPDATE NOWAIT
+                        """,
+                        tuple(amls.ids),
+                    )
+                )
+        except (LockNotAvailable, SerializationFailure):
+            _logger.info(
+                "Auto-reconcile: journal items of statement line %s are being "
+                "reconciled by another worker",
+                self.id,
+            )
+            return False
+        return True
+
+    @api.model
+    def _get_auto_reconcile_shards(self, shard_size):
+        """Split the unreconciled statement lines by journal, and by ranges of
+        `shard_size` lines inside each journal.
+        :return: A list of (journal id, statement line ids).
+        """
+        self.flush_model(["journal_id", "is_reconciled"])
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT journal_id, array_agg(id ORDER BY id)
+                FROM account_bank_statement_line
+                WHERE NOT is_reconciled
+                GROUP BY journal_id
+                ORDER BY journal_id
+                """
+            )
+        )
+        return [
+            (journal_id, shard_ids)
+            for journal_id, line_ids in self.env.cr.fetchall()
+            for shard_ids in split_every(shard_size, line_ids, list)
+        ]
+
+    @api.model
+    def _auto_reconcile_shard(self, line_ids):
+        """Auto reconcile the statement lines of a shard, skipping the ones
+        locked by another worker.
+        :return: A dict with the figures of the shard.
+        """
+        self.flush_model(["is_reconciled"])
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT id FROM account_bank_statement_line
+                WHERE id IN %s AND NOT is_reconciled
+                FOR UPDATE SKIP LOCKED
+                """,
+                tuple(line_ids),
+            )
+        )
+        st_lines = self.browse([row[0] for row in self.env.cr.fetchall()])
+        reconciled = st_lines.with_context(
+            auto_reconcile_lock_counterparts=True
+        )._auto_reconcile()
+        return {
+            "lines": len(line_ids),
+            "processed": len(st_lines),
+            "reconciled": len(reconciled),
+            "locked": len(line_ids) - len(st_lines),
+        }
+
+    @api.model
+    def _auto_reconcile_shard_in_new_cursor(self, line_ids):
+        with self.env.registry.cursor() as cr:
+            env = api.Environment(cr, self.env.uid, self.env.context)
+            return env[self._name]._auto_reconcile_shard(line_ids)
+
+    @api.model
+    def _cron_auto_reconcile_parallel(self, workers=None, shard_size=None):
+        """Auto reconcile all the unreconciled statement lines, processing the
+        shards returned by `_get_auto_reconcile_shards` in a pool of `workers`
+        threads, each shard in its own transaction. The lines of different
+        journals are independent; the locks taken on the statement lines and
+        on the proposed journal items keep the workers apart otherwise.
+        :return: The aggregated report of the shards.
+        """
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+        if workers is None:
+            workers = int(get_param("account_reconcile_oca.auto_reconcile_workers", 4))
+        if shard_size is None:
+            shard_size = int(
+                get_param("account_reconcile_oca.auto_reconcile_shard_size", 500)
+            )
+        start = time.monotonic()
+        shards = self._get_auto_reconcile_shards(shard_size)
+        report = {
+            "shards": len(shards),
+            "failed_shards": 0,
+            "lines": 0,
+            "processed": 0,
+            "reconciled": 0,
+            "locked": 0,
+            "journals": {},
+        }
+
+        def add_to_report(journal_id, result):
+            journal_report = report["journals"].setdefault(
+                journal_id, {"lines": 0, "processed": 0, "reconciled": 0, "locked": 0}
+            )
+            for key, value in result.items():
+                report[key] += value
+                journal_report[key] += value
+
+        if workers <= 1 or tools.config["test_enable"]:
+            # New cursors cannot be opened while testing, the shards are processed
+            # in the current transaction
+            for journal_id, line_ids in shards:
+                add_to_report(journal_id, self._auto_reconcile_shard(line_ids))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._auto_reconcile_shard_in_new_cursor, line_ids
+                    ): journal_id
+                    for journal_id, line_ids in shards
+                }
+                for future in as_completed(futures):
+                    try:
+                        add_to_report(futures[future], future.result())
+                    except Exception:
+                        _logger.exception(
+                            "Auto-reconcile of a shard of journal %s failed",
+                            futures[future],
+                        )
+                        report["failed_shards"] += 1
+        report["duration"] = time.monotonic() - start
+        _logger.info("Parallel auto-reconcile: %s", report)
+        return report
 
     def _synchronize_to_moves(self, changed_fields):
         """We want to avoid to change stuff (mainly amounts ) in accounting entries
@@ -1122,8 +1789,10 @@ class AccountBankStatementLine(models.Model):
         data = self.reconcile_data_info.get("data", [])
         new_data = []
         reconcile_auxiliary_id = self.reconcile_data_info["reconcile_auxiliary_id"]
+        totals = self._get_reconcile_data_totals()
         for line in data:
             if line["reference"] == manual_reference and line.get("id"):
+                self._add_reconcile_line_totals(totals, line, sign=-1)
                 total_amount = -line["amount"] + line["original_amount_unsigned"]
                 original_amount = line["original_amount_unsigned"]
                 reconcile_auxiliary_id, lines = self._get_reconcile_line(
@@ -1134,8 +1803,7 @@ class AccountBankStatementLine(models.Model):
                     max_amount=original_amount,
                     move=True,
                 )
-                new_data += lines
-                new_data.append(
+                lines.append(
                     {
                         "reference": f"reconcile_auxiliary;{reconcile_auxiliary_id}",
                         "id": False,
@@ -1152,6 +1820,9 @@ class AccountBankStatementLine(models.Model):
                         "currency_amount": -total_amount,
                     }
                 )
+                for new_line in lines:
+                    self._add_reconcile_line_totals(totals, new_line)
+                new_data += lines
                 reconcile_auxiliary_id += 1
             else:
                 new_data.append(line)
@@ -1159,6 +1830,7 @@ class AccountBankStatementLine(models.Model):
             new_data,
             reconcile_auxiliary_id,
             self.manual_reference,
+            totals=totals,
         )
         self.can_reconcile = self.reconcile_data_info.get("can_reconcile", False)
 
@@ -1211,10 +1883,10 @@ class AccountBankStatementLine(models.Model):
             # take real rate of statement line to compute the exchange rate gain/loss
             real_rate = self.amount / self.amount_currency
             to_amount_journal_currency = currency_amount * real_rate
-            to_amount_company_currency = self.currency_id._convert(
+            to_amount_company_currency = self._convert_reconcile_amount(
+                self.currency_id,
                 to_amount_journal_currency,
                 self.company_id.currency_id,
-                self.company_id,
                 self.date,
             )
             to_amount = self.company_id.currency_id.round(to_amount_company_currency)
@@ -1225,10 +1897,10 @@ class AccountBankStatementLine(models.Model):
             )
             to_amount = self.company_id.currency_id.round(currency_amount * real_rate)
         else:
-            to_amount = currency._convert(
+            to_amount = self._convert_reconcile_amount(
+                currency,
                 currency_amount,
                 self.company_id.currency_id,
-                self.company_id,
                 self.date,
             )
         return self.company_id.currency_id.round(to_amount - amount)
@@ -1308,15 +1980,15 @@ class AccountBankStatementLine(models.Model):
 
     def add_multiple_lines(self, domain):
         res = super().add_multiple_lines(domain)
-        lines = self.env["account.move.line"].search(domain)
-        for line in lines:
-            self._add_account_move_line(line, keep_current=True)
+        self._add_account_move_lines(
+            self.env["account.move.line"].search(domain), keep_current=True
+        )
         return res
 
-    def _retrieve_partner(self):
+    def _retrieve_partners(self):
         if self.env.context.get("skip_retrieve_partner"):
             # This hook can be used, for example, when importing files.
             # With large databases, we already have the information, moreover,
             # the data might be preloaded, so it has no sense to import it again
-            return self.partner_id
-        return super()._retrieve_partner()
+            return {st_line.id: st_line.partner_id for st_line in self}
+        return super()._retrieve_partners()
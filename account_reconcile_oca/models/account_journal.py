@@ -26,6 +26,17 @@ class AccountJournal(models.Model):
         help="Aggregation to use on reconcile view",
     )
 
+    def _fill_bank_cash_dashboard_data(self, dashboard_data):
+        res = super()._fill_bank_cash_dashboard_data(dashboard_data)
+        prematch_data = self.env["reconcile.prematch.job"]._get_dashboard_data(self)
+        for journal in self:
+            journal_data = prematch_data[journal.id]
+            dashboard_data[journal.id].update(
+                journal_data,
+                prematch_latency="%.2fs" % journal_data["prematch_latency"],
+            )
+        return res
+
     def get_rainbowman_message(self):
         self.ensure_one()
         if (
@@ -0,0 +1,39 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import models
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def _post(self, soft=True):
+        posted = super()._post(soft=soft)
+        self.env["account.account.reconcile.group"]._refresh_lines(
+            posted.line_ids.ids
+        )
+        self.env["account.bank.statement.line"]._outdate_reconcile_data(
+            posted._get_open_items()
+        )
+        return posted
+
+    def button_draft(self):
+        open_items = self._get_open_items()
+        res = super().button_draft()
+        self.env["account.account.reconcile.group"]._refresh_lines(self.line_ids.ids)
+        self.env["account.bank.statement.line"]._outdate_reconcile_data(open_items)
+        return res
+
+    def button_cancel(self):
+        open_items = self._get_open_items()
+        res = super().button_cancel()
+        self.env["account.account.reconcile.group"]._refresh_lines(self.line_ids.ids)
+        self.env["account.bank.statement.line"]._outdate_reconcile_data(open_items)
+        return res
+
+    def _get_open_items(self):
+        """Return the items left to reconcile of the posted moves of self, which
+        the stored statement line proposals may match."""
+        return self.filtered(lambda move: move.state == "posted").line_ids.filtered(
+            lambda line: line.account_id.reconcile and not line.reconciled
+        )
@@ -8,6 +8,19 @@ from odoo.exceptions import ValidationError
 class AccountMoveLine(models.Model):
     _inherit = "account.move.line"
 
+    def write(self, vals):
+        groups = self.env["account.account.reconcile.group"]
+        keys = []
+        if {"account_id", "partner_id", "currency_id"} & set(vals) and (
+            groups._is_enabled()
+        ):
+            # The journal items might leave their groups
+            keys = groups._get_line_keys(self.ids)
+        res = super().write(vals)
+        if keys:
+            groups._refresh_lines(self.ids, keys=keys)
+        return res
+
     def action_reconcile_manually(self):
         if not self:
             return {}
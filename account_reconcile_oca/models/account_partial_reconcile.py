@@ -0,0 +1,26 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        self.env["account.account.reconcile.group"]._refresh_lines(
+            (partials.debit_move_id | partials.credit_move_id).ids
+        )
+        return partials
+
+    def unlink(self):
+        line_ids = (self.debit_move_id | self.credit_move_id).ids
+        res = super().unlink()
+        self.env["account.account.reconcile.group"]._refresh_lines(line_ids)
+        # The items are open again
+        self.env["account.bank.statement.line"]._outdate_reconcile_data(
+            self.env["account.move.line"].browse(line_ids)
+        )
+        return res
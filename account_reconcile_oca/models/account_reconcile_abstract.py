@@ -36,6 +36,13 @@ class AccountReconcileAbstract(models.AbstractModel):
     def _get_reconcile_currency(self):
         return self.currency_id or self.company_id._currency_id
 
+    def _convert_reconcile_amount(self, from_currency, amount, to_currency, date):
+        """Convert an amount with the rates table of the company and the date,
+        shared by all the conversions of the reconciliation."""
+        return from_currency.with_context(reconcile_rate_table=True)._convert(
+            amount, to_currency, self.company_id, date
+        )
+
     def _get_reconcile_line(
         self,
         line,
@@ -61,26 +68,26 @@ class AccountReconcileAbstract(models.AbstractModel):
                 elif self.company_id.currency_id == dest_currency:
                     real_currency_amount = amount
                 else:
-                    real_currency_amount = self.company_id.currency_id._convert(
+                    real_currency_amount = self._convert_reconcile_amount(
+                        self.company_id.currency_id,
                         amount,
                         dest_currency,
-                        self.company_id,
                         date,
                     )
                 if (
                     -real_currency_amount > max_amount > 0
                     or -real_currency_amount < max_amount < 0
                 ):
-                    currency_max_amount = self._get_reconcile_currency()._convert(
-                        max_amount, currency, self.company_id, date
+                    currency_max_amount = self._convert_reconcile_amount(
+                        self._get_reconcile_currency(), max_amount, currency, date
                     )
                     amount = currency_max_amount
                     net_amount = -max_amount
                     currency_amount = -amount
-                    amount = currency._convert(
+                    amount = self._convert_reconcile_amount(
+                        currency,
                         currency_amount,
                         self.company_id.currency_id,
-                        self.company_id,
                         date,
                     )
         elif is_reconciled:
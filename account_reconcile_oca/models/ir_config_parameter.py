@@ -0,0 +1,32 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+from .account_account_reconcile_group import MATERIALIZED_OPEN_ITEMS_PARAM
+
+
+class IrConfigParameter(models.Model):
+    _inherit = "ir.config_parameter"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        params = super().create(vals_list)
+        params._reset_open_items_groups()
+        return params
+
+    def write(self, vals):
+        res = super().write(vals)
+        self._reset_open_items_groups()
+        return res
+
+    def unlink(self):
+        self._reset_open_items_groups()
+        return super().unlink()
+
+    def _reset_open_items_groups(self):
+        """Empty the materialized open items groups when they are enabled or
+        disabled, however the parameter is set: they are not refreshed while
+        disabled, and they are built again when first read."""
+        if MATERIALIZED_OPEN_ITEMS_PARAM in self.mapped("key"):
+            self.env["account.account.reconcile.group"]._reset()
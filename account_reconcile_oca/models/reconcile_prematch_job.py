@@ -0,0 +1,192 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+import time
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class ReconcilePrematchJob(models.Model):
+    """Queue of the statement lines whose reconcile proposal has to be computed
+    in background, before the lines are opened in the widget.
+
+    The new statement lines are queued when created, and the lines whose stored
+    proposal is outdated are queued by the cron. The failed jobs are retried
+    with an exponential backoff before being marked as failed.
+    """
+
+    _name = "reconcile.prematch.job"
+    _inherit = "reconcile.queue.mixin"
+    _description = "Reconcile Pre-matching Job"
+    _order = "id"
+    _queue_param_prefix = "account_reconcile_oca.prematch_"
+
+    statement_line_id = fields.Many2one(
+        "account.bank.statement.line",
+        required=True,
+        index=True,
+        ondelete="cascade",
+    )
+    journal_id = fields.Many2one(
+        related="statement_line_id.journal_id", store=True, index=True
+    )
+    company_id = fields.Many2one(related="statement_line_id.company_id", store=True)
+
+    @api.model
+    def _enqueue(self, st_lines):
+        """Add the unreconciled statement lines without pending job to the queue."""
+        st_lines = st_lines.filtered(lambda st_line: not st_line.is_reconciled)
+        if not st_lines:
+            return self.browse()
+        pending = self.sudo().search(
+            [("statement_line_id", "in", st_lines.ids), ("state", "=", "pending")]
+        )
+        st_lines -= pending.statement_line_id
+        return self.sudo().create(
+            [{"statement_line_id": st_line.id} for st_line in st_lines]
+        )
+
+    @api.model
+    def _enqueue_outdated(self, limit):
+        """Queue the unreconciled statement lines having no proposal or an
+        outdated one, oldest lines first, unless they already have a pending or
+        failed job."""
+        st_line_model = self.env["account.bank.statement.line"]
+        st_line_model.flush_model(["reconcile_data", "is_reconciled"])
+        self.env["account.move"].flush_model(["company_id", "state"])
+        self.flush_model(["statement_line_id", "state"])
+        companies = self.env["res.company"].search([])
+        stamps = st_line_model._get_reconcile_data_stamps(companies)
+        jobs = self.browse()
+        for company_id, stamp in stamps.items():
+            if limit <= 0:
+                break
+            self._cr.execute(
+                SQL(
+                    """
+                    SELECT st_line.id
+                    FROM account_bank_statement_line st_line
+                    JOIN account_move move ON move.id = st_line.move_id
+                    WHERE move.company_id = %s
+                        AND move.state = 'posted'
+                        AND st_line.is_reconciled IS NOT TRUE
+                        AND (
+                            st_line.reconcile_data IS NULL
+                            OR (
+                                st_line.reconcile_data::jsonb ? 'stamp'
+                                AND st_line.reconcile_data::jsonb -> 'stamp'
+                                    <> %s::jsonb
+                            )
+                        )
+                        AND NOT EXISTS (
+                            SELECT 1
+                            FROM reconcile_prematch_job job
+                            WHERE job.statement_line_id = st_line.id
+                                AND job.state IN ('pending', 'failed')
+                        )
+                    ORDER BY st_line.id
+                    LIMIT %s
+                    """,
+                    company_id,
+                    json.dumps(stamp),
+                    limit,
+                )
+            )
+            st_lines = st_line_model.browse([row[0] for row in self._cr.fetchall()])
+            jobs |= self._enqueue(st_lines)
+            limit -= len(st_lines)
+        return jobs
+
+    @api.model
+    def _cron_process_jobs(self, batch_size=None, limit=None):
+        """Queue the statement lines whose proposal is outdated, then process the
+        pending jobs in batches of `batch_size` statement lines, committing after
+        each batch, up to `limit` jobs per run."""
+        if limit is None:
+            limit = self._get_queue_param("limit")
+        self._enqueue_outdated(limit)
+        if not tools.config["test_enable"]:
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+        return self._process_queue(batch_size, limit)
+
+    def _process_batch(self):
+        """Compute the proposals of the statement lines of the jobs."""
+        start = time.monotonic()
+        self.statement_line_id._refresh_reconcile_data()
+        self._set_done()
+        _logger.info(
+            "Pre-matching: %s statement lines processed in %.2fs",
+            len(self),
+            time.monotonic() - start,
+        )
+
+    @api.model
+    def _get_dashboard_data(self, journals):
+        """Compute the pre-matching figures shown on the journal dashboard: the
+        backlog of pending lines, the lines processed during the last hour and
+        the average delay between the queuing and the processing of the lines
+        of the last day, in seconds.
+        :return: A dict mapping each journal id with its figures.
+        """
+        result = {
+            journal.id: {
+                "prematch_backlog": 0,
+                "prematch_throughput": 0,
+                "prematch_latency": 0.0,
+            }
+            for journal in journals
+        }
+        if not journals:
+            return result
+        self.flush_model()
+        now = fields.Datetime.now()
+        self._cr.execute(
+            SQL(
+                """
+                SELECT journal_id,
+                    COUNT(*) FILTER (WHERE state = 'pending'),
+                    COUNT(*) FILTER (WHERE state = 'done' AND date_done >= %s)
+                FROM reconcile_prematch_job
+                WHERE journal_id IN %s
+                GROUP BY journal_id
+                """,
+                now - timedelta(hours=1),
+                tuple(journals.ids),
+            )
+        )
+        for journal_id, backlog, throughput in self._cr.fetchall():
+            result[journal_id]["prematch_backlog"] = backlog
+            result[journal_id]["prematch_throughput"] = throughput
+        self._cr.execute(
+            SQL(
+                """
+                SELECT journal_id,
+                    AVG(EXTRACT(EPOCH FROM date_done - create_date))
+                FROM reconcile_prematch_job
+                WHERE state = 'done'
+                    AND date_done >= %s
+                    AND journal_id IN %s
+                GROUP BY journal_id
+                """,
+                now - timedelta(days=1),
+                tuple(journals.ids),
+            )
+        )
+        for journal_id, latency in self._cr.fetchall():
+            result[journal_id]["prematch_latency"] = latency
+        return result
+
+    @api.autovacuum
+    def _gc_done_jobs(self):
+        self.search(
+            [
+                ("state", "=", "done"),
+                ("date_done", "<", fields.Datetime.now() - timedelta(days=7)),
+            ]
+        ).unlink()
@@ -0,0 +1,148 @@
+# Copyright 2024 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import logging
+from datetime import timedelta
+
+from odoo import api, fields, models, tools
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class ReconcileQueueMixin(models.AbstractModel):
+    """Queue drained in batches by a cron, several workers being able to drain
+    it at once. The items failing are retried with an exponential backoff,
+    until they are moved to the `_queue_failed_state` state.
+
+    The queue is tuned by the system parameters `<_queue_param_prefix>` +
+    `batch_size`, `limit`, `retry_delay` and `max_attempts`, defaulting to
+    `_queue_defaults`. The inheriting models implement `_process_batch`.
+    """
+
+    _name = "reconcile.queue.mixin"
+    _description = "Reconcile Queue Mixin"
+
+    _queue_param_prefix = None
+    _queue_defaults = {
+        "batch_size": 100,
+        "limit": 5000,
+        "retry_delay": 60,
+        "max_attempts": 5,
+    }
+    _queue_failed_state = "failed"
+
+    state = fields.Selection(
+        [("pending", "Pending"), ("done", "Done"), ("failed", "Failed")],
+        default="pending",
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(readonly=True)
+    next_attempt_date = fields.Datetime(
+        readonly=True, help="Failed items are not retried before this date"
+    )
+    date_done = fields.Datetime(readonly=True)
+    error = fields.Text(readonly=True)
+
+    @api.model
+    def _get_queue_param(self, name):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(self._queue_param_prefix + name, self._queue_defaults[name])
+        )
+
+    @api.model
+    def _process_queue(self, batch_size=None, limit=None):
+        """Process the pending items in batches of `batch_size`, committing
+        after each batch, up to `limit` items.
+        :return: The number of items processed.
+        """
+        if batch_size is None:
+            batch_size = self._get_queue_param("batch_size")
+        if limit is None:
+            limit = self._get_queue_param("limit")
+        auto_commit = not tools.config["test_enable"]
+        processed = 0
+        while processed < limit:
+            items = self._acquire(min(batch_size, limit - processed))
+            if not items:
+                break
+            items._process()
+            processed += len(items)
+            if auto_commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+        return processed
+
+    @api.model
+    def _acquire(self, batch_size):
+        """Lock the next items due, skipping those taken by another worker."""
+        self.flush_model(["state", "next_attempt_date"])
+        self._cr.execute(
+            SQL(
+                """
+                SELECT id
+                FROM %s
+                WHERE state = 'pending'
+                    AND (next_attempt_date IS NULL OR next_attempt_date <= %s)
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                SQL.identifier(self._table),
+                fields.Datetime.now(),
+                batch_size,
+            )
+        )
+        return self.browse([row[0] for row in self._cr.fetchall()])
+
+    def _get_retry_delay(self, attempts):
+        """Delay before the next attempt: doubled after each failure, from
+        `retry_delay` seconds up to one day."""
+        base_delay = self._get_queue_param("retry_delay")
+        return timedelta(seconds=min(base_delay * 2 ** (attempts - 1), 86400))
+
+    def _process(self):
+        """Process the items as a single batch. When the batch fails as a whole,
+        the items are processed one by one, so that only the faulty ones are
+        retried."""
+        try:
+            with self.env.cr.savepoint():
+                self._process_batch()
+        except Exception as error:
+            if len(self) == 1:
+                _logger.exception("Processing of %s failed", self)
+                self._set_failed(str(error))
+                return
+            for item in self:
+                item._process()
+
+    def _process_batch(self):
+        """Process the items, marking them as done with `_set_done` or as
+        failed with `_set_failed`. Raising fails the whole batch."""
+        raise NotImplementedError()
+
+    def _set_done(self, vals=None):
+        self.write(
+            {
+                "state": "done",
+                "date_done": fields.Datetime.now(),
+                "error": False,
+                **(vals or {}),
+            }
+        )
+
+    def _set_failed(self, error):
+        self.ensure_one()
+        attempts = self.attempts + 1
+        vals = {"attempts": attempts, "error": error}
+        if attempts >= self._get_queue_param("max_attempts"):
+            vals.update(
+                state=self._queue_failed_state, date_done=fields.Datetime.now()
+            )
+        else:
+            vals["next_attempt_date"] = fields.Datetime.now() + self._get_retry_delay(
+                attempts
+            )
+        self.write(vals)
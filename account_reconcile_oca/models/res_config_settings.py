@@ -10,3 +10,15 @@ class ResConfigSettings(models.TransientModel):
     reconcile_aggregate = fields.Selection(
         related="company_id.reconcile_aggregate", readonly=False
     )
+    reconcile_materialized_open_items = fields.Boolean(
+        config_parameter="account_reconcile_oca.materialized_open_items",
+        help="Keep the open items of the manual reconciliation grouped in a table "
+        "refreshed on posting and reconciliation, instead of grouping all the "
+        "journal items each time they are listed.",
+    )
+    reconcile_auto_reconcile_on_create = fields.Boolean(
+        config_parameter="account_reconcile_oca.auto_reconcile_on_create",
+        help="Auto reconcile the bank statement lines as soon as they are created. "
+        "Otherwise they are only auto reconciled by the Auto-Reconcile Bank "
+        "Statement Lines scheduled action.",
+    )
@@ -166,6 +166,83 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         )
         self.assertFalse(reconcile_account)
 
+    def test_reconcile_materialized(self):
+        account = self.non_current_assets_account
+        reconcile_model = self.env["account.account.reconcile"]
+        grouped = reconcile_model.search([]).read(["account_id", "partner_id"])
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_reconcile_oca.materialized_open_items", "1"
+        )
+        groups = self.env["account.account.reconcile.group"]
+        # The groups are built when first read
+        self.assertFalse(groups.search_count([]))
+        self.assertEqual(
+            reconcile_model.search([]).read(["account_id", "partner_id"]), grouped
+        )
+        # Refreshing the groups again updates them in place
+        group_count = groups.search_count([])
+        groups._refresh_lines(self.move_1.line_ids.ids)
+        groups._rebuild()
+        self.assertEqual(groups.search_count([]), group_count)
+        reconcile_account = reconcile_model.search([("account_id", "=", account.id)])
+        self.assertTrue(reconcile_account)
+        with Form(reconcile_account) as f:
+            f.add_account_move_line_id = self.move_1.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+            f.add_account_move_line_id = self.move_2.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+        reconcile_account.reconcile()
+        reconcile_account = reconcile_model.search([("account_id", "=", account.id)])
+        self.assertTrue(reconcile_account)
+        with Form(reconcile_account) as f:
+            f.add_account_move_line_id = self.move_1.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+            f.add_account_move_line_id = self.move_3.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+        reconcile_account.reconcile()
+        self.assertFalse(reconcile_model.search([("account_id", "=", account.id)]))
+        # Unreconciling the items makes the group available again
+        self.move_3.line_ids.remove_move_reconcile()
+        self.assertTrue(reconcile_model.search([("account_id", "=", account.id)]))
+
+    def test_reconcile_materialized_account_change(self):
+        account = self.non_current_assets_account
+        reconcile_model = self.env["account.account.reconcile"]
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_reconcile_oca.materialized_open_items", "1"
+        )
+        self.assertTrue(reconcile_model.search([("account_id", "=", account.id)]))
+        # The groups follow the reconcile flag of the accounts
+        account.reconcile = False
+        self.assertFalse(reconcile_model.search([("account_id", "=", account.id)]))
+        account.reconcile = True
+        self.assertTrue(reconcile_model.search([("account_id", "=", account.id)]))
+
+    def test_add_multiple_lines(self):
+        account = self.non_current_assets_account
+        reconcile_account = self.env["account.account.reconcile"].search(
+            [("account_id", "=", account.id)]
+        )
+        move_lines = (self.move_1 | self.move_2).line_ids.filtered(
+            lambda r: r.account_id == account
+        )
+        reconcile_account.add_multiple_lines([("id", "in", move_lines.ids)])
+        self.assertEqual(
+            sorted(reconcile_account.reconcile_data_info["counterparts"]),
+            sorted(move_lines.ids),
+        )
+        self.assertEqual(len(reconcile_account.reconcile_data_info["data"]), 2)
+        # Lines already added are kept
+        reconcile_account.add_multiple_lines([("id", "in", move_lines.ids)])
+        self.assertEqual(
+            sorted(reconcile_account.reconcile_data_info["counterparts"]),
+            sorted(move_lines.ids),
+        )
+
     def test_clean_reconcile(self):
         account = self.non_current_assets_account
         reconcile_account = self.env["account.account.reconcile"].search(
@@ -183,6 +260,36 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         reconcile_account.clean_reconcile()
         self.assertFalse(reconcile_account.reconcile_data_info.get("counterparts"))
 
+    def test_reconcile_data_drafts(self):
+        account = self.non_current_assets_account
+        reconcile_account = self.env["account.account.reconcile"].search(
+            [("account_id", "=", account.id)]
+        )
+        data_model = self.env["account.account.reconcile.data"]
+        with Form(reconcile_account) as f:
+            f.add_account_move_line_id = self.move_1.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+        with Form(reconcile_account) as f:
+            f.add_account_move_line_id = self.move_2.line_ids.filtered(
+                lambda r: r.account_id == account
+            )
+        drafts = data_model.search([("reconcile_id", "=", reconcile_account.id)])
+        self.assertEqual(len(drafts), 1)
+        self.assertEqual(
+            data_model._get_drafts(reconcile_account.ids)[reconcile_account.id],
+            reconcile_account.reconcile_data_info,
+        )
+        self.assertEqual(len(reconcile_account.reconcile_data_info["counterparts"]), 2)
+        # Drafts not modified for a while are removed
+        self.env.cr.execute(
+            "UPDATE account_account_reconcile_data "
+            "SET write_date = now() - interval '30 days' WHERE id = %s",
+            (drafts.id,),
+        )
+        data_model._gc_expired_drafts()
+        self.assertFalse(drafts.exists())
+
     def test_cannot_reconcile(self):
         """
         There is not enough records to reconcile for this account
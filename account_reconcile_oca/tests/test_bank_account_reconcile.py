@@ -384,6 +384,50 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         self.assertEqual(inv1.amount_residual_signed, 30)
         self.assertEqual(inv2.amount_residual_signed, 70)
 
+    def test_partials_cluster(self):
+        inv1 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        inv2 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        receivable1 = inv1.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        receivable2 = inv2.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        with Form(
+            bank_stmt_line,
+            view="account_reconcile_oca.bank_statement_line_form_reconcile_view",
+        ) as f:
+            f.add_account_move_line_id = receivable1
+            f.manual_reference = f"account.move.line;{receivable1.id}"
+            f.manual_amount = -70
+            f.add_account_move_line_id = receivable2
+        bank_stmt_line.reconcile_bank_line()
+        partials, amounts = bank_stmt_line._get_partials_cluster(
+            bank_stmt_line.line_ids
+        )
+        self.assertEqual(
+            partials,
+            receivable1.matched_credit_ids | receivable2.matched_credit_ids,
+        )
+        self.assertEqual(amounts[receivable1.id], (-70.0, -70.0))
+        self.assertEqual(amounts[receivable2.id], (-30.0, -30.0))
+        self.assertEqual(
+            bank_stmt_line._all_partials_lines(receivable1),
+            receivable1.matched_credit_ids,
+        )
+
     def test_reconcile_invoice_partial_supplier(self):
         """
         We want to partially reconcile two invoices from a single payment.
@@ -617,6 +661,34 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
                 "name": "test",
             }
         )
+        bank_stmt_line = self.acc_bank_stmt_line_model.with_context(
+            auto_reconcile_on_create=True
+        ).create(
+            {
+                "name": "DEMO WRITEOFF",
+                "payment_ref": "DEMO WRITEOFF",
+                "journal_id": self.bank_journal_euro.id,
+                "statement_id": bank_stmt.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        self.assertTrue(bank_stmt_line.is_reconciled)
+        # The auto reconciliation on creation is opt-in
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "DEMO WRITEOFF",
+                "payment_ref": "DEMO WRITEOFF",
+                "journal_id": self.bank_journal_euro.id,
+                "statement_id": bank_stmt.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        self.assertFalse(bank_stmt_line.is_reconciled)
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_reconcile_oca.auto_reconcile_on_create", "1"
+        )
         bank_stmt_line = self.acc_bank_stmt_line_model.create(
             {
                 "name": "DEMO WRITEOFF",
@@ -629,6 +701,331 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
         )
         self.assertTrue(bank_stmt_line.is_reconciled)
 
+    def test_reconcile_rule_deferred(self):
+        """
+        Testing that the auto reconciliation is a separate stage applied on the
+        whole batch of statement lines
+        """
+        self.env["account.reconcile.model"].create(
+            {
+                "name": "write-off model suggestion",
+                "rule_type": "writeoff_suggestion",
+                "match_label": "contains",
+                "match_label_param": "DEMO WRITEOFF",
+                "auto_reconcile": True,
+                "line_ids": [
+                    Command.create({"account_id": self.current_assets_account.id})
+                ],
+            }
+        )
+        bank_stmt_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "DEMO WRITEOFF",
+                    "payment_ref": "DEMO WRITEOFF",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": 100,
+                    "date": time.strftime("%Y-07-15"),
+                },
+                {
+                    "name": "Other",
+                    "payment_ref": "Other",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": 100,
+                    "date": time.strftime("%Y-07-15"),
+                },
+            ]
+        )
+        self.assertFalse(any(bank_stmt_lines.mapped("is_reconciled")))
+        reconciled = bank_stmt_lines._auto_reconcile()
+        self.assertEqual(reconciled, bank_stmt_lines[0])
+        self.assertTrue(bank_stmt_lines[0].is_reconciled)
+        self.assertFalse(bank_stmt_lines[1].is_reconciled)
+
+    def test_auto_reconcile_batch_invoices(self):
+        """
+        Testing that the invoices matched by a batch of statement lines are
+        reconciled together, an invoice being reconciled with a single line
+        """
+        partner_1 = self.env["res.partner"].create({"name": "Batch Partner 1"})
+        partner_2 = self.env["res.partner"].create({"name": "Batch Partner 2"})
+        inv_1 = self.create_invoice_partner(
+            currency_id=self.currency_euro_id, partner_id=partner_1.id
+        )
+        inv_2 = self.create_invoice_partner(
+            currency_id=self.currency_euro_id, partner_id=partner_2.id
+        )
+        self.invoice_matching_models.active = True
+        self.invoice_matching_models.match_text_location_label = False
+        bank_stmt_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "testLine",
+                    "payment_ref": "testLine",
+                    "journal_id": self.bank_journal_euro.id,
+                    "partner_id": invoice.partner_id.id,
+                    "amount": invoice.amount_total,
+                    "date": time.strftime("%Y-07-15"),
+                }
+                for invoice in (inv_1, inv_2, inv_1)
+            ]
+        )
+        reconciled = bank_stmt_lines._auto_reconcile()
+        self.assertEqual(reconciled, bank_stmt_lines[:2])
+        self.assertEqual(inv_1.payment_state, "paid")
+        self.assertEqual(inv_2.payment_state, "paid")
+        self.assertFalse(bank_stmt_lines[2].is_reconciled)
+
+    def test_auto_reconcile_parallel(self):
+        """
+        Testing that the unreconciled statement lines are auto reconciled by
+        shards and that the figures of the shards are aggregated
+        """
+        self.env["account.reconcile.model"].create(
+            {
+                "name": "write-off model suggestion",
+                "rule_type": "writeoff_suggestion",
+                "match_label": "contains",
+                "match_label_param": "DEMO WRITEOFF",
+                "auto_reconcile": True,
+                "line_ids": [
+                    Command.create({"account_id": self.current_assets_account.id})
+                ],
+            }
+        )
+        bank_stmt_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "DEMO WRITEOFF",
+                    "payment_ref": "DEMO WRITEOFF",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": amount,
+                    "date": time.strftime("%Y-07-15"),
+                }
+                for amount in (100, 200, 300)
+            ]
+        )
+        report = self.acc_bank_stmt_line_model._cron_auto_reconcile_parallel(
+            workers=2, shard_size=2
+        )
+        self.assertTrue(all(bank_stmt_lines.mapped("is_reconciled")))
+        journal_report = report["journals"][self.bank_journal_euro.id]
+        self.assertGreaterEqual(journal_report["reconciled"], 3)
+        self.assertFalse(report["failed_shards"])
+        self.assertGreaterEqual(report["shards"], 2)
+
+    def test_reconcile_aggregate(self):
+        bank_stmt = self.acc_bank_stmt_model.create(
+            {
+                "journal_id": self.bank_journal_euro.id,
+                "date": "2024-05-15",
+                "name": "Aggregated statement",
+            }
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "statement_id": bank_stmt.id,
+                "amount": 100,
+                "date": "2024-05-15",
+            }
+        )
+        reconcile_aggregate_map = bank_stmt_line._reconcile_aggregate_map()
+        for reconcile_aggregate in ("statement", "day", "week", "month"):
+            self.bank_journal_euro.reconcile_aggregate = reconcile_aggregate
+            bank_stmt_line.invalidate_recordset(
+                ["reconcile_aggregate", "aggregate_id", "aggregate_name"]
+            )
+            self.assertEqual(bank_stmt_line.reconcile_aggregate, reconcile_aggregate)
+            self.assertEqual(
+                (bank_stmt_line.aggregate_id, bank_stmt_line.aggregate_name),
+                reconcile_aggregate_map[reconcile_aggregate](bank_stmt_line),
+            )
+            # The grouping key is stored, so that the lines can be grouped on it
+            self.assertEqual(
+                self.acc_bank_stmt_line_model._read_group(
+                    [("id", "=", bank_stmt_line.id)], ["aggregate_id"], ["__count"]
+                ),
+                [(bank_stmt_line.aggregate_id, 1)],
+            )
+
+    def test_refresh_reconcile_data(self):
+        """
+        Testing that the proposals computed in background are stored with a stamp
+        and only used while the reconcile models are unchanged
+        """
+        reconcile_model = self.env["account.reconcile.model"].create(
+            {
+                "name": "write-off model suggestion",
+                "rule_type": "writeoff_suggestion",
+                "match_label": "contains",
+                "match_label_param": "DEMO WRITEOFF",
+                "line_ids": [
+                    Command.create({"account_id": self.current_assets_account.id})
+                ],
+            }
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "DEMO WRITEOFF",
+                "payment_ref": "DEMO WRITEOFF",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        self.assertFalse(bank_stmt_line.reconcile_data)
+        bank_stmt_line._refresh_reconcile_data()
+        data = bank_stmt_line.reconcile_data
+        self.assertTrue(data["can_reconcile"])
+        self.assertEqual(
+            data["stamp"],
+            bank_stmt_line._get_reconcile_data_stamps(bank_stmt_line.company_id)[
+                bank_stmt_line.company_id.id
+            ],
+        )
+        self.assertIn(
+            self.current_assets_account.id,
+            [line["account_id"][0] for line in data["data"]],
+        )
+        # The stored proposal is used as is
+        bank_stmt_line.reconcile_data = dict(data, manual_reference="stored")
+        bank_stmt_line.invalidate_recordset(["reconcile_data_info"])
+        self.assertEqual(
+            bank_stmt_line.reconcile_data_info["manual_reference"], "stored"
+        )
+        # Until the reconcile models change
+        reconcile_model.copy()
+        bank_stmt_line.invalidate_recordset(["reconcile_data_info"])
+        self.assertNotEqual(
+            bank_stmt_line.reconcile_data_info["manual_reference"], "stored"
+        )
+        # Or their lines
+        bank_stmt_line._refresh_reconcile_data()
+        bank_stmt_line.reconcile_data = dict(
+            bank_stmt_line.reconcile_data, manual_reference="stored"
+        )
+        reconcile_model.line_ids.label = "Write-off"
+        bank_stmt_line.invalidate_recordset(["reconcile_data_info"])
+        self.assertNotEqual(
+            bank_stmt_line.reconcile_data_info["manual_reference"], "stored"
+        )
+        # Or new open items are posted
+        bank_stmt_line._refresh_reconcile_data()
+        bank_stmt_line.reconcile_data = dict(
+            bank_stmt_line.reconcile_data, manual_reference="stored"
+        )
+        self.create_invoice(currency_id=self.currency_euro_id, invoice_amount=100)
+        bank_stmt_line.invalidate_recordset(["reconcile_data_info"])
+        self.assertNotEqual(
+            bank_stmt_line.reconcile_data_info["manual_reference"], "stored"
+        )
+        self.assertTrue(bank_stmt_line.can_reconcile)
+        # But not by the open items of another partner than the matched one
+        partner_1 = self.env["res.partner"].create({"name": "Matched Partner"})
+        partner_2 = self.env["res.partner"].create({"name": "Other Partner"})
+        bank_stmt_line.partner_id = partner_1
+        bank_stmt_line._refresh_reconcile_data()
+        self.assertEqual(
+            bank_stmt_line.reconcile_data["match_partner_id"], partner_1.id
+        )
+        bank_stmt_line.reconcile_data = dict(
+            bank_stmt_line.reconcile_data, manual_reference="stored"
+        )
+        self.create_invoice_partner(
+            currency_id=self.currency_euro_id, partner_id=partner_2.id
+        )
+        bank_stmt_line.invalidate_recordset(["reconcile_data_info"])
+        self.assertEqual(
+            bank_stmt_line.reconcile_data_info["manual_reference"], "stored"
+        )
+        self.create_invoice_partner(
+            currency_id=self.currency_euro_id, partner_id=partner_1.id
+        )
+        self.assertFalse(bank_stmt_line.reconcile_data)
+
+    def test_prematch_job(self):
+        """
+        Testing that the new statement lines are queued and matched in background
+        """
+        reconcile_model = self.env["account.reconcile.model"].create(
+            {
+                "name": "write-off model suggestion",
+                "rule_type": "writeoff_suggestion",
+                "match_label": "contains",
+                "match_label_param": "DEMO WRITEOFF",
+                "line_ids": [
+                    Command.create({"account_id": self.current_assets_account.id})
+                ],
+            }
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "DEMO WRITEOFF",
+                "payment_ref": "DEMO WRITEOFF",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        job = self.env["reconcile.prematch.job"].search(
+            [("statement_line_id", "=", bank_stmt_line.id)]
+        )
+        self.assertEqual(job.state, "pending")
+        dashboard = self.bank_journal_euro._get_journal_dashboard_data_batched()
+        self.assertEqual(dashboard[self.bank_journal_euro.id]["prematch_backlog"], 1)
+        self.env["reconcile.prematch.job"]._cron_process_jobs(batch_size=10)
+        self.assertEqual(job.state, "done")
+        self.assertEqual(bank_stmt_line.reconcile_data["confidence"], "medium")
+        self.assertTrue(bank_stmt_line.can_reconcile)
+        dashboard = self.bank_journal_euro._get_journal_dashboard_data_batched()
+        self.assertEqual(dashboard[self.bank_journal_euro.id]["prematch_backlog"], 0)
+        self.assertEqual(
+            dashboard[self.bank_journal_euro.id]["prematch_throughput"], 1
+        )
+        # The outdated proposals are queued again by the cron
+        reconcile_model.copy()
+        self.env["reconcile.prematch.job"]._cron_process_jobs(batch_size=10)
+        jobs = self.env["reconcile.prematch.job"].search(
+            [("statement_line_id", "=", bank_stmt_line.id)]
+        )
+        self.assertEqual(jobs.mapped("state"), ["done", "done"])
+        self.assertEqual(
+            bank_stmt_line.reconcile_data["stamp"],
+            bank_stmt_line._get_reconcile_data_stamps(bank_stmt_line.company_id)[
+                bank_stmt_line.company_id.id
+            ],
+        )
+
+    def test_prematch_job_retry(self):
+        """
+        Testing that the failed pre-matching jobs are retried with a backoff
+        """
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "DEMO",
+                "payment_ref": "DEMO",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 100,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        job = self.env["reconcile.prematch.job"].search(
+            [("statement_line_id", "=", bank_stmt_line.id)]
+        )
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_reconcile_oca.prematch_max_attempts", 2
+        )
+        job._set_failed("Error")
+        self.assertEqual(job.state, "pending")
+        self.assertEqual(job.attempts, 1)
+        self.assertTrue(job.next_attempt_date)
+        self.assertNotIn(job, self.env["reconcile.prematch.job"]._acquire(10))
+        job._set_failed("Error")
+        self.assertEqual(job.state, "failed")
+        self.assertEqual(job.error, "Error")
+
     def test_reconcile_invoice_keep(self):
         """
         We want to test how the keep mode works, keeping the original move lines.
@@ -891,6 +1288,98 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
             f.manual_delete = True
             self.assertFalse(f.can_reconcile)
 
+    def test_reconcile_data_totals(self):
+        """
+        The totals of the reconcile data are updated with the lines added,
+        edited or removed and match the ones computed from all the lines.
+        """
+        inv1 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        inv2 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 150,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        receivable1 = inv1.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        receivable2 = inv2.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+
+        def check_totals(amount):
+            data = bank_stmt_line.reconcile_data_info
+            self.assertEqual(data["totals"]["amount"], amount)
+            self.assertEqual(
+                data["totals"],
+                bank_stmt_line._get_reconcile_data_totals(
+                    [line for line in data["data"] if line["kind"] != "suspense"]
+                ),
+            )
+
+        with Form(
+            bank_stmt_line,
+            view="account_reconcile_oca.bank_statement_line_form_reconcile_view",
+        ) as f:
+            f.add_account_move_line_id = receivable1
+            f.add_account_move_line_id = receivable2
+            self.assertTrue(f.can_reconcile)
+        check_totals(0.0)
+        with Form(
+            bank_stmt_line,
+            view="account_reconcile_oca.bank_statement_line_form_reconcile_view",
+        ) as f:
+            f.manual_reference = f"account.move.line;{receivable2.id}"
+            self.assertEqual(f.manual_amount, -50)
+            f.manual_amount = -20
+            self.assertFalse(f.can_reconcile)
+        check_totals(30.0)
+        with Form(
+            bank_stmt_line,
+            view="account_reconcile_oca.bank_statement_line_form_reconcile_view",
+        ) as f:
+            f.manual_reference = f"account.move.line;{receivable1.id}"
+            f.manual_delete = True
+            self.assertFalse(f.can_reconcile)
+        check_totals(130.0)
+
+    def test_add_multiple_lines(self):
+        inv1 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        inv2 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        bank_stmt_line = self.acc_bank_stmt_line_model.create(
+            {
+                "name": "testLine",
+                "journal_id": self.bank_journal_euro.id,
+                "amount": 150,
+                "date": time.strftime("%Y-07-15"),
+            }
+        )
+        receivables = (inv1 | inv2).line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        bank_stmt_line.add_multiple_lines([("id", "in", receivables.ids)])
+        data = bank_stmt_line.reconcile_data_info
+        self.assertEqual(sorted(data["counterparts"]), sorted(receivables.ids))
+        self.assertEqual(
+            [line["amount"] for line in data["data"] if line["kind"] == "other"],
+            [-100.0, -50.0],
+        )
+        self.assertTrue(data["can_reconcile"])
+        # Lines already added are kept
+        bank_stmt_line.add_multiple_lines([("id", "in", receivables.ids)])
+        self.assertEqual(bank_stmt_line.reconcile_data_info["data"], data["data"])
+
     def test_widget_invoice_unselect(self):
         """
         We want to test how selection and unselection of an account move lines is
@@ -1456,3 +1945,52 @@ class TestReconciliationWidget(TestAccountReconciliationCommon):
             self.assertEqual(3, len(f.reconcile_data_info["data"]))
             self.assertTrue(f.can_reconcile)
             self.assertEqual(f.reconcile_data_info["data"][-1]["amount"], 3.63)
+
+    def test_reconcile_proposed(self):
+        """
+        Testing that the proposals of several statement lines are reconciled by
+        batches, including two statement lines paying the same invoice
+        """
+        inv1 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=100
+        )
+        inv2 = self.create_invoice(
+            currency_id=self.currency_euro_id, invoice_amount=200
+        )
+        bank_stmt_lines = self.acc_bank_stmt_line_model.create(
+            [
+                {
+                    "name": "testLine",
+                    "journal_id": self.bank_journal_euro.id,
+                    "amount": amount,
+                    "date": time.strftime("%Y-07-15"),
+                }
+                for amount in (100, 150, 50, 10)
+            ]
+        )
+        receivable1, receivable2 = (inv1 + inv2).line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        for bank_stmt_line, receivable in zip(
+            bank_stmt_lines, (receivable1, receivable2, receivable2)
+        ):
+            with Form(
+                bank_stmt_line,
+                view="account_reconcile_oca.bank_statement_line_form_reconcile_view",
+            ) as f:
+                f.add_account_move_line_id = receivable
+            self.assertTrue(bank_stmt_line.can_reconcile)
+        self.assertFalse(bank_stmt_lines[3].can_reconcile)
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_reconcile_oca.reconcile_batch_size", 2
+        )
+        action = bank_stmt_lines.action_reconcile_proposed()
+        self.assertEqual(
+            bank_stmt_lines.mapped("is_reconciled"), [True, True, True, False]
+        )
+        self.assertEqual(
+            action["params"]["message"],
+            "3 of 4 statement lines have been reconciled.",
+        )
+        self.assertFalse(inv1.amount_residual)
+        self.assertFalse(inv2.amount_residual)
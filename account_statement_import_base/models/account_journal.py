@@ -10,25 +10,61 @@ from odoo.addons.base.models.res_bank import sanitize_account_number
 class AccountJournal(models.Model):
     _inherit = "account.journal"
 
-    def _statement_line_import_speeddict(self):
+    def _statement_line_import_speeddict(self, transactions=None):
         """This method is designed to be inherited by reconciliation modules.
         These modules can take advantage of this method to pre-fetch data
         that will later be used for many statement lines (to avoid
         searching data for each statement line).
         The goal is to improve performances.
+        The speeddict is built from the providers returned by
+        _statement_line_import_speeddict_providers, once per import (or per
+        chunk of transactions for the streamed imports).
+        :param transactions: The values of the statement lines that will be
+          completed with the speeddict, so that the providers only pre-fetch
+          what they need. None pre-fetches everything that can be.
         """
         self.ensure_one()
-        speeddict = {"account_number": {}}
+        return {
+            key: getattr(self, method)(transactions)
+            for key, method in self._statement_line_import_speeddict_providers().items()
+        }
+
+    def _statement_line_import_speeddict_providers(self):
+        """Registry of the pre-fetch providers: map each key of the speeddict with
+        the name of the journal method computing it. Modules extend it to add
+        their own data, which they can then use in
+        _statement_line_import_update_hook without running any query.
+        A provider receives the transactions passed to
+        _statement_line_import_speeddict.
+        """
+        return {"account_number": "_statement_line_import_prefetch_account_number"}
+
+    def _statement_line_import_prefetch_account_number(self, transactions):
+        """Map the sanitized account numbers with their partner and bank account."""
+        domain = [("company_id", "in", (False, self.company_id.id))]
+        if transactions is not None:
+            account_numbers = {
+                sanitize_account_number(lvals["account_number"])
+                for lvals in transactions
+                if lvals.get("account_number")
+            }
+            if not account_numbers:
+                return {}
+            domain.append(("sanitized_acc_number", "in", list(account_numbers)))
         partner_banks = self.env["res.partner.bank"].search_read(
-            [("company_id", "in", (False, self.company_id.id))],
-            ["acc_number", "partner_id"],
+            domain, ["acc_number", "partner_id"]
         )
+        account_numbers = {}
         for partner_bank in partner_banks:
-            speeddict["account_number"][partner_bank["acc_number"]] = {
+            # The hook looks up the sanitized account number of the line
+            account_number = self._sanitize_bank_account_number(
+                partner_bank["acc_number"]
+            )
+            account_numbers[account_number] = {
                 "partner_id": partner_bank["partner_id"][0],
                 "partner_bank_id": partner_bank["id"],
             }
-        return speeddict
+        return account_numbers
 
     def _statement_line_import_update_hook(self, st_line_vals, speeddict):
         """This method is designed to be inherited by reconciliation modules.
@@ -0,0 +1,15 @@
+# Copyright 2024 Dixmit
+# Licence LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl-3.0).
+
+from odoo import fields, models
+
+
+class AccountBankStatement(models.Model):
+    _inherit = "account.bank.statement"
+
+    import_in_progress = fields.Boolean(
+        copy=False,
+        readonly=True,
+        help="The statement is being imported by chunks and its last chunk has "
+        "not been committed yet. Importing the file again resumes it.",
+    )
@@ -0,0 +1,291 @@
+# Copyright 2024 Dixmit
+# License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
+
+import base64
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from xml.sax.saxutils import escape
+
+from odoo.exceptions import UserError
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("post_install", "-at_install", "-standard", "statement_import_benchmark")
+class TestAccountStatementImportBenchmark(AccountTestInvoicingCommon):
+    """Measure the throughput of the statement import on synthetic statements.
+
+    The statements are generated as CAMT.053 files, so a module parsing them,
+    such as account_statement_import_camt, must be installed; the benchmark is
+    skipped otherwise.
+
+    This is not part of the standard tests, run it with
+    ``--test-tags statement_import_benchmark``. It is configured with the
+    following environment variables:
+
+    - STATEMENT_IMPORT_BENCHMARK_SIZES: comma separated numbers of transactions
+      (default "1000", e.g. "1000,10000,100000")
+    - STATEMENT_IMPORT_BENCHMARK_DUPLICATES: share of already imported
+      transactions (default 0.2)
+    - STATEMENT_IMPORT_BENCHMARK_MATCHABLE: share of transactions paying an open
+      invoice (default 0.2)
+    - STATEMENT_IMPORT_BENCHMARK_MEMORY: set to 0 to skip the memory
+      measurement, which slows the stages down (default 1)
+    - STATEMENT_IMPORT_BENCHMARK_OUTPUT: file where the JSON results are written,
+      they are logged otherwise
+
+    The wall time, the number of SQL queries and the peak memory allocated by
+    Python (traced by tracemalloc) are recorded for each stage: the parsing of
+    the file alone, the import of the file (parsing included), the import of the
+    same transactions again (all of them being duplicates) and the auto
+    reconciliation of the imported lines, when account_reconcile_oca is
+    installed.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        sizes = os.environ.get("STATEMENT_IMPORT_BENCHMARK_SIZES", "1000")
+        cls.sizes = [int(size) for size in sizes.split(",")]
+        cls.duplicates = float(
+            os.environ.get("STATEMENT_IMPORT_BENCHMARK_DUPLICATES", 0.2)
+        )
+        cls.matchable = float(
+            os.environ.get("STATEMENT_IMPORT_BENCHMARK_MATCHABLE", 0.2)
+        )
+        cls.trace_memory = os.environ.get("STATEMENT_IMPORT_BENCHMARK_MEMORY") != "0"
+        cls.journal = cls.company_data["default_journal_bank"]
+        cls.journal.bank_account_id = cls.env["res.partner.bank"].create(
+            {
+                "acc_number": "NL91ABNA0417164300",
+                "partner_id": cls.env.company.partner_id.id,
+            }
+        )
+        cls.currency_code = cls.company_data["currency"].name
+
+    @contextmanager
+    def _measure(self, stats, stage):
+        self.env.flush_all()
+        if self.trace_memory:
+            tracemalloc.start()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        try:
+            yield
+            self.env.flush_all()
+            stats[stage] = {
+                "wall_time": round(time.perf_counter() - start, 3),
+                "queries": self.env.cr.sql_log_count - queries,
+            }
+            if self.trace_memory:
+                stats[stage]["peak_memory_kb"] = (
+                    tracemalloc.get_traced_memory()[1] // 1024
+                )
+        finally:
+            if self.trace_memory:
+                tracemalloc.stop()
+
+    def _create_open_invoices(self, count):
+        partner = self.partner_a
+        invoices = self.env["account.move"].create(
+            [
+                {
+                    "move_type": "out_invoice",
+                    "partner_id": partner.id,
+                    "invoice_date": "2024-01-01",
+                    "invoice_line_ids": [
+                        {
+                            "name": f"Benchmark {index}",
+                            "quantity": 1,
+                            "price_unit": 100.0 + index,
+                            "tax_ids": [],
+                        }
+                    ],
+                }
+                for index in range(count)
+            ]
+        )
+        invoices.action_post()
+        return invoices
+
+    def _generate_transactions(self, size, prefix, duplicates=0, invoices=None):
+        """Return the synthetic transactions: the already imported ones first,
+        then the ones paying the open invoices, then unrelated ones."""
+        invoices = invoices or []
+        transactions = []
+        for index in range(size):
+            transaction = {
+                "date": "2024-01-01",
+                "payment_ref": f"Synthetic transaction {index}",
+                "amount": ((index % 997) + 1) * (-1 if index % 2 else 1),
+                "unique_import_id": f"{prefix}-{index}",
+            }
+            if index < duplicates:
+                transaction["unique_import_id"] = f"{prefix}-seed-{index}"
+            elif index < duplicates + len(invoices):
+                invoice = invoices[index - duplicates]
+                transaction.update(
+                    {
+                        "payment_ref": invoice.name,
+                        "amount": invoice.amount_total,
+                        "partner_name": invoice.partner_id.name,
+                    }
+                )
+            transactions.append(transaction)
+        return transactions
+
+    def _generate_camt_file(self, name, transactions):
+        """Render the transactions as a CAMT.053 statement of the journal."""
+        iban = self.journal.bank_account_id.acc_number
+        currency = self.currency_code
+        entries = []
+        for transaction in transactions:
+            amount = transaction["amount"]
+            partner_name = transaction.get("partner_name")
+            related_parties = ""
+            if partner_name:
+                party = "Dbtr" if amount > 0 else "Cdtr"
+                related_parties = (
+                    f"<RltdPties><{party}><Nm>{escape(partner_name)}</Nm>"
+                    f"</{party}></RltdPties>"
+                )
+            entries.append(
+                f"""
+            <Ntry>
+                <Amt Ccy="{currency}">{abs(amount):.2f}</Amt>
+                <CdtDbtInd>{"CRDT" if amount > 0 else "DBIT"}</CdtDbtInd>
+                <Sts>BOOK</Sts>
+                <BookgDt><Dt>{transaction["date"]}</Dt></BookgDt>
+                <ValDt><Dt>{transaction["date"]}</Dt></ValDt>
+                <AcctSvcrRef>{transaction["unique_import_id"]}</AcctSvcrRef>
+                <NtryDtls>
+                    <TxDtls>
+                        <Refs>
+                            <AcctSvcrRef>{transaction["unique_import_id"]}</AcctSvcrRef>
+                        </Refs>
+                        {related_parties}
+                        <RmtInf>
+                            <Ustrd>{escape(transaction["payment_ref"])}</Ustrd>
+                        </RmtInf>
+                    </TxDtls>
+                </NtryDtls>
+            </Ntry>"""
+            )
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Document xmlns="urn:iso:std:iso:20022:tech:xsd:camt.053.001.02">
+    <BkToCstmrStmt>
+        <GrpHdr>
+            <MsgId>{escape(name)}</MsgId>
+            <CreDtTm>2024-01-01T00:00:00</CreDtTm>
+        </GrpHdr>
+        <Stmt>
+            <Id>{escape(name)}</Id>
+            <CreDtTm>2024-01-01T00:00:00</CreDtTm>
+            <Acct>
+                <Id><IBAN>{iban}</IBAN></Id>
+                <Ccy>{currency}</Ccy>
+            </Acct>{"".join(entries)}
+        </Stmt>
+    </BkToCstmrStmt>
+</Document>
+""".encode()
+
+    def _create_wizard(self, name, transactions):
+        return (
+            self.env["account.statement.import"]
+            .with_context(journal_id=self.journal.id, auto_reconcile_on_create=False)
+            .create(
+                {
+                    "statement_file": base64.b64encode(
+                        self._generate_camt_file(name, transactions)
+                    ),
+                    "statement_filename": f"{name}.xml",
+                }
+            )
+        )
+
+    def _parse(self, wizard):
+        """Parse the file of the wizard, consuming the streamed results."""
+        parsing_data = wizard._parse_file(base64.b64decode(wizard.statement_file))
+        if isinstance(parsing_data, tuple):
+            parsing_data = [parsing_data]
+        result = []
+        for currency_code, account_number, stmts_vals in parsing_data:
+            stmts_vals = [
+                dict(st_vals, transactions=list(st_vals["transactions"]))
+                for st_vals in stmts_vals
+            ]
+            result.append((currency_code, account_number, stmts_vals))
+        return result
+
+    def _run_benchmark(self, size):
+        prefix = f"benchmark-{size}"
+        duplicates = int(size * self.duplicates)
+        # Import the transactions that will be duplicated beforehand
+        if duplicates:
+            self._create_wizard(
+                f"{prefix} seed",
+                self._generate_transactions(duplicates, f"{prefix}-seed"),
+            )._import_file()
+        invoices = self._create_open_invoices(int(size * self.matchable))
+        stats = {}
+
+        wizard = self._create_wizard(
+            prefix, self._generate_transactions(size, prefix, duplicates, invoices)
+        )
+        with self._measure(stats, "parse_file"):
+            parsing_data = self._parse(wizard)
+        with self._measure(stats, "import_file"):
+            result = wizard._import_file()
+        statements = self.env["account.bank.statement"].browse(result["statement_ids"])
+
+        __, account_number, stmts_vals = parsing_data[0]
+        stmts_vals = wizard._complete_stmts_vals(
+            stmts_vals, self.journal, account_number
+        )
+        with self._measure(stats, "create_bank_statements"):
+            wizard._create_bank_statements(
+                stmts_vals, {"statement_ids": [], "notifications": []}
+            )
+
+        lines = statements.line_ids
+        if hasattr(lines, "_auto_reconcile"):
+            with self._measure(stats, "auto_reconcile"):
+                lines._auto_reconcile()
+            stats["auto_reconcile"]["reconciled"] = len(
+                lines.filtered("is_reconciled")
+            )
+        return {
+            "size": size,
+            "duplicates": duplicates,
+            "matchable": len(invoices),
+            "imported": len(lines),
+            "stages": stats,
+        }
+
+    def test_benchmark(self):
+        try:
+            self._parse(
+                self._create_wizard("probe", self._generate_transactions(1, "probe"))
+            )
+        except UserError:
+            self.skipTest("No module parsing the CAMT.053 files is installed")
+        results = []
+        for size in self.sizes:
+            with self.subTest(size=size):
+                results.append(self._run_benchmark(size))
+                self.assertEqual(
+                    results[-1]["imported"], size - results[-1]["duplicates"]
+                )
+        output = os.environ.get("STATEMENT_IMPORT_BENCHMARK_OUTPUT")
+        if output:
+            with open(output, "w") as output_file:
+                json.dump(results, output_file, indent=2)
+        _logger.info("Statement import benchmark: %s", json.dumps(results))
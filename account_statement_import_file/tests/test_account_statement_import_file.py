@@ -53,6 +53,30 @@ class TestAccountStatementImportFile(common.TransactionCase):
         with self.assertRaises(UserError):
             import_wizard._complete_stmts_vals(stmts_vals, self.journal_1, "1111111111")
 
+    def test_complete_stmts_vals_speeddict(self):
+        partner = self.env["res.partner"].create({"name": "Speeddict partner"})
+        partner_bank = self.env["res.partner.bank"].create(
+            {"acc_number": "BE68 5390 0754 7034", "partner_id": partner.id}
+        )
+        stmts_vals = [
+            {
+                "transactions": [
+                    {
+                        "payment_ref": "With account",
+                        "account_number": "be68539007547034",
+                    },
+                    {"payment_ref": "Without account"},
+                ]
+            }
+        ]
+        self.import_wizard._complete_stmts_vals(
+            stmts_vals, self.journal_1, "1111111111"
+        )
+        with_account, without_account = stmts_vals[0]["transactions"]
+        self.assertEqual(with_account["partner_id"], partner.id)
+        self.assertEqual(with_account["partner_bank_id"], partner_bank.id)
+        self.assertNotIn("partner_id", without_account)
+
     def test_match_journal(self):
         import_wizard = self.import_wizard
 
@@ -146,3 +170,100 @@ class TestAccountStatementImportFile(common.TransactionCase):
         )
         with self.assertRaises(UserError):
             import_wizard.import_single_statement(vals, result)
+
+    def _get_streamed_statements(self, count, name="Streamed"):
+        transactions = (
+            {
+                "payment_ref": f"Transaction {index}",
+                "date": "2024-01-01",
+                "amount": 10.0,
+                "unique_import_id": f"streamed-{index}",
+                "journal_id": self.journal_1.id,
+            }
+            for index in range(count)
+        )
+        return iter(
+            [
+                {
+                    "name": name,
+                    "date": "2024-01-01",
+                    "balance_start": 0.0,
+                    "journal_id": self.journal_1.id,
+                    "transactions": transactions,
+                }
+            ]
+        )
+
+    def test_create_bank_statements_chunked(self):
+        import_wizard = self.import_wizard.with_context(statement_import_chunk_size=2)
+        result = {"statement_ids": [], "notifications": []}
+        import_wizard._create_bank_statements(self._get_streamed_statements(5), result)
+        statement = self.env["account.bank.statement"].browse(result["statement_ids"])
+        self.assertEqual(
+            statement.line_ids.sorted("sequence").mapped("sequence"), [1, 2, 3, 4, 5]
+        )
+        self.assertFalse(statement.import_in_progress)
+        self.assertFalse(result["notifications"])
+
+        # The import of an interrupted statement is resumed
+        statement.import_in_progress = True
+        result = {"statement_ids": [], "notifications": []}
+        import_wizard._create_bank_statements(self._get_streamed_statements(7), result)
+        self.assertEqual(result["statement_ids"], statement.ids)
+        self.assertEqual(len(statement.line_ids), 7)
+        self.assertFalse(statement.import_in_progress)
+        self.assertFalse(result["notifications"])
+
+        # Otherwise the already imported transactions are ignored
+        result = {"statement_ids": [], "notifications": []}
+        import_wizard._create_bank_statements(
+            self._get_streamed_statements(8, name="Streamed 2"), result
+        )
+        new_statement = self.env["account.bank.statement"].browse(
+            result["statement_ids"]
+        )
+        self.assertNotEqual(new_statement, statement)
+        self.assertEqual(len(new_statement.line_ids), 1)
+        self.assertEqual(new_statement.balance_start, 70.0)
+        self.assertEqual(
+            result["notifications"],
+            ["7 transactions had already been imported and were ignored."],
+        )
+
+    def test_create_bank_statements_duplicates(self):
+        stmts_vals = [
+            {
+                "name": "Duplicates",
+                "date": "2024-01-01",
+                "balance_start": 0.0,
+                "journal_id": self.journal_1.id,
+                "transactions": [
+                    {
+                        "payment_ref": f"Transaction {index}",
+                        "date": "2024-01-01",
+                        "amount": 10.0,
+                        "unique_import_id": f"duplicate-{index}",
+                        "journal_id": self.journal_1.id,
+                    }
+                    for index in range(3)
+                ],
+            }
+        ]
+        existing = self.env["account.bank.statement.line"].create(
+            [dict(lvals) for lvals in stmts_vals[0]["transactions"][:2]]
+        )
+        self.assertEqual(
+            self.import_wizard._get_existing_import_lines(
+                ["duplicate-0", "duplicate-1", "duplicate-2"]
+            ),
+            {line.unique_import_id: (line.id, False) for line in existing},
+        )
+        result = {"statement_ids": [], "notifications": []}
+        self.import_wizard._create_bank_statements(stmts_vals, result)
+        statement = self.env["account.bank.statement"].browse(result["statement_ids"])
+        self.assertEqual(statement.line_ids.unique_import_id, "duplicate-2")
+        self.assertEqual(statement.balance_start, 20.0)
+        self.assertEqual(
+            result["notifications"],
+            ["2 transactions had already been imported and were ignored."],
+        )
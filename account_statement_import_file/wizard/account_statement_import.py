@@ -3,14 +3,20 @@
 
 import base64
 import logging
+from collections.abc import Iterator
 
 from odoo import api, fields, models
 from odoo.exceptions import UserError
+from odoo.tools import SQL, split_every
 
 from odoo.addons.base.models.res_bank import sanitize_account_number
 
 logger = logging.getLogger(__name__)
 
+# Number of transactions created at once when the statements are streamed and no
+# chunk size is configured
+DEFAULT_CHUNK_SIZE = 1000
+
 
 class AccountStatementImport(models.TransientModel):
     _name = "account.statement.import"
@@ -85,13 +91,15 @@ class AccountStatementImport(models.TransientModel):
 
     def import_single_file(self, file_data, result):
         parsing_data = self.with_context(active_id=self.ids[0])._parse_file(file_data)
-        if not isinstance(parsing_data, list):  # for backward compatibility
+        # for backward compatibility
+        if not isinstance(parsing_data, (list, Iterator)):
             parsing_data = [parsing_data]
-        logger.info(
-            "Bank statement file %s contains %d accounts",
-            self.statement_filename,
-            len(parsing_data),
-        )
+        if isinstance(parsing_data, list):
+            logger.info(
+                "Bank statement file %s contains %d accounts",
+                self.statement_filename,
+                len(parsing_data),
+            )
         for idx, single_statement_data in enumerate(parsing_data, start=1):
             logger.debug(
                 "account %d: single_statement_data=%s", idx, single_statement_data
@@ -163,6 +171,9 @@ class AccountStatementImport(models.TransientModel):
                     -o 'partner_name': string
         If the file is a multi-statement file, this method must return
         a list of triplets.
+        Large files can be streamed: the list of triplets, the bank statements
+        data and the transactions of each statement can be generators. They are
+        then consumed chunk by chunk, see _create_bank_statements.
         """
         raise UserError(
             self.env._(
@@ -178,12 +189,16 @@ class AccountStatementImport(models.TransientModel):
         support multi-statement files and we don't want one empty
         statement to block the import of others)
         """
+        if isinstance(stmts_vals, Iterator):
+            # Streamed statements can't be checked without consuming them, the
+            # empty ones are skipped when creating the statements.
+            return True
         if len(stmts_vals) == 0:
             return False
 
         no_st_line = True
         for vals in stmts_vals:
-            if vals["transactions"] and len(vals["transactions"]) > 0:
+            if isinstance(vals["transactions"], Iterator) or vals["transactions"]:
                 no_st_line = False
                 break
         if no_st_line:
@@ -297,43 +312,141 @@ class AccountStatementImport(models.TransientModel):
         return journal
 
     def _complete_stmts_vals(self, stmts_vals, journal, account_number):
-        speeddict = journal._statement_line_import_speeddict()
+        if isinstance(stmts_vals, Iterator):
+            return (
+                self._complete_st_vals(st_vals, journal, account_number)
+                for st_vals in stmts_vals
+            )
+        speeddict = journal._statement_line_import_speeddict(
+            [lvals for st_vals in stmts_vals for lvals in st_vals["transactions"]]
+        )
         for st_vals in stmts_vals:
-            st_vals["journal_id"] = journal.id
-            for lvals in st_vals["transactions"]:
-                lvals["journal_id"] = journal.id
-                journal._statement_line_import_update_unique_import_id(
-                    lvals, account_number
-                )
-                journal._statement_line_import_update_hook(lvals, speeddict)
-                if not lvals.get("payment_ref"):
-                    raise UserError(self.env._("Missing payment_ref on a transaction."))
+            self._complete_st_vals(st_vals, journal, account_number, speeddict)
         return stmts_vals
 
+    def _complete_st_vals(self, st_vals, journal, account_number, speeddict=None):
+        st_vals["journal_id"] = journal.id
+        if isinstance(st_vals["transactions"], Iterator):
+            st_vals["transactions"] = self._complete_st_lines_vals_chunked(
+                st_vals["transactions"], journal, account_number
+            )
+            return st_vals
+        if speeddict is None:
+            speeddict = journal._statement_line_import_speeddict(
+                st_vals["transactions"]
+            )
+        for lvals in st_vals["transactions"]:
+            self._complete_st_line_vals(lvals, journal, account_number, speeddict)
+        return st_vals
+
+    def _complete_st_lines_vals_chunked(self, transactions, journal, account_number):
+        """Complete streamed transactions, pre-fetching the speeddict once per
+        chunk."""
+        chunk_size = self._get_import_chunk_size() or DEFAULT_CHUNK_SIZE
+        for chunk in split_every(chunk_size, transactions, list):
+            speeddict = journal._statement_line_import_speeddict(chunk)
+            for lvals in chunk:
+                yield self._complete_st_line_vals(
+                    lvals, journal, account_number, speeddict
+                )
+
+    def _complete_st_line_vals(self, lvals, journal, account_number, speeddict):
+        lvals["journal_id"] = journal.id
+        journal._statement_line_import_update_unique_import_id(lvals, account_number)
+        journal._statement_line_import_update_hook(lvals, speeddict)
+        if not lvals.get("payment_ref"):
+            raise UserError(self.env._("Missing payment_ref on a transaction."))
+        return lvals
+
+    def _get_import_chunk_size(self):
+        """Number of transactions created at once. 0 disables the chunked
+        creation, unless the parser streams the statements."""
+        chunk_size = self.env.context.get("statement_import_chunk_size")
+        if chunk_size is None:
+            chunk_size = (
+                self.env["ir.config_parameter"]
+                .sudo()
+                .get_param("account_statement_import_file.chunk_size", 0)
+            )
+        return int(chunk_size)
+
+    def _get_import_chunk_commit(self):
+        """Whether each chunk is committed, so that a large import does not hold
+        its locks until the end and can be resumed if it gets interrupted."""
+        chunk_commit = self.env.context.get("statement_import_chunk_commit")
+        if chunk_commit is None:
+            chunk_commit = (
+                self.env["ir.config_parameter"]
+                .sudo()
+                .get_param("account_statement_import_file.chunk_commit", False)
+            )
+        return bool(chunk_commit) and chunk_commit not in ("0", "False")
+
+    def _get_existing_import_lines(self, unique_import_ids):
+        """Find the statement lines already imported with the given unique
+        import ids, in a single query joining them as an array, whatever their
+        number.
+        :return: A dict mapping each unique import id found with a tuple
+          (statement line id, statement id).
+        """
+        unique_import_ids = list(set(unique_import_ids))
+        if not unique_import_ids:
+            return {}
+        self.env["account.bank.statement.line"].flush_model(
+            ["unique_import_id", "statement_id"]
+        )
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT st_line.unique_import_id, st_line.id, st_line.statement_id
+                FROM account_bank_statement_line st_line
+                JOIN unnest(%s::varchar[]) AS imported(unique_import_id)
+                    ON imported.unique_import_id = st_line.unique_import_id
+                """,
+                unique_import_ids,
+            )
+        )
+        return {
+            unique_import_id: (line_id, statement_id or False)
+            for unique_import_id, line_id, statement_id in self.env.cr.fetchall()
+        }
+
     def _create_bank_statements(self, stmts_vals, result):
         """Create new bank statements from imported values,
         filtering out already imported transactions,
         and return data used by the reconciliation widget"""
+        chunk_size = self._get_import_chunk_size()
+        if (
+            chunk_size
+            or isinstance(stmts_vals, Iterator)
+            or any(
+                isinstance(st_vals["transactions"], Iterator) for st_vals in stmts_vals
+            )
+        ):
+            return self._create_bank_statements_chunked(
+                stmts_vals, result, chunk_size or DEFAULT_CHUNK_SIZE
+            )
         abs_obj = self.env["account.bank.statement"]
-        absl_obj = self.env["account.bank.statement.line"]
 
         # Filter out already imported transactions and create statements
         statement_ids = []
         existing_st_line_ids = {}
+        existing = self._get_existing_import_lines(
+            [
+                lvals["unique_import_id"]
+                for st_vals in stmts_vals
+                for lvals in st_vals["transactions"]
+                if lvals.get("unique_import_id")
+            ]
+        )
         for st_vals in stmts_vals:
             st_lines_to_create = []
             for lvals in st_vals["transactions"]:
-                existing_line = False
-                if lvals.get("unique_import_id"):
-                    existing_line = absl_obj.sudo().search(
-                        [
-                            ("unique_import_id", "=", lvals["unique_import_id"]),
-                        ],
-                        limit=1,
-                    )
-                    # we can only have 1 anyhow because we have a unicity SQL constraint
-                if existing_line:
-                    existing_st_line_ids[existing_line.id] = True
+                existing_line_id, _statement_id = existing.get(
+                    lvals.get("unique_import_id"), (False, False)
+                )
+                if existing_line_id:
+                    existing_st_line_ids[existing_line_id] = True
                     if "balance_start" in st_vals:
                         st_vals["balance_start"] += float(lvals["amount"])
                 else:
@@ -355,8 +468,93 @@ class AccountStatementImport(models.TransientModel):
             return False
         result["statement_ids"].extend(statement_ids)
 
-        # Prepare import feedback
-        num_ignored = len(existing_st_line_ids)
+        self._add_ignored_notification(result, len(existing_st_line_ids))
+
+    def _create_bank_statements_chunked(self, stmts_vals, result, chunk_size):
+        """Create the bank statements consuming their transactions by chunks of
+        `chunk_size`, so that large or streamed files are never fully held in
+        memory. When the chunks are committed, the statement is flagged as being
+        imported until its last chunk is created; importing the same file again
+        then resumes it instead of reporting its lines as already imported."""
+        abs_obj = self.env["account.bank.statement"]
+        absl_obj = self.env["account.bank.statement.line"]
+        chunk_commit = self._get_import_chunk_commit()
+        statement_ids = []
+        existing_st_line_ids = set()
+        for st_vals in stmts_vals:
+            transactions = st_vals.pop("transactions", None) or []
+            context = st_vals.pop("creation_context", {})
+            statement = abs_obj
+            sequence = 0
+            balance_start_delta = 0.0
+            for chunk in split_every(chunk_size, transactions, list):
+                existing = self._get_existing_import_lines(
+                    [
+                        lvals["unique_import_id"]
+                        for lvals in chunk
+                        if lvals.get("unique_import_id")
+                    ]
+                )
+                st_lines_to_create = []
+                for lvals in chunk:
+                    line_id, statement_id = existing.get(
+                        lvals.get("unique_import_id"), (False, False)
+                    )
+                    if not line_id:
+                        st_lines_to_create.append(lvals)
+                        continue
+                    existing_statement = abs_obj.browse(statement_id)
+                    if (
+                        not statement
+                        and existing_statement.import_in_progress
+                        and existing_statement.journal_id.id == st_vals["journal_id"]
+                    ):
+                        # Resume the import of an interrupted statement
+                        statement = existing_statement
+                        sequence = max(
+                            statement.line_ids.mapped("sequence"), default=0
+                        )
+                    if statement and statement_id == statement.id:
+                        continue
+                    existing_st_line_ids.add(line_id)
+                    balance_start_delta += float(lvals["amount"])
+                if st_lines_to_create:
+                    if not statement:
+                        statement = abs_obj.with_context(**context).create(
+                            dict(st_vals, import_in_progress=chunk_commit)
+                        )
+                    for vals in st_lines_to_create:
+                        if not vals.get("sequence"):
+                            sequence += 1
+                            vals["sequence"] = sequence
+                        vals["statement_id"] = statement.id
+                    absl_obj.with_context(**context).create(st_lines_to_create)
+                self._end_import_chunk(chunk_commit)
+            if not statement:
+                continue
+            statement_ids.append(statement.id)
+            statement_vals = {"import_in_progress": False}
+            if "balance_start" in st_vals:
+                statement_vals["balance_start"] = (
+                    st_vals["balance_start"] + balance_start_delta
+                )
+            statement.write(statement_vals)
+            self._end_import_chunk(chunk_commit)
+
+        if not statement_ids:
+            return False
+        result["statement_ids"].extend(statement_ids)
+        self._add_ignored_notification(result, len(existing_st_line_ids))
+
+    def _end_import_chunk(self, chunk_commit):
+        self.env.flush_all()
+        if chunk_commit:
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+        # Free the memory used by the records of the chunk
+        self.env.invalidate_all()
+
+    def _add_ignored_notification(self, result, num_ignored):
+        """Prepare import feedback"""
         if num_ignored > 0:
             if num_ignored == 1:
                 msg = self.env._(
@@ -5,7 +5,7 @@
 {
     "name": "Import Statement Files and Go Direct to Reconciliation",
     "category": "Accounting",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.1.0",
     "license": "AGPL-3",
     "depends": ["account_statement_import_file", "account_reconcile_oca"],
     "author": "Akretion, Odoo Community Association (OCA)",
@@ -13,6 +13,7 @@
     "website": "https://github.com/OCA/bank-statement-import",
     "data": [
         "wizards/account_statement_import_view.xml",
+        "views/res_config_settings.xml",
     ],
     "installable": True,
     "auto_install": True,
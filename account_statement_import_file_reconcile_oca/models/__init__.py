@@ -0,0 +1,2 @@
+from . import account_journal
+from . import res_config_settings
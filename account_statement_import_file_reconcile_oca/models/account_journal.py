@@ -0,0 +1,176 @@
+# Copyright 2024 Dixmit
+# Licence AGPL-3.0 or later (https://www.gnu.org/licenses/agpl-3.0).
+
+import re
+
+from odoo import models
+from odoo.tools import SQL, html2plaintext
+
+
+class AccountJournal(models.Model):
+    _inherit = "account.journal"
+
+    def _statement_line_import_speeddict_providers(self):
+        providers = super()._statement_line_import_speeddict_providers()
+        providers.update(
+            {
+                "partner_name": "_statement_line_import_prefetch_partner_name",
+                "reconcile_mapping": (
+                    "_statement_line_import_prefetch_reconcile_mapping"
+                ),
+                "invoice_reference": (
+                    "_statement_line_import_prefetch_invoice_reference"
+                ),
+            }
+        )
+        return providers
+
+    def _statement_line_import_prefetch_partner_name(self, transactions):
+        """Map the partner names of the transactions with the partner found by
+        the reconciliation widget for them."""
+        partner_model = self.env["res.partner"]
+        partner_names = {
+            lvals["partner_name"]
+            for lvals in transactions or []
+            if lvals.get("partner_name")
+        }
+        partner_ids = partner_model._get_partner_ids_from_names(
+            {(self.company_id.id, partner_name) for partner_name in partner_names}
+        )
+        return {
+            partner_name: partner_id
+            for (__, partner_name), partner_id in partner_ids.items()
+        }
+
+    def _statement_line_import_prefetch_reconcile_mapping(self, transactions):
+        """Compile the partner mappings of the reconcile models that may apply on
+        the journal, by sign of the amount, in sequence order.
+        :return: A dict mapping each sign with a list of tuples (reconcile model
+          id, payment_ref regex, narration regex, partner id).
+        """
+        rec_models = self.env["account.reconcile.model"].search(
+            [
+                ("rule_type", "in", ["invoice_matching", "writeoff_suggestion"]),
+                ("company_id", "=", self.company_id.id),
+                ("partner_mapping_line_ids", "!=", False),
+            ]
+        )
+        candidates = rec_models._get_rule_index(self.company_id.id)["candidates"]
+        mappings = {}
+        for sign in (-1, 0, 1):
+            mappings[sign] = [
+                (
+                    rec_model.id,
+                    mapping.payment_ref_regex and re.compile(mapping.payment_ref_regex),
+                    mapping.narration_regex and re.compile(mapping.narration_regex),
+                    mapping.partner_id.id,
+                )
+                for rec_model in rec_models.browse(
+                    candidates.get((self.id, sign), candidates[False, sign])
+                )
+                if rec_model in rec_models
+                for mapping in rec_model.partner_mapping_line_ids
+            ]
+        return mappings
+
+    def _statement_line_import_prefetch_invoice_reference(self, transactions):
+        """Map the labels and references of the transactions matching exactly the
+        number or the reference of the open journal items of a single partner
+        with this partner, when enabled in the settings."""
+        if (
+            not self.env["ir.config_parameter"]
+            .sudo()
+            .get_param(
+                "account_statement_import_file_reconcile_oca.partner_from_reference"
+            )
+        ):
+            return {}
+        references = {
+            lvals[field]
+            for lvals in transactions or []
+            for field in ("payment_ref", "ref")
+            if lvals.get(field)
+        }
+        if not references:
+            return {}
+        self.env["account.move.line"].flush_model(
+            ["partner_id", "company_id", "reconciled"]
+        )
+        self._cr.execute(
+            SQL(
+                """
+                SELECT matching_token.token, ARRAY_AGG(DISTINCT aml.partner_id)
+                FROM account_move_line_matching_token matching_token
+                JOIN account_move_line aml ON aml.id = matching_token.move_line_id
+                WHERE matching_token.token IN %s
+                    AND matching_token.kind = 'exact'
+                    AND matching_token.source IN ('note', 'reference')
+                    AND aml.company_id = %s
+                    AND aml.partner_id IS NOT NULL
+                    AND NOT aml.reconciled
+                GROUP BY matching_token.token
+                """,
+                tuple(references),
+                self.company_id.id,
+            )
+        )
+        return {
+            reference: partner_ids[0]
+            for reference, partner_ids in self._cr.fetchall()
+            if len(partner_ids) == 1
+        }
+
+    def _statement_line_import_update_hook(self, st_line_vals, speeddict):
+        res = super()._statement_line_import_update_hook(st_line_vals, speeddict)
+        if st_line_vals.get("partner_id"):
+            return res
+        partner_id = (
+            speeddict["partner_name"].get(st_line_vals.get("partner_name"))
+            or self._statement_line_import_match_mapping(
+                st_line_vals, speeddict["reconcile_mapping"]
+            )
+            or speeddict["invoice_reference"].get(st_line_vals.get("payment_ref"))
+            or speeddict["invoice_reference"].get(st_line_vals.get("ref"))
+        )
+        if partner_id:
+            st_line_vals["partner_id"] = partner_id
+        return res
+
+    def _statement_line_import_match_mapping(self, st_line_vals, mappings):
+        """Return the partner of the first partner mapping matching the line
+        whose reconcile model applies on the line with this partner, as when the
+        partner is retrieved by the reconciliation widget."""
+        amount = float(st_line_vals.get("amount") or 0.0)
+        sign = (amount > 0) - (amount < 0)
+        payment_ref = st_line_vals.get("payment_ref") or ""
+        narration = html2plaintext(st_line_vals.get("narration") or "").rstrip()
+        st_line = None
+        checked_rec_model_ids = set()
+        for mapping in mappings[sign]:
+            rec_model_id, payment_ref_regex, narration_regex, partner_id = mapping
+            if (
+                rec_model_id in checked_rec_model_ids
+                or (payment_ref_regex and not payment_ref_regex.match(payment_ref))
+                or (narration_regex and not narration_regex.match(narration))
+            ):
+                continue
+            # Only the first mapping matching is considered for each model
+            checked_rec_model_ids.add(rec_model_id)
+            if st_line is None:
+                # The line is not created yet, the reconcile model is checked
+                # against a draft record of it, without journal entry
+                st_line = self.env["account.bank.statement.line"].new(
+                    {
+                        "journal_id": self.id,
+                        "amount": amount,
+                        "payment_ref": st_line_vals.get("payment_ref"),
+                        "narration": st_line_vals.get("narration"),
+                        "transaction_type": st_line_vals.get("transaction_type"),
+                    }
+                )
+            rec_model = self.env["account.reconcile.model"].browse(rec_model_id)
+            if rec_model._is_applicable_for(
+                st_line, self.env["res.partner"].browse(partner_id), journal=self
+            ):
+                return partner_id
+        return False
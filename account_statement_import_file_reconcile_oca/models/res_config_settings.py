@@ -0,0 +1,16 @@
+# Copyright 2024 Dixmit
+# Licence AGPL-3.0 or later (https://www.gnu.org/licenses/agpl-3.0).
+
+from odoo import fields, models
+
+
+class ResConfigSettings(models.TransientModel):
+    _inherit = "res.config.settings"
+
+    statement_import_partner_from_reference = fields.Boolean(
+        config_parameter="account_statement_import_file_reconcile_oca."
+        "partner_from_reference",
+        help="Set the partner of the imported statement lines whose label or "
+        "reference is the number or the reference of the open journal items of a "
+        "single partner.",
+    )
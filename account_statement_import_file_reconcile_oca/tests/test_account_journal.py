@@ -0,0 +1,122 @@
+# Copyright 2024 Dixmit
+# Licence AGPL-3.0 or later (https://www.gnu.org/licenses/agpl-3.0).
+
+from odoo import Command
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+
+@tagged("post_install", "-at_install")
+class TestAccountJournal(AccountTestInvoicingCommon):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.journal = cls.company_data["default_journal_bank"]
+        cls.partner = cls.env["res.partner"].create({"name": "Speeddict Partner"})
+
+    def _complete_transactions(self, transactions):
+        speeddict = self.journal._statement_line_import_speeddict(transactions)
+        for lvals in transactions:
+            self.journal._statement_line_import_update_hook(lvals, speeddict)
+        return transactions
+
+    def test_prefetch_partner_name(self):
+        known, unknown = self._complete_transactions(
+            [
+                {
+                    "payment_ref": "Transfer",
+                    "partner_name": "Speeddict Partner",
+                    "amount": 100,
+                },
+                {"payment_ref": "Transfer", "partner_name": "Nobody", "amount": 100},
+            ]
+        )
+        self.assertEqual(known["partner_id"], self.partner.id)
+        self.assertNotIn("partner_id", unknown)
+
+    def test_prefetch_reconcile_mapping(self):
+        self.env["account.reconcile.model"].create(
+            {
+                "name": "Partner mapping",
+                "rule_type": "invoice_matching",
+                "match_amount": "greater",
+                "match_amount_min": 50,
+                "partner_mapping_line_ids": [
+                    Command.create(
+                        {"partner_id": self.partner.id, "payment_ref_regex": "^SPD"}
+                    )
+                ],
+            }
+        )
+        applicable, not_applicable, not_matching = self._complete_transactions(
+            [
+                {"payment_ref": "SPD 1", "amount": 100},
+                {"payment_ref": "SPD 2", "amount": 10},
+                {"payment_ref": "Transfer", "amount": 100},
+            ]
+        )
+        self.assertEqual(applicable["partner_id"], self.partner.id)
+        # The mapping is only used when its reconcile model applies on the line
+        self.assertNotIn("partner_id", not_applicable)
+        self.assertNotIn("partner_id", not_matching)
+
+    def test_prefetch_reconcile_mapping_journal(self):
+        other_journal = self.company_data["default_journal_bank"].copy()
+        for journal, payment_ref_regex in (
+            (self.journal, "^SPD"),
+            (other_journal, "^OTH"),
+        ):
+            self.env["account.reconcile.model"].create(
+                {
+                    "name": "Partner mapping",
+                    "rule_type": "invoice_matching",
+                    "match_journal_ids": [Command.set(journal.ids)],
+                    "partner_mapping_line_ids": [
+                        Command.create(
+                            {
+                                "partner_id": self.partner.id,
+                                "payment_ref_regex": payment_ref_regex,
+                            }
+                        )
+                    ],
+                }
+            )
+        same_journal, not_applicable = self._complete_transactions(
+            [
+                {"payment_ref": "SPD 1", "amount": 100},
+                {"payment_ref": "OTH 1", "amount": 100},
+            ]
+        )
+        self.assertEqual(same_journal["partner_id"], self.partner.id)
+        # The models restricted on other journals are not used
+        self.assertNotIn("partner_id", not_applicable)
+
+    def test_prefetch_invoice_reference(self):
+        invoice = self.init_invoice(
+            "out_invoice", partner=self.partner, amounts=[100], post=True
+        )
+        # The partner is only set from the invoice references when enabled
+        (disabled,) = self._complete_transactions(
+            [{"payment_ref": invoice.name, "amount": 100}]
+        )
+        self.assertNotIn("partner_id", disabled)
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_statement_import_file_reconcile_oca.partner_from_reference", True
+        )
+        other_partner = self.env["res.partner"].create({"name": "Other Partner"})
+        for partner in (self.partner, other_partner):
+            self.init_invoice(
+                "out_invoice", partner=partner, amounts=[100], post=True
+            ).ref = "SHARED REF"
+        by_name, by_ref, shared = self._complete_transactions(
+            [
+                {"payment_ref": invoice.name, "amount": 100},
+                {"payment_ref": "Transfer", "ref": invoice.name, "amount": 100},
+                {"payment_ref": "SHARED REF", "amount": 100},
+            ]
+        )
+        self.assertEqual(by_name["partner_id"], self.partner.id)
+        self.assertEqual(by_ref["partner_id"], self.partner.id)
+        # The references of the open items of several partners are ambiguous
+        self.assertNotIn("partner_id", shared)
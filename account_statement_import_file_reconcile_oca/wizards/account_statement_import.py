@@ -8,6 +8,21 @@ from odoo import models
 class AccountStatementImport(models.TransientModel):
     _inherit = "account.statement.import"
 
+    def _import_file(self):
+        """When the statement lines are auto reconciled on creation, reconcile
+        the lines of the whole file in a single stage once they are all created,
+        instead of chunk by chunk."""
+        st_line_model = self.env["account.bank.statement.line"]
+        if not st_line_model._is_auto_reconcile_on_create():
+            return super()._import_file()
+        result = super(
+            AccountStatementImport, self.with_context(auto_reconcile_on_create=False)
+        )._import_file()
+        self.env["account.bank.statement"].browse(
+            result["statement_ids"]
+        ).line_ids._auto_reconcile()
+        return result
+
     def import_file_and_reconcile_button(self):
         """Process the file chosen in the wizard, create bank statement(s)
         and jump directly to the reconciliation widget"""
@@ -1,12 +1,12 @@
 {
     "name": "Delivery Custom",
-    "version": "18.0.1.15.0",
+    "version": "18.0.1.16.0",
     "summary": "Extend stock pickings with shipping workflow and fields",
     "category": "Inventory/Delivery",
     "author": "Your Company",
     "website": "https://example.com",
     "license": "LGPL-3",
-    "depends": ["stock", "contacts", "account", "web"],
+    "depends": ["stock", "contacts", "account", "web", "webhook_security"],
     "data": [
         "security/ir.model.access.csv",
         "views/stock_picking_views.xml",
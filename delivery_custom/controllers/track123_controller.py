@@ -1,11 +1,12 @@
-import json
-import logging
 import hashlib
 import hmac
+import logging
 
 from odoo import http
 from odoo.http import request
 
+from odoo.addons.webhook_security.models.webhook_security import DUPLICATE
+
 _logger = logging.getLogger(__name__)
 
 
@@ -14,6 +15,15 @@ class Track123Controller(http.Controller):
     def _verify_webhook_signature(self, webhook_data):
         """Verify Track123 webhook signature for security"""
         try:
+            security = request.env['webhook.security'].sudo()
+            # Cached, refreshed when a system parameter changes
+            config = security._get_webhook_config('track123')
+
+            real_ip = security._get_request_ip(request.httprequest)
+            if not security._check_ip(config, real_ip):
+                _logger.error("Forbidden IP for Track123 webhook: %s", real_ip)
+                return False
+
             verify_info = webhook_data.get('verify', {})
             received_signature = verify_info.get('signature')
             timestamp = verify_info.get('timestamp')
@@ -22,27 +32,35 @@ class Track123Controller(http.Controller):
                 _logger.error("Missing signature or timestamp in webhook data")
                 return False
             
-            # Get API key from system parameters
-            api_key = request.env['ir.config_parameter'].sudo().get_param('track123.api_key')
-            if not api_key:
+            if not config.secret:
                 _logger.error("Track123 API key not configured")
                 return False
             
-            # Generate expected signature
             # According to Track123 docs: SHA256 with API key and timestamp
-            expected_signature = hashlib.sha256((api_key + timestamp).encode('utf-8')).hexdigest()
-            
-            # Compare signatures
-            if received_signature != expected_signature:
-                _logger.error(f"Webhook signature verification failed. Expected: {expected_signature}, Received: {received_signature}")
+            expected_signature = hashlib.sha256((config.secret + str(timestamp)).encode('utf-8')).hexdigest()
+            if not hmac.compare_digest(expected_signature, str(received_signature).lower()):
+                _logger.error("Webhook signature verification failed")
                 return False
-            
+
             return True
             
         except Exception as e:
             _logger.error(f"Error verifying webhook signature: {e}")
             return False
 
+    def _check_webhook_replay(self, webhook_data):
+        """Check the timestamp and the nonce of a webhook whose signature is
+        verified, see `webhook.security._check_replay`"""
+        security = request.env['webhook.security'].sudo()
+        config = security._get_webhook_config('track123')
+        verify_info = webhook_data.get('verify', {})
+        # The signature does not cover the body: the nonce is made of both
+        body_digest = hashlib.sha256(request.httprequest.get_data()).hexdigest()
+        return security._check_replay(
+            'track123', config, verify_info.get('timestamp'),
+            f"{verify_info.get('signature')}:{body_digest}",
+        )
+
     @http.route('/delivery_custom/track123/webhook', type='json', auth='public', methods=['POST'], csrf=False)
     def track123_webhook(self, **kwargs):
         """Handle Track123 webhook notifications"""
@@ -58,6 +76,15 @@ class Track123Controller(http.Controller):
             if not self._verify_webhook_signature(webhook_data):
                 _logger.error("Webhook signature verification failed")
                 return {'status': 'error', 'message': 'Invalid signature'}
+
+            # Retries of an accepted webhook are acknowledged without processing
+            replay = self._check_webhook_replay(webhook_data)
+            if replay == DUPLICATE:
+                _logger.info("Duplicate Track123 webhook acknowledged")
+                return {'status': 'success', 'message': 'Duplicate webhook'}
+            if replay:
+                _logger.error("Track123 webhook rejected: %s", replay)
+                return {'status': 'error', 'message': 'Invalid signature'}
             
             # Process the webhook data
             stock_picking = request.env['stock.picking']
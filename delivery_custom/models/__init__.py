@@ -1,2 +1,3 @@
 from . import stock_picking
 from . import account_move
+from . import webhook_security
@@ -0,0 +1,15 @@
+from odoo import api, models
+
+
+class WebhookSecurity(models.AbstractModel):
+    _inherit = "webhook.security"
+
+    @api.model
+    def _get_webhook_providers(self):
+        providers = super()._get_webhook_providers()
+        providers["track123"] = {
+            "secret": "track123.api_key",
+            "allowed_ips": "track123.allowed_ips",
+            "timestamp_tolerance": "track123.timestamp_tolerance",
+        }
+        return providers
@@ -1,7 +1,7 @@
 {
     "name": "Transaction Webhook",
     "summary": "Receive bank transactions from Casso webhook and create bank statement lines",
-    "version": "18.0.1.0.0",
+    "version": "18.0.1.3.0",
     "category": "Accounting/Banking",
     "author": "Your Company",
     "website": "",
@@ -10,10 +10,13 @@
         "account",
         "account_statement_base",
         "account_reconcile_oca",
+        "webhook_security",
     ],
     "data": [
         "security/ir.model.access.csv",
+        "data/ir_cron.xml",
         "views/casso_bank_map_views.xml",
+        "views/inbox_views.xml",
     ],
     "installable": True,
     "application": False,
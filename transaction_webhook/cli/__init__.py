@@ -0,0 +1 @@
+from . import casso_replay
@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import sys
+
+import odoo
+from odoo import SUPERUSER_ID, api
+from odoo.cli import Command
+from odoo.tools import config
+
+
+class CassoReplay(Command):
+    """Re-ingest an archive of Casso transactions (JSON Lines file or directory)"""
+
+    name = "casso_replay"
+
+    def run(self, cmdargs):
+        parser = argparse.ArgumentParser(
+            prog=f"{os.path.basename(sys.argv[0])} {self.name}",
+            description=self.__doc__,
+        )
+        parser.add_argument("path", help="JSON Lines file, or directory of *.jsonl/*.json files")
+        parser.add_argument("-c", "--config", dest="config", help="Odoo configuration file")
+        parser.add_argument("-d", "--database", dest="database", help="Database name")
+        parser.add_argument(
+            "--batch-size", type=int, default=1000, help="Transactions per batch (default 1000)"
+        )
+        parser.add_argument(
+            "--auto-reconcile",
+            action="store_true",
+            help="Auto reconcile the created lines instead of queuing them for pre-matching",
+        )
+        args = parser.parse_args(cmdargs)
+        if not os.path.exists(args.path):
+            parser.error(f"{args.path} does not exist")
+
+        odoo_args = []
+        if args.config:
+            odoo_args += ["-c", args.config]
+        if args.database:
+            odoo_args += ["-d", args.database]
+        config.parse_config(odoo_args)
+        dbname = config["db_name"]
+        if not dbname or "," in dbname:
+            parser.error("a single database is required (-d)")
+
+        registry = odoo.modules.registry.Registry(dbname)
+        with registry.cursor() as cr:
+            env = api.Environment(cr, SUPERUSER_ID, {})
+            report = env["transaction.webhook.service"].replay_casso_archive(
+                args.path,
+                batch_size=args.batch_size,
+                auto_reconcile=args.auto_reconcile,
+                commit=True,
+            )
+        print(json.dumps(report, indent=2))
+        if report["invalid"]:
+            print(
+                f"{report['invalid']} invalid JSON lines were skipped, see the log",
+                file=sys.stderr,
+            )
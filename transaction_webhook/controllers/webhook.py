@@ -1,19 +1,12 @@
 import json
-import hmac
-import hashlib
 import logging
-from datetime import datetime
 
 from odoo import http
 from odoo.http import request
 
-_logger = logging.getLogger(__name__)
-
+from odoo.addons.webhook_security.models.webhook_security import DUPLICATE
 
-def _get_param(key, default=None):
-    return (
-        request.env["ir.config_parameter"].sudo().get_param(key, default)
-    )
+_logger = logging.getLogger(__name__)
 
 
 class CassoWebhookController(http.Controller):
@@ -25,25 +18,22 @@ class CassoWebhookController(http.Controller):
         csrf=False,
     )
     def casso_webhook(self, **kwargs):
-        debug_mode = _get_param("transaction_webhook.debug", "0") in ("1", "true", "True")
+        security = request.env["webhook.security"].sudo()
+        # Cached, refreshed when a system parameter changes
+        config = security._get_webhook_config("casso")
+        debug_mode = config.debug
         # Webhook V2 only: no token auth, signature-based only
 
-        # Optional IP allowlist
-        allow_ips = _get_param("transaction_webhook.allowed_ips") or ""
-        if allow_ips.strip():
-            allowed = {ip.strip() for ip in allow_ips.split(",") if ip.strip()}
-            real_ip = (
-                request.httprequest.headers.get("X-Forwarded-For", "").split(",")[0].strip()
-                or request.httprequest.remote_addr
+        # Optional IP allowlist (addresses or networks)
+        real_ip = security._get_request_ip(request.httprequest)
+        if not security._check_ip(config, real_ip):
+            if debug_mode:
+                _logger.info("[transaction_webhook] Forbidden IP: %s; allowed=%s", real_ip, config.allowed_networks)
+            return request.make_response(
+                json.dumps({"error": 1, "message": "Forbidden IP", **({"ip": real_ip} if debug_mode else {})}),
+                headers=[("Content-Type", "application/json")],
+                status=403,
             )
-            if real_ip not in allowed:
-                if debug_mode:
-                    _logger.info("[transaction_webhook] Forbidden IP: %s; allowed=%s", real_ip, allowed)
-                return request.make_response(
-                    json.dumps({"error": 1, "message": "Forbidden IP", **({"ip": real_ip} if debug_mode else {})}),
-                    headers=[("Content-Type", "application/json")],
-                    status=403,
-                )
 
         # Parse JSON body
         try:
@@ -62,26 +52,25 @@ class CassoWebhookController(http.Controller):
             )
 
         # HMAC signature verification (required for V2)
-        secret = _get_param("transaction_webhook.hmac_secret")
         signature = request.httprequest.headers.get("X-Casso-Signature")
         signature_ok = False
-        if secret:
-            raw_bytes = raw or b""
+        duplicate = False
+        reason = "signature_invalid_or_missing"
+        if config.secret:
             if not signature:
                 if debug_mode:
                     _logger.info("[transaction_webhook] Missing X-Casso-Signature while secret configured")
             else:
                 try:
-                    # Webhook V2: HMAC-SHA512 hex
+                    # Webhook V2: HMAC-SHA512 hex of the canonical JSON of the full
+                    # payload (sorted keys, recursive)
                     sig_str = signature.strip()
                     provided_sig = None
                     ts = None
-                    # Build canonical JSON of full payload with sorted keys (recursive)
-                    canonical = json.dumps(payload, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+                    prefix = b""
                     if sig_str.lower().startswith("sha512="):
                         # Format: sha512=<hex>; base = canonical JSON
                         provided_sig = sig_str.split("=", 1)[1].strip()
-                        base = canonical.encode("utf-8")
                     else:
                         # Format: t=<ts>,v1=<hex>; base = f"{t}.{canonical JSON}"
                         parts = dict(
@@ -90,15 +79,25 @@ class CassoWebhookController(http.Controller):
                         )
                         provided_sig = parts.get("v1")
                         ts = parts.get("t")
-                        base = (ts + "." + canonical).encode("utf-8") if (provided_sig and ts) else None
+                        prefix = (ts + ".").encode("utf-8") if ts else None
 
-                    if provided_sig and base is not None:
-                        digest = hmac.new(secret.encode("utf-8"), base, hashlib.sha512).hexdigest()
-                        signature_ok = hmac.compare_digest(digest.lower(), provided_sig.lower())
+                    if provided_sig and prefix is not None:
+                        signature_ok = security._verify_signature(
+                            config, provided_sig, raw=raw, payload=payload, prefix=prefix
+                        )
+                    if signature_ok and ts:
+                        # Timestamped signatures: reject the stale ones, the
+                        # retries of an accepted request are acknowledged only
+                        replay = security._check_replay("casso", config, ts, provided_sig.lower())
+                        if replay == DUPLICATE:
+                            duplicate = True
+                        elif replay:
+                            signature_ok = False
+                            reason = replay
                     if debug_mode:
                         _logger.info(
-                            "[transaction_webhook] Signature check: has_ts=%s, base_len=%s, ok=%s",
-                            bool(ts), len(base), signature_ok,
+                            "[transaction_webhook] Signature check: has_ts=%s, ok=%s, reason=%s",
+                            bool(ts), signature_ok, None if signature_ok else reason,
                         )
                 except Exception:
                     if debug_mode:
@@ -107,15 +106,31 @@ class CassoWebhookController(http.Controller):
         if not signature_ok:
             payload = {"error": 1, "message": "Unauthorized"}
             if debug_mode:
-                payload["reason"] = "signature_invalid_or_missing"
+                payload["reason"] = reason
             return request.make_response(
                 json.dumps(payload), headers=[("Content-Type", "application/json")], status=401
             )
 
-        # Normalize to a single transaction dict (V2 uses an object in data)
-        data = payload.get("data", None)
+        if duplicate:
+            # Already accepted: answer as before without storing it twice
+            if debug_mode:
+                _logger.info("[transaction_webhook] Duplicate delivery acknowledged")
+            response_body = {"error": 0, "duplicate": True, "results": []}
+            if config.strict_mode:
+                response_body["success"] = True
+            return request.make_response(
+                json.dumps(response_body),
+                headers=[("Content-Type", "application/json")],
+                status=200,
+            )
+
+        # Normalize to a list of transactions: V2 uses an object in data, array
+        # payloads (backfill/sync exports) a list in data or at the top level
+        data = payload.get("data", None) if isinstance(payload, dict) else payload
         if isinstance(data, dict):
             tx_list = [data]
+        elif isinstance(data, list) and data:
+            tx_list = data
         else:
             return request.make_response(
                 json.dumps({"error": 1, "message": "Unsupported payload"}),
@@ -123,24 +138,17 @@ class CassoWebhookController(http.Controller):
                 status=422,
             )
 
-        service = request.env["transaction.webhook.service"].sudo()
-        results = []
-        for tx in tx_list:
-            try:
-                line, created = service.process_casso_payload(tx)
-                results.append({
-                    "casso_id": line.x_tw_casso_id,
-                    "reference": line.x_tw_tid,
-                    "line_id": line.id,
-                    "created": bool(created),
-                })
-            except Exception as e:  # noqa: BLE001
-                # Keep processing the rest, but report errors
-                results.append({"error": 1, "message": str(e)})
+        # Only store the transactions: the statement lines are created by the
+        # inbox cron, so that Casso gets its answer without waiting for them
+        inbox = request.env["transaction.webhook.inbox"].sudo()
+        results = inbox._enqueue_casso_payloads(tx_list)
+        for tx, result in zip(tx_list, results):
+            if not result.get("error"):
+                result["reference"] = tx.get("reference")
 
         response_body = {"error": 0, "results": results}
         # For Casso Strict Mode compatibility, include success flag if enabled via param
-        if _get_param("transaction_webhook.strict_mode", "0") in ("1", "true", "True"):
+        if config.strict_mode:
             response_body["success"] = True
         return request.make_response(
             json.dumps(response_body),
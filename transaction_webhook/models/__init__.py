@@ -3,3 +3,6 @@ from . import processor
 from . import statement_line
 from . import res_config_settings
 
+from . import inbox
+from . import account_journal
+from . import webhook_security
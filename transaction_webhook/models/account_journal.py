@@ -0,0 +1,42 @@
+from odoo import api, models
+
+from odoo.addons.account_reconcile_model_oca.cache_stamp import bump_stamp
+
+from .casso_map import JOURNAL_ROUTES_STAMP_SEQUENCE
+
+# Fields of the journals and of their bank accounts used by the journal routing
+# table of transaction.webhook.service
+JOURNAL_ROUTING_FIELDS = {"type", "active", "bank_account_id", "company_id"}
+
+
+class AccountJournal(models.Model):
+    _inherit = "account.journal"
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        journals = super().create(vals_list)
+        if journals.filtered(lambda journal: journal.type == "bank"):
+            bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return journals
+
+    def write(self, vals):
+        res = super().write(vals)
+        if JOURNAL_ROUTING_FIELDS.intersection(vals):
+            bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return res
+
+
+class ResPartnerBank(models.Model):
+    _inherit = "res.partner.bank"
+
+    def write(self, vals):
+        if "acc_number" in vals and self.env["account.journal"].sudo().search_count(
+            [("bank_account_id", "in", self.ids)], limit=1
+        ):
+            bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return super().write(vals)
@@ -1,5 +1,14 @@
 from odoo import api, fields, models
 
+from odoo.addons.account_reconcile_model_oca.cache_stamp import (
+    bump_stamp,
+    create_stamp_sequence,
+)
+
+# Sequence whose value is part of the key of the journal routing table cached by
+# transaction.webhook.service
+JOURNAL_ROUTES_STAMP_SEQUENCE = "transaction_webhook_journal_routes_stamp_seq"
+
 
 class TransactionWebhookBankMap(models.Model):
     _name = "transaction.webhook.bank.map"
@@ -34,3 +43,24 @@ class TransactionWebhookBankMap(models.Model):
         )
     ]
 
+    def init(self):
+        super().init()
+        create_stamp_sequence(self._cr, JOURNAL_ROUTES_STAMP_SEQUENCE)
+
+    # The journal routing table of transaction.webhook.service is cached
+    @api.model_create_multi
+    def create(self, vals_list):
+        res = super().create(vals_list)
+        bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return res
+
+    def write(self, vals):
+        res = super().write(vals)
+        bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        bump_stamp(self.env, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        return res
+
@@ -0,0 +1,171 @@
+import json
+import logging
+from datetime import timedelta
+
+from odoo import _, api, fields, models
+from odoo.exceptions import UserError
+from odoo.tools import SQL
+
+_logger = logging.getLogger(__name__)
+
+
+class TransactionWebhookInbox(models.Model):
+    """Durable inbox of the Casso transactions received by the webhook.
+
+    The controller only stores the raw transaction, keyed by its Casso id, so
+    that the webhook answers right away. The inbox is drained by a cron that
+    creates the statement lines, retrying the failed transactions with an
+    exponential backoff until they are moved to the dead letter state.
+    """
+
+    _name = "transaction.webhook.inbox"
+    _inherit = "reconcile.queue.mixin"
+    _description = "Transaction Webhook Inbox"
+    _order = "id"
+    _rec_name = "casso_id"
+    _queue_param_prefix = "transaction_webhook.inbox_"
+    _queue_defaults = {
+        "batch_size": 50,
+        "limit": 1000,
+        "retry_delay": 60,
+        "max_attempts": 8,
+    }
+    _queue_failed_state = "dead"
+
+    casso_id = fields.Char(string="Casso Transaction ID", required=True, readonly=True)
+    payload = fields.Text(required=True, readonly=True, help="Raw Casso transaction (JSON)")
+    state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("done", "Done"),
+            ("dead", "Dead Letter"),
+        ],
+        default="pending",
+        required=True,
+        index=True,
+        readonly=True,
+    )
+    statement_line_id = fields.Many2one("account.bank.statement.line", readonly=True, ondelete="set null")
+
+    _sql_constraints = [
+        (
+            "uniq_casso_id",
+            "unique(casso_id)",
+            "A Casso transaction with this ID is already in the inbox.",
+        )
+    ]
+
+    @api.model
+    def _enqueue_casso_payload(self, tx):
+        """Store a Casso Webhook V2 transaction in the inbox.
+
+        The Casso retries of an already received transaction are ignored.
+        :return: (casso_id, queued), queued being False for a retry.
+        """
+        result = self._enqueue_casso_payloads([tx])[0]
+        if result.get("error"):
+            raise UserError(result["message"])
+        return result["casso_id"], result["queued"]
+
+    @api.model
+    def _enqueue_casso_payloads(self, tx_list):
+        """Store a list of Casso Webhook V2 transactions in the inbox with a
+        single query, ignoring the ones already received.
+        :return: One dict per transaction, with either `casso_id` and `queued`,
+        or `error` and `message`.
+        """
+        results = []
+        payloads = {}
+        for tx in tx_list:
+            casso_id = (tx or {}).get("id") if isinstance(tx, dict) else None
+            if casso_id is None:
+                results.append(
+                    {"error": 1, "message": _("Missing Casso transaction id (data.id)")}
+                )
+                continue
+            casso_id = str(casso_id)
+            results.append({"casso_id": casso_id})
+            payloads.setdefault(casso_id, json.dumps(tx))
+        if not payloads:
+            return results
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO transaction_webhook_inbox (
+                    casso_id, payload, state, attempts, create_uid, create_date,
+                    write_uid, write_date
+                )
+                SELECT tx.casso_id, tx.payload, 'pending', 0, %(uid)s,
+                    NOW() AT TIME ZONE 'UTC', %(uid)s, NOW() AT TIME ZONE 'UTC'
+                FROM unnest(%(casso_ids)s::varchar[], %(payloads)s::text[])
+                    AS tx(casso_id, payload)
+                ON CONFLICT (casso_id) DO NOTHING
+                RETURNING casso_id
+                """,
+                casso_ids=list(payloads),
+                payloads=list(payloads.values()),
+                uid=self.env.uid,
+            )
+        )
+        queued = {row[0] for row in self.env.cr.fetchall()}
+        for result in results:
+            if "casso_id" in result:
+                # Only the first occurrence of a transaction is queued
+                result["queued"] = result["casso_id"] in queued
+                queued.discard(result["casso_id"])
+        if any(result.get("queued") for result in results):
+            self.env.ref("transaction_webhook.ir_cron_process_inbox").sudo()._trigger()
+        return results
+
+    @api.model
+    def _cron_process_inbox(self, batch_size=None, limit=None):
+        """Process the pending transactions in batches of `batch_size`,
+        committing after each batch, up to `limit` transactions per run."""
+        return self._process_queue(batch_size, limit)
+
+    def _process_batch(self):
+        """Create the statement lines of the transactions."""
+        results = self.env["transaction.webhook.service"].sudo().process_casso_batch(
+            [json.loads(message.payload) for message in self]
+        )
+        for message, result in zip(self, results):
+            if result.get("error"):
+                message._set_failed(result["message"])
+            else:
+                message._set_done(
+                    {
+                        "attempts": message.attempts + 1,
+                        "statement_line_id": result["line"].id,
+                    }
+                )
+
+    def _set_failed(self, error):
+        _logger.warning(
+            "[transaction_webhook] Casso transaction %s failed (attempt %s/%s): %s",
+            self.casso_id,
+            self.attempts + 1,
+            self._get_queue_param("max_attempts"),
+            error,
+        )
+        return super()._set_failed(error)
+
+    def action_retry(self):
+        """Queue the dead letter transactions again."""
+        self.filtered(lambda message: message.state == "dead").write(
+            {
+                "state": "pending",
+                "attempts": 0,
+                "next_attempt_date": False,
+                "date_done": False,
+            }
+        )
+        self.env.ref("transaction_webhook.ir_cron_process_inbox").sudo()._trigger()
+
+    @api.autovacuum
+    def _gc_done_messages(self):
+        self.search(
+            [
+                ("state", "=", "done"),
+                ("date_done", "<", fields.Datetime.now() - timedelta(days=30)),
+            ]
+        ).unlink()
@@ -1,7 +1,18 @@
+import json
+import logging
+import os
+import time
 from datetime import datetime
 
-from odoo import _, api, fields, models
+from odoo import _, api, fields, models, tools
 from odoo.exceptions import UserError
+from odoo.tools import split_every
+
+from odoo.addons.account_reconcile_model_oca.cache_stamp import get_stamp
+
+from .casso_map import JOURNAL_ROUTES_STAMP_SEQUENCE
+
+_logger = logging.getLogger(__name__)
 
 
 class TransactionWebhookService(models.AbstractModel):
@@ -16,8 +27,190 @@ class TransactionWebhookService(models.AbstractModel):
           accountNumber, bankName, bankAbbreviation, counterAccountNumber, virtualAccountNumber, ...
         - Idempotent: if line exists (by Casso id) return it with created=False
         """
+        result = self.process_casso_batch([tx])[0]
+        if result.get("error"):
+            raise UserError(result["message"])
+        return result["line"], result["created"]
+
+    def process_casso_batch(self, tx_list):
+        """Process a list of Casso Webhook V2 transactions, as sent in array payloads
+        or by backfill/sync exports, and return one result per transaction.
+
+        The journals of all the account identifiers are resolved at once, the
+        existing lines are searched with a single query and the new lines are
+        created with a single create() call.
+        Each result is a dict with either `line` and `created`, or `error` and `message`.
+        """
+        self = self.sudo()
+        results = [None] * len(tx_list)
+        parsed = {}
+        for index, tx in enumerate(tx_list):
+            try:
+                parsed[index] = self._parse_casso_tx(tx)
+            except (UserError, ValueError, TypeError) as e:
+                # A malformed transaction must not fail the whole batch
+                results[index] = {"error": 1, "message": str(e)}
+
+        journals = self._resolve_journals(
+            {vals["x_tw_account_identifier"] for vals in parsed.values()}
+        )
+        default_journal = None
+        for index, vals in list(parsed.items()):
+            journal = journals.get(vals["x_tw_account_identifier"])
+            if not journal:
+                try:
+                    if default_journal is None:
+                        default_journal = self._get_default_journal()
+                    journal = default_journal
+                except UserError as e:
+                    results[index] = {"error": 1, "message": str(e)}
+                    del parsed[index]
+                    continue
+            vals["journal_id"] = journal.id
+
+        # Idempotency: find existing lines by Casso id
+        Line = self.env["account.bank.statement.line"]
+        existing = {
+            line.x_tw_casso_id: line
+            for line in Line.search(
+                [
+                    (
+                        "x_tw_casso_id",
+                        "in",
+                        list({vals["x_tw_casso_id"] for vals in parsed.values()}),
+                    )
+                ]
+            )
+        }
+        to_create = {}
+        for index, vals in parsed.items():
+            casso_id = vals["x_tw_casso_id"]
+            if casso_id in existing:
+                results[index] = {"line": existing[casso_id], "created": False}
+            elif casso_id in to_create:
+                # Same transaction twice in the batch
+                results[index] = {"casso_id": casso_id, "created": False}
+            else:
+                to_create[casso_id] = (index, vals)
+
+        # Create bank statement lines (attach to journal; statement assignment handled by Odoo)
+        lines = Line.create([vals for _index, vals in to_create.values()])
+        created = {}
+        for (index, _vals), line in zip(to_create.values(), lines):
+            results[index] = {"line": line, "created": True}
+            created[line.x_tw_casso_id] = line
+        for result in results:
+            if "casso_id" in result:
+                result["line"] = created[result.pop("casso_id")]
+        return results
+
+    def replay_casso_archive(self, path, batch_size=1000, auto_reconcile=False, commit=None):
+        """Re-ingest an archive of Casso transactions, e.g. the ones missed while
+        the Odoo worker was down.
+
+        `path` is a JSON Lines file or a directory of them (*.jsonl, *.json),
+        each line holding a webhook body (`{"data": {...}}` or `{"data": [...]}`),
+        a list of transactions or a single transaction. The archive is streamed
+        through `process_casso_batch` in batches of `batch_size` transactions:
+        the lines already created are skipped with one query per batch, and the
+        memory used does not depend on the size of the archive.
+
+        The auto reconciliation is deferred to the pre-matching queue unless
+        `auto_reconcile` is set. Each batch is committed, except while testing
+        or when `commit` is False.
+        :return: A dict with the figures of the replay.
+        """
         self = self.sudo()
-        tx = dict(tx or {})
+        if commit is None:
+            commit = not tools.config["test_enable"]
+        service = self.with_context(auto_reconcile_on_create=auto_reconcile)
+        report = {"read": 0, "created": 0, "skipped": 0, "errors": 0, "invalid": 0}
+        start = time.monotonic()
+        for batch in split_every(batch_size, self._iter_casso_archive(path, report), list):
+            results = service._replay_casso_batch(batch)
+            for result in results:
+                if result.get("error"):
+                    report["errors"] += 1
+                elif result["created"]:
+                    report["created"] += 1
+                else:
+                    report["skipped"] += 1
+            report["read"] += len(batch)
+            if commit:
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+            # Do not keep the records of the previous batches in memory
+            self.env.invalidate_all()
+            elapsed = time.monotonic() - start
+            _logger.info(
+                "[transaction_webhook] Replay: %s transactions read (%s created, %s skipped, %s errors, %s invalid lines) in %.1fs (%.0f/s)",
+                report["read"],
+                report["created"],
+                report["skipped"],
+                report["errors"],
+                report["invalid"],
+                elapsed,
+                report["read"] / elapsed if elapsed else 0.0,
+            )
+        report["duration"] = time.monotonic() - start
+        report["rate"] = report["read"] / report["duration"] if report["duration"] else 0.0
+        return report
+
+    def _replay_casso_batch(self, tx_list):
+        """Process a batch of the replay, one transaction at a time when the
+        batch fails as a whole."""
+        try:
+            with self.env.cr.savepoint():
+                return self.process_casso_batch(tx_list)
+        except Exception as e:  # noqa: BLE001
+            if len(tx_list) == 1:
+                _logger.warning("[transaction_webhook] Replay of %s failed: %s", tx_list[0], e)
+                return [{"error": 1, "message": str(e)}]
+        results = []
+        for tx in tx_list:
+            results += self._replay_casso_batch([tx])
+        return results
+
+    @api.model
+    def _iter_casso_archive(self, path, report=None):
+        """Yield the Casso transactions of a JSON Lines file or of the JSON Lines
+        files of a directory, in the order of the file names. The lines that are
+        not valid JSON are skipped and counted in the `invalid` key of `report`."""
+        if os.path.isdir(path):
+            paths = [
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith((".jsonl", ".json"))
+            ]
+        else:
+            paths = [path]
+        for file_path in paths:
+            with open(file_path, encoding="utf-8") as archive:
+                for number, line in enumerate(archive, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        _logger.warning(
+                            "[transaction_webhook] Replay: invalid JSON at %s:%s", file_path, number
+                        )
+                        if report is not None:
+                            report["invalid"] += 1
+                        continue
+                    if isinstance(record, dict) and "data" in record:
+                        record = record["data"]
+                    if isinstance(record, list):
+                        yield from record
+                    else:
+                        yield record
+
+    def _parse_casso_tx(self, tx: dict):
+        """Validate a Casso Webhook V2 transaction and return the values of its
+        statement line, without the journal."""
+        tx = tx or {}
+        if not isinstance(tx, dict):
+            raise UserError(_("Invalid Casso transaction: %s", tx))
 
         # V2 Casso transaction id (integer or string)
         casso_id = tx.get("id")
@@ -29,6 +222,10 @@ class TransactionWebhookService(models.AbstractModel):
         amount = tx.get("amount")
         if amount is None:
             raise UserError(_("Missing amount"))
+        try:
+            amount = float(amount)
+        except (TypeError, ValueError):
+            raise UserError(_("Invalid amount: %s", amount)) from None
 
         # Date/time
         when = tx.get("transactionDateTime")
@@ -48,41 +245,10 @@ class TransactionWebhookService(models.AbstractModel):
         virtual_account = tx.get("virtualAccountNumber") or tx.get("virtualAccount") or ""
         reference = tx.get("reference") or ""
 
-        # Resolve journal (by mapping first, then fallback to journal bank account)
-        journal = self._resolve_journal(account_identifier)
-        if not journal:
-            # Fallback to configured default journal id
-            default_journal_id = (
-                self.env["ir.config_parameter"]
-                .sudo()
-                .get_param("transaction_webhook.default_journal_id")
-            )
-            if default_journal_id:
-                journal = self.env["account.journal"].browse(int(default_journal_id))
-                if journal and journal.type != "bank":
-                    raise UserError(
-                        _("Configured default journal must be of type 'bank'.")
-                    )
-            if not journal:
-                raise UserError(
-                    _(
-                        "Cannot resolve bank journal. Set system parameter 'transaction_webhook.default_journal_id' to a Bank journal ID."
-                    )
-                )
-
-        # Idempotency: find existing line by Casso id
-        existing = self.env["account.bank.statement.line"].search(
-            [("x_tw_casso_id", "=", casso_id)], limit=1
-        )
-        if existing:
-            return existing, False
-
-        # Create bank statement line (attach to journal; statement assignment handled by Odoo)
-        vals = {
-            "journal_id": journal.id,
+        return {
             "date": date,
             "payment_ref": description or reference or casso_id,
-            "amount": float(amount),
+            "amount": amount,
             # Webhook metadata
             "x_tw_source": "casso",
             "x_tw_tid": reference or False,
@@ -95,42 +261,89 @@ class TransactionWebhookService(models.AbstractModel):
             "x_tw_account_number": account_number,
             "x_tw_bank_sub_acc_id": bank_sub_acc_id,
         }
-        line = self.env["account.bank.statement.line"].create(vals)
-        return line, True
 
     # Helpers
-    def _resolve_journal(self, account_identifier: str):
-        Map = self.env["transaction.webhook.bank.map"]
-        # Try company of env first, then any
-        mapping = Map.search(
-            [
-                ("external_account_identifier", "=", account_identifier),
-                ("active", "=", True),
-                ("company_id", "=", self.env.company.id),
-            ],
-            limit=1,
+    def _get_default_journal(self):
+        """Return the configured default journal, used when the account
+        identifier cannot be resolved."""
+        journal_id, journal_type = self._get_default_journal_route(
+            get_stamp(self._cr, JOURNAL_ROUTES_STAMP_SEQUENCE)
         )
-        if not mapping:
-            mapping = Map.search(
-                [
-                    ("external_account_identifier", "=", account_identifier),
-                    ("active", "=", True),
-                ],
-                limit=1,
+        if journal_id and journal_type != "bank":
+            raise UserError(
+                _("Configured default journal must be of type 'bank'.")
+            )
+        if not journal_id:
+            raise UserError(
+                _(
+                    "Cannot resolve bank journal. Set system parameter 'transaction_webhook.default_journal_id' to a Bank journal ID."
+                )
             )
-        if mapping:
-            return mapping.journal_id
+        return self.env["account.journal"].browse(journal_id)
+
+    @tools.ormcache("stamp")
+    def _get_default_journal_route(self, stamp):
+        """Return the id and the type of the configured default journal, (False,
+        False) when there is none. Cached until the parameters or the journals
+        change.
+        :param stamp: The current stamp of the journal routes, see
+          JOURNAL_ROUTES_STAMP_SEQUENCE.
+        """
+        default_journal_id = (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("transaction_webhook.default_journal_id")
+        )
+        if default_journal_id:
+            journal = self.env["account.journal"].sudo().browse(int(default_journal_id)).exists()
+            if journal:
+                return journal.id, journal.type
+        return False, False
+
+    def _resolve_journal(self, account_identifier: str):
+        return self._resolve_journals({account_identifier}).get(
+            account_identifier, self.env["account.journal"]
+        )
 
-        # Fallback: find bank journal with matching bank account number
+    def _resolve_journals(self, account_identifiers):
+        """Return a dict mapping the account identifiers that can be resolved
+        to their bank journal, using the routing table of the current company."""
+        routes = self._get_journal_routes(
+            self.env.company.id, get_stamp(self._cr, JOURNAL_ROUTES_STAMP_SEQUENCE)
+        )
         Journal = self.env["account.journal"]
-        journal = Journal.search(
-            [
-                ("type", "=", "bank"),
-                ("bank_account_id.acc_number", "=", account_identifier),
-            ],
-            limit=1,
+        return {
+            identifier: Journal.browse(routes[identifier])
+            for identifier in account_identifiers
+            if identifier in routes
+        }
+
+    @tools.ormcache("company_id", "stamp")
+    def _get_journal_routes(self, company_id, stamp):
+        """Return the routing table of the account identifiers: a dict mapping
+        each known identifier to its journal id, by mapping first, preferring
+        the mappings of `company_id`, then by the bank account of the journal.
+        Identifiers missing from the table cannot be resolved.
+
+        The table is cached until a mapping, a journal or a bank account number
+        changes, so routing a transaction does not query the database; it must
+        not be altered.
+        :param stamp: The current stamp of the journal routes, see
+          JOURNAL_ROUTES_STAMP_SEQUENCE.
+        """
+        routes = {}
+        mappings = self.env["transaction.webhook.bank.map"].sudo().search(
+            [("active", "=", True)], order="id"
         )
-        return journal
+        for mapping in mappings.sorted(lambda m: m.company_id.id != company_id):
+            routes.setdefault(mapping.external_account_identifier, mapping.journal_id.id)
+
+        # Fallback: bank journals by bank account number
+        for journal in self.env["account.journal"].sudo().search(
+            [("type", "=", "bank"), ("bank_account_id", "!=", False)], order="id"
+        ):
+            routes.setdefault(journal.bank_account_id.acc_number, journal.id)
+        return routes
 
     @api.model
     def _normalize_date(self, dt_str):
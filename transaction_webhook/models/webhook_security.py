@@ -0,0 +1,17 @@
+from odoo import api, models
+
+
+class WebhookSecurity(models.AbstractModel):
+    _inherit = "webhook.security"
+
+    @api.model
+    def _get_webhook_providers(self):
+        providers = super()._get_webhook_providers()
+        providers["casso"] = {
+            "secret": "transaction_webhook.hmac_secret",
+            "allowed_ips": "transaction_webhook.allowed_ips",
+            "debug": "transaction_webhook.debug",
+            "strict_mode": "transaction_webhook.strict_mode",
+            "timestamp_tolerance": "transaction_webhook.timestamp_tolerance",
+        }
+        return providers
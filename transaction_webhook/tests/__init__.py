@@ -0,0 +1,2 @@
+from . import test_inbox
+from . import test_replay
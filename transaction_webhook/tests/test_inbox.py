@@ -0,0 +1,69 @@
+import json
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestTransactionWebhookInbox(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.Inbox = cls.env["transaction.webhook.inbox"]
+        cls.env["ir.config_parameter"].sudo().set_param(
+            "transaction_webhook.inbox_max_attempts", 2
+        )
+
+    def _get_message(self, casso_id):
+        return self.Inbox.search([("casso_id", "=", casso_id)])
+
+    def test_enqueue_duplicates(self):
+        tx = {"id": 9000001, "amount": 1000, "accountNumber": "TW-TEST-1"}
+        results = self.Inbox._enqueue_casso_payloads(
+            [tx, dict(tx, amount=2000), {"amount": 500}]
+        )
+        self.assertEqual(results[0], {"casso_id": "9000001", "queued": True})
+        # The duplicate of the same batch is not queued again
+        self.assertEqual(results[1], {"casso_id": "9000001", "queued": False})
+        self.assertTrue(results[2].get("error"))
+        message = self._get_message("9000001")
+        self.assertEqual(len(message), 1)
+        self.assertEqual(message.state, "pending")
+        self.assertEqual(json.loads(message.payload)["amount"], 1000)
+        # A Casso retry of a received transaction is ignored
+        self.assertEqual(self.Inbox._enqueue_casso_payload(tx), ("9000001", False))
+        self.assertEqual(len(self._get_message("9000001")), 1)
+
+    def test_dead_letter_and_retry(self):
+        # The amount is missing, the transaction cannot be processed
+        self.Inbox._enqueue_casso_payload(
+            {"id": "TW-TEST-DEAD", "accountNumber": "TW-TEST-1"}
+        )
+        message = self._get_message("TW-TEST-DEAD")
+        message._process()
+        self.assertEqual(message.state, "pending")
+        self.assertEqual(message.attempts, 1)
+        self.assertTrue(message.next_attempt_date)
+        self.assertIn("amount", message.error)
+        message._process()
+        self.assertEqual(message.state, "dead")
+        self.assertEqual(message.attempts, 2)
+        # Dead letter transactions are not acquired by the cron anymore
+        self.assertNotIn(message, self.Inbox._acquire(100))
+        message.action_retry()
+        self.assertEqual(message.state, "pending")
+        self.assertEqual(message.attempts, 0)
+        self.assertFalse(message.next_attempt_date)
+        self.assertIn(message, self.Inbox._acquire(100))
+
+    def test_process_malformed_transactions(self):
+        results = self.env["transaction.webhook.service"].process_casso_batch(
+            [
+                {"id": "TW-TEST-AMOUNT", "amount": "abc", "accountNumber": "X"},
+                {"id": "TW-TEST-TYPE", "amount": [1], "accountNumber": "X"},
+                "TW-TEST-STR",
+                None,
+            ]
+        )
+        self.assertTrue(all(result.get("error") for result in results))
+        self.assertIn("abc", results[0]["message"])
+        self.assertIn("Missing Casso transaction id", results[3]["message"])
@@ -0,0 +1,24 @@
+import json
+import os
+import tempfile
+
+from odoo.tests import TransactionCase, tagged
+
+
+@tagged("post_install", "-at_install")
+class TestTransactionWebhookReplay(TransactionCase):
+    def test_replay_invalid_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "casso.jsonl")
+            with open(path, "w", encoding="utf-8") as archive:
+                archive.write("not json\n\n")
+                # The amount is missing, the transaction is read but fails
+                archive.write(json.dumps({"data": {"id": "TW-TEST-REPLAY"}}) + "\n")
+                archive.write('{"data": [\n')
+            report = self.env["transaction.webhook.service"].replay_casso_archive(
+                path, commit=False
+            )
+        self.assertEqual(report["read"], 1)
+        self.assertEqual(report["errors"], 1)
+        self.assertEqual(report["invalid"], 2)
+        self.assertEqual(report["created"], 0)
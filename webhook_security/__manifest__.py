@@ -0,0 +1,15 @@
+{
+    "name": "Webhook Security",
+    "summary": "Shared IP allowlist, HMAC and replay checks for incoming webhooks",
+    "version": "18.0.1.1.0",
+    "category": "Hidden/Tools",
+    "author": "Your Company",
+    "website": "",
+    "license": "LGPL-3",
+    "depends": ["base"],
+    "data": [
+        "security/ir.model.access.csv",
+    ],
+    "installable": True,
+    "application": False,
+}
@@ -0,0 +1,2 @@
+from . import webhook_security
+from . import webhook_security_nonce
@@ -0,0 +1,114 @@
+import hashlib
+import time
+from collections import namedtuple
+
+from odoo import api, models, tools
+
+from ..utils import (
+    ip_allowed,
+    parse_allowlist,
+    parse_timestamp,
+    verify_hmac,
+)
+
+TRUE_VALUES = ("1", "true", "True")
+
+# Result of `_check_replay` for a request already accepted
+DUPLICATE = "duplicate"
+
+WebhookConfig = namedtuple(
+    "WebhookConfig",
+    ["secret", "allowed_networks", "debug", "strict_mode", "timestamp_tolerance"],
+)
+
+
+class WebhookSecurity(models.AbstractModel):
+    """Verification of the incoming webhooks, shared by the controllers.
+
+    The configuration of each provider is read from system parameters once and
+    cached, the cache being cleared when a parameter changes.
+    """
+
+    _name = "webhook.security"
+    _description = "Webhook Security"
+
+    @api.model
+    def _get_webhook_providers(self):
+        """Return, for each webhook provider, the system parameters holding its
+        configuration: `secret`, `allowed_ips` (comma separated addresses and
+        networks), `debug`, `strict_mode` and `timestamp_tolerance` (seconds,
+        300 by default). Extended by the modules receiving webhooks.
+        """
+        return {}
+
+    @api.model
+    @tools.ormcache("provider")
+    def _get_webhook_config(self, provider):
+        keys = self._get_webhook_providers()[provider]
+        get_param = self.env["ir.config_parameter"].sudo().get_param
+
+        def param(name, default=None):
+            return get_param(keys[name], default) if keys.get(name) else default
+
+        return WebhookConfig(
+            secret=param("secret") or "",
+            allowed_networks=parse_allowlist(param("allowed_ips")),
+            debug=param("debug", "0") in TRUE_VALUES,
+            strict_mode=param("strict_mode", "0") in TRUE_VALUES,
+            timestamp_tolerance=int(param("timestamp_tolerance", 300)),
+        )
+
+    @api.model
+    def _get_request_ip(self, httprequest):
+        """Return the address of the client. The forwarded headers are not
+        trusted here: behind a reverse proxy, the proxy mode of the server
+        already sets the remote address from them."""
+        return httprequest.remote_addr
+
+    @api.model
+    def _check_ip(self, config, ip):
+        """Return whether `ip` may call the webhook: always when no allowlist is
+        configured."""
+        return not config.allowed_networks or ip_allowed(config.allowed_networks, ip)
+
+    @api.model
+    def _verify_signature(
+        self, config, signature, raw=None, payload=None, prefix=b"", digestmod=None
+    ):
+        """Verify the HMAC signature of the canonical JSON of a payload, see
+        `utils.verify_hmac`."""
+        return verify_hmac(
+            config.secret,
+            signature,
+            raw=raw,
+            payload=payload,
+            prefix=prefix,
+            digestmod=digestmod or hashlib.sha512,
+        )
+
+    @api.model
+    def _check_replay(self, provider, config, timestamp, nonce):
+        """Reject the requests whose timestamp is outside the tolerance window.
+        The nonce of an accepted request is recorded until the end of the
+        window: a request bearing it again is a retry of the provider, reported
+        as a duplicate even when its timestamp is now out of the window.
+        To be called once the signature is verified, the nonce being derived
+        from it.
+        :return: None when the request is accepted, `DUPLICATE` for a retry of
+        an accepted request, the reason of the rejection otherwise.
+        """
+        timestamp = parse_timestamp(timestamp)
+        if timestamp is None:
+            return "invalid_timestamp"
+        nonces = self.env["webhook.security.nonce"].sudo()
+        if nonce and nonces._is_registered(provider, nonce):
+            return DUPLICATE
+        now = time.time()
+        if abs(now - timestamp) > config.timestamp_tolerance:
+            return "timestamp_out_of_window"
+        if nonce and not nonces._register(
+            provider, nonce, timestamp + config.timestamp_tolerance
+        ):
+            # Recorded meanwhile by a concurrent delivery of the same request
+            return DUPLICATE
+        return None
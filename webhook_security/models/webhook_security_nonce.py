@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+
+from odoo import api, fields, models
+from odoo.tools import SQL
+
+
+class WebhookSecurityNonce(models.Model):
+    """Nonces of the webhook requests seen recently, each one kept until its
+    expiry. Being stored in the database, a replay is detected whichever
+    worker receives it."""
+
+    _name = "webhook.security.nonce"
+    _description = "Webhook Security Nonce"
+    _log_access = False
+
+    provider = fields.Char(required=True, readonly=True)
+    nonce = fields.Char(required=True, readonly=True)
+    expiry = fields.Datetime(required=True, readonly=True, index=True)
+
+    _sql_constraints = [
+        (
+            "uniq_provider_nonce",
+            "unique(provider, nonce)",
+            "This nonce was already seen for this provider.",
+        )
+    ]
+
+    @api.model
+    def _register(self, provider, nonce, expiry):
+        """Record the `nonce` of `provider` until `expiry` (epoch seconds), an
+        expired record of the same nonce being reused.
+        :return: False when the nonce is already recorded and not expired.
+        """
+        expiry = datetime.fromtimestamp(expiry, timezone.utc).replace(tzinfo=None)
+        self.env.cr.execute(
+            SQL(
+                """
+                INSERT INTO webhook_security_nonce (provider, nonce, expiry)
+                VALUES (%(provider)s, %(nonce)s, %(expiry)s)
+                ON CONFLICT (provider, nonce) DO UPDATE
+                SET expiry = EXCLUDED.expiry
+                WHERE webhook_security_nonce.expiry <= %(now)s
+                RETURNING id
+                """,
+                provider=provider,
+                nonce=nonce,
+                expiry=expiry,
+                now=fields.Datetime.now(),
+            )
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def _is_registered(self, provider, nonce):
+        """Return whether the `nonce` of `provider` is recorded and not expired."""
+        self.env.cr.execute(
+            SQL(
+                """
+                SELECT 1 FROM webhook_security_nonce
+                WHERE provider = %s AND nonce = %s AND expiry > %s
+                """,
+                provider,
+                nonce,
+                fields.Datetime.now(),
+            )
+        )
+        return bool(self.env.cr.fetchone())
+
+    @api.autovacuum
+    def _gc_expired_nonces(self):
+        self.env.cr.execute(
+            SQL(
+                "DELETE FROM webhook_security_nonce WHERE expiry <= %s",
+                fields.Datetime.now(),
+            )
+        )
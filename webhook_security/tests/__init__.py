@@ -0,0 +1 @@
+from . import test_webhook_security
@@ -0,0 +1,129 @@
+import hashlib
+import hmac
+import ipaddress
+import time
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from ..models.webhook_security import DUPLICATE, WebhookConfig
+from ..utils import ip_allowed, parse_allowlist, verify_hmac
+
+
+@tagged("post_install", "-at_install")
+class TestWebhookSecurity(TransactionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.security = cls.env["webhook.security"]
+        cls.config = WebhookConfig(
+            secret="secret",
+            allowed_networks=(),
+            debug=False,
+            strict_mode=False,
+            timestamp_tolerance=300,
+        )
+
+    def _sign(self, message, digestmod=hashlib.sha512):
+        return hmac.new(b"secret", message, digestmod).hexdigest()
+
+    def test_verify_hmac(self):
+        payload = {"b": 1, "a": "Thanh toán"}
+        canonical = '{"a":"Thanh toán","b":1}'.encode()
+        signature = self._sign(canonical)
+        self.assertTrue(verify_hmac("secret", signature, raw=canonical))
+        # The raw body is not canonical, the parsed payload is used
+        raw = b'{"b": 1, "a": "Thanh to\\u00e1n"}'
+        self.assertTrue(verify_hmac("secret", signature, raw=raw, payload=payload))
+        self.assertFalse(verify_hmac("secret", signature, raw=raw))
+        self.assertTrue(verify_hmac("secret", signature.upper(), payload=payload))
+        self.assertTrue(
+            verify_hmac(
+                "secret",
+                self._sign(b"1700000000." + canonical),
+                payload=payload,
+                prefix=b"1700000000.",
+            )
+        )
+        self.assertTrue(
+            verify_hmac(
+                "secret",
+                self._sign(canonical, hashlib.sha256),
+                raw=canonical,
+                digestmod=hashlib.sha256,
+            )
+        )
+        self.assertFalse(verify_hmac("other", signature, raw=canonical))
+        self.assertFalse(verify_hmac("secret", signature, payload={"a": 1}))
+        self.assertFalse(verify_hmac("", signature, raw=canonical))
+        self.assertFalse(verify_hmac("secret", "", raw=canonical))
+
+    def test_parse_allowlist(self):
+        networks = parse_allowlist(" 10.0.0.0/8, 192.168.1.10,,invalid, 2001:db8::/32")
+        self.assertEqual(
+            networks,
+            (
+                ipaddress.ip_network("10.0.0.0/8"),
+                ipaddress.ip_network("192.168.1.10/32"),
+                ipaddress.ip_network("2001:db8::/32"),
+            ),
+        )
+        self.assertEqual(parse_allowlist(None), ())
+        # Host bits are ignored
+        self.assertEqual(
+            parse_allowlist("10.1.2.3/8"), (ipaddress.ip_network("10.0.0.0/8"),)
+        )
+        self.assertTrue(ip_allowed(networks, "10.20.30.40"))
+        self.assertTrue(ip_allowed(networks, "2001:db8::1"))
+        self.assertFalse(ip_allowed(networks, "192.168.1.11"))
+        self.assertFalse(ip_allowed(networks, "not an address"))
+        self.assertFalse(ip_allowed(networks, None))
+
+    def test_check_replay(self):
+        now = time.time()
+        check_replay = self.security._check_replay
+        self.assertEqual(
+            check_replay("test", self.config, "abc", "nonce"), "invalid_timestamp"
+        )
+        self.assertEqual(
+            check_replay("test", self.config, now - 600, "nonce"),
+            "timestamp_out_of_window",
+        )
+        self.assertIsNone(check_replay("test", self.config, now, "nonce"))
+        # Timestamps in milliseconds are accepted, the retries of an accepted
+        # request are duplicates, even once out of the window
+        self.assertEqual(
+            check_replay("test", self.config, int(now * 1000), "nonce"), DUPLICATE
+        )
+        self.assertEqual(
+            check_replay("test", self.config, now - 600, "nonce"), DUPLICATE
+        )
+        # The nonces are recorded per provider
+        self.assertIsNone(check_replay("other", self.config, now, "nonce"))
+        self.assertIsNone(check_replay("test", self.config, now, None))
+        self.assertIsNone(check_replay("test", self.config, now, None))
+
+    def test_check_replay_expired_nonce(self):
+        now = time.time()
+        self.assertIsNone(self.security._check_replay("test", self.config, now, "n"))
+        nonce = self.env["webhook.security.nonce"].search(
+            [("provider", "=", "test"), ("nonce", "=", "n")]
+        )
+        self.assertEqual(len(nonce), 1)
+        self.env.cr.execute(
+            "UPDATE webhook_security_nonce SET expiry = expiry - INTERVAL '1 hour'"
+            " WHERE id = %s",
+            [nonce.id],
+        )
+        nonce.invalidate_recordset()
+        # An expired nonce is accepted again and its record reused
+        self.assertIsNone(self.security._check_replay("test", self.config, now, "n"))
+        self.assertGreater(nonce.expiry, fields.Datetime.now())
+        self.env.cr.execute(
+            "UPDATE webhook_security_nonce SET expiry = expiry - INTERVAL '1 hour'"
+            " WHERE id = %s",
+            [nonce.id],
+        )
+        nonce.invalidate_recordset()
+        nonce._gc_expired_nonces()
+        self.assertFalse(nonce.exists())
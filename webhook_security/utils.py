@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import ipaddress
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Canonical JSON of the signed payloads: sorted keys, compact separators and
+# non ASCII characters kept as is
+_CANONICAL_ENCODER = json.JSONEncoder(
+    sort_keys=True, separators=(",", ":"), ensure_ascii=False
+)
+
+
+def parse_allowlist(value):
+    """Parse a comma separated list of IP addresses and networks (CIDR) into a
+    tuple of networks. Invalid entries are logged and ignored."""
+    networks = []
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            _logger.warning("[webhook_security] Invalid allowlist entry: %s", entry)
+    return tuple(networks)
+
+
+def ip_allowed(networks, ip):
+    """Return whether `ip` belongs to one of `networks`."""
+    try:
+        address = ipaddress.ip_address((ip or "").strip())
+    except ValueError:
+        return False
+    return any(address in network for network in networks)
+
+
+def verify_hmac(
+    secret, signature, raw=None, payload=None, prefix=b"", digestmod=hashlib.sha512
+):
+    """Verify the hex HMAC `signature` of `prefix` followed by the canonical JSON
+    of a payload.
+
+    The raw body is tried first: senders usually post the canonical JSON they
+    signed, so the payload does not need to be serialized again. Otherwise
+    the canonical JSON of the parsed `payload` is fed to the HMAC by chunks,
+    without building it in memory.
+    """
+    if not secret or not signature:
+        return False
+    signature = signature.strip().lower()
+    key = secret.encode("utf-8")
+    if raw:
+        mac = hmac.new(key, prefix, digestmod)
+        mac.update(raw)
+        if hmac.compare_digest(mac.hexdigest(), signature):
+            return True
+    if payload is None:
+        return False
+    mac = hmac.new(key, prefix, digestmod)
+    for chunk in _CANONICAL_ENCODER.iterencode(payload):
+        mac.update(chunk.encode("utf-8"))
+    return hmac.compare_digest(mac.hexdigest(), signature)
+
+
+def parse_timestamp(value):
+    """Return a timestamp in seconds from a value in seconds or milliseconds,
+    None when it cannot be parsed."""
+    try:
+        timestamp = float(value)
+    except (TypeError, ValueError):
+        return None
+    if timestamp > 1e11:
+        # Milliseconds
+        timestamp /= 1000.0
+    return timestamp